@@ -0,0 +1,92 @@
+"""add side quest completions
+
+Revision ID: 03d7241c4088
+Revises: 22eb80b02af5
+Create Date: 2026-10-17 03:26:03.980899
+
+"""
+import datetime
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '03d7241c4088'
+down_revision: Union[str, Sequence[str], None] = '22eb80b02af5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _is_date(key) -> bool:
+    # Only real YYYY-MM-DD keys become rows; anything else in the blobs is dropped
+    if not isinstance(key, str) or not ISO_DATE.fullmatch(key):
+        return False
+    try:
+        datetime.date.fromisoformat(key)
+    except ValueError:
+        return False
+    return True
+
+side_quests = sa.table(
+    "side_quests",
+    sa.column("id", sa.String),
+    sa.column("user_id", sa.String),
+    sa.column("completions", sa.JSON),
+)
+
+side_quest_completions = sa.table(
+    "side_quest_completions",
+    sa.column("side_quest_id", sa.String),
+    sa.column("date", sa.String),
+    sa.column("user_id", sa.String),
+    sa.column("count", sa.Integer),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('side_quest_completions',
+    sa.Column('side_quest_id', sa.String(), nullable=False),
+    sa.Column('date', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['side_quest_id'], ['side_quests.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('side_quest_id', 'date')
+    )
+    op.create_index('ix_side_quest_completions_user_id_date', 'side_quest_completions', ['user_id', 'date'], unique=False)
+
+    # Backfill one row per date from the JSON blobs
+    bind = op.get_bind()
+    rows = [
+        {"side_quest_id": quest_id, "date": date, "user_id": user_id, "count": int(count or 0)}
+        for quest_id, user_id, completions in bind.execute(sa.select(side_quests.c.id, side_quests.c.user_id, side_quests.c.completions))
+        for date, count in (completions or {}).items()
+        if _is_date(date)
+    ]
+    if rows:
+        op.bulk_insert(side_quest_completions, rows)
+
+    with op.batch_alter_table('side_quests') as batch_op:
+        batch_op.drop_column('completions')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('side_quests') as batch_op:
+        batch_op.add_column(sa.Column('completions', sa.JSON(), nullable=True))
+
+    # Fold the rows back into the JSON blobs
+    bind = op.get_bind()
+    blobs = {}
+    for quest_id, date, count in bind.execute(sa.select(side_quest_completions.c.side_quest_id, side_quest_completions.c.date, side_quest_completions.c.count)):
+        blobs.setdefault(quest_id, {})[date] = count
+    for quest_id, completions in blobs.items():
+        bind.execute(side_quests.update().where(side_quests.c.id == quest_id).values(completions=completions))
+
+    op.drop_index('ix_side_quest_completions_user_id_date', table_name='side_quest_completions')
+    op.drop_table('side_quest_completions')
@@ -0,0 +1,46 @@
+"""add per-user indexes
+
+Revision ID: 041477004cc5
+Revises: 3b92ff5efa9b
+Create Date: 2026-10-17 03:21:22.958782
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '041477004cc5'
+down_revision: Union[str, Sequence[str], None] = '3b92ff5efa9b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_core_list_user_id'), 'core_list', ['user_id'], unique=False)
+    op.create_index('ix_diary_entries_user_id_date', 'diary_entries', ['user_id', 'date'], unique=False)
+    op.create_index(op.f('ix_goals_user_id'), 'goals', ['user_id'], unique=False)
+    op.create_index('ix_purchased_rewards_user_id_purchase_date', 'purchased_rewards', ['user_id', 'purchase_date'], unique=False)
+    op.create_index(op.f('ix_recurring_tasks_user_id'), 'recurring_tasks', ['user_id'], unique=False)
+    op.create_index(op.f('ix_rewards_user_id'), 'rewards', ['user_id'], unique=False)
+    op.create_index(op.f('ix_side_quests_user_id'), 'side_quests', ['user_id'], unique=False)
+    op.create_index('ix_tasks_user_id_date', 'tasks', ['user_id', 'date'], unique=False)
+    op.create_index('ix_weekly_goals_user_id_target_date', 'weekly_goals', ['user_id', 'target_date'], unique=False)
+    op.create_index(op.f('ix_wish_list_user_id'), 'wish_list', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_wish_list_user_id'), table_name='wish_list')
+    op.drop_index('ix_weekly_goals_user_id_target_date', table_name='weekly_goals')
+    op.drop_index('ix_tasks_user_id_date', table_name='tasks')
+    op.drop_index(op.f('ix_side_quests_user_id'), table_name='side_quests')
+    op.drop_index(op.f('ix_rewards_user_id'), table_name='rewards')
+    op.drop_index(op.f('ix_recurring_tasks_user_id'), table_name='recurring_tasks')
+    op.drop_index('ix_purchased_rewards_user_id_purchase_date', table_name='purchased_rewards')
+    op.drop_index(op.f('ix_goals_user_id'), table_name='goals')
+    op.drop_index('ix_diary_entries_user_id_date', table_name='diary_entries')
+    op.drop_index(op.f('ix_core_list_user_id'), table_name='core_list')
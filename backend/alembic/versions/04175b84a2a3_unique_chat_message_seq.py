@@ -0,0 +1,68 @@
+"""unique chat message seq
+
+Revision ID: 04175b84a2a3
+Revises: 122da2d9ab3c
+Create Date: 2026-10-17 03:59:17.024096
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '04175b84a2a3'
+down_revision: Union[str, Sequence[str], None] = '122da2d9ab3c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+chat_sessions = sa.table(
+    "chat_sessions",
+    sa.column("id", sa.String),
+    sa.column("summarized_through", sa.Integer),
+)
+chat_messages = sa.table(
+    "chat_messages",
+    sa.column("id", sa.String),
+    sa.column("session_id", sa.String),
+    sa.column("seq", sa.Integer),
+    sa.column("created_at", sa.DateTime),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Renumber sessions where concurrent turns already took the same seq, keeping
+    # summarized_through on the last message it covered
+    bind = op.get_bind()
+    duplicated = bind.execute(
+        sa.select(chat_messages.c.session_id)
+        .group_by(chat_messages.c.session_id, chat_messages.c.seq)
+        .having(sa.func.count() > 1)
+        .distinct()
+    ).scalars().all()
+    for session_id in duplicated:
+        through = bind.execute(
+            sa.select(chat_sessions.c.summarized_through).where(chat_sessions.c.id == session_id)
+        ).scalar() or 0
+        rows = bind.execute(
+            sa.select(chat_messages.c.id, chat_messages.c.seq)
+            .where(chat_messages.c.session_id == session_id)
+            .order_by(chat_messages.c.seq, chat_messages.c.created_at, chat_messages.c.id)
+        ).all()
+        new_through = 0
+        for seq, (message_id, old_seq) in enumerate(rows, start=1):
+            bind.execute(chat_messages.update().where(chat_messages.c.id == message_id).values(seq=seq))
+            if old_seq is not None and old_seq <= through:
+                new_through = seq
+        bind.execute(chat_sessions.update().where(chat_sessions.c.id == session_id).values(summarized_through=new_through))
+
+    with op.batch_alter_table('chat_messages') as batch_op:
+        batch_op.create_unique_constraint('uq_chat_messages_session_id_seq', ['session_id', 'seq'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('chat_messages') as batch_op:
+        batch_op.drop_constraint('uq_chat_messages_session_id_seq', type_='unique')
@@ -0,0 +1,114 @@
+"""use date columns
+
+Revision ID: 122da2d9ab3c
+Revises: 03d7241c4088
+Create Date: 2026-10-17 03:29:17.651083
+
+"""
+import datetime
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '122da2d9ab3c'
+down_revision: Union[str, Sequence[str], None] = '03d7241c4088'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column, part of the primary key)
+DATE_COLUMNS = [
+    ("tasks", "date", False),
+    ("recurring_tasks", "start_date", False),
+    ("recurring_completions", "date", True),
+    ("side_quest_completions", "date", True),
+    ("goals", "target_date", False),
+    ("goals", "completion_date", False),
+    ("weekly_goals", "target_date", False),
+    ("purchased_rewards", "purchase_date", False),
+    ("diary_entries", "date", True),
+    ("weekly_briefings", "week_start", False),
+]
+
+
+def _by_table():
+    tables = {}
+    for table, column, in_pk in DATE_COLUMNS:
+        tables.setdefault(table, []).append((column, in_pk))
+    return tables.items()
+
+
+# A date at the start of the text, as older clients wrote them: '2024-01-05',
+# '2024-1-5', '2024/01/05' or a timestamp such as '2024-12-31T00:00:00.000Z'
+LEGACY_DATE = re.compile(r"(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?:[T ].*)?")
+
+
+def _normalize(value):
+    """'YYYY-MM-DD' for anything that reads as a date, None otherwise."""
+    match = LEGACY_DATE.fullmatch(str(value).strip())
+    if not match:
+        return None
+    try:
+        return datetime.date(*map(int, match.groups())).isoformat()
+    except ValueError:
+        return None
+
+
+def _normalize_column(table: str, column: str, in_pk: bool):
+    # Rewrite every stored value as YYYY-MM-DD before the type change: SQLite
+    # would keep anything else as-is and fail on read, Postgres would abort on
+    # the ::date cast. Unreadable values become NULL, or for key columns the
+    # row goes, as does a row whose normalized key another row already holds.
+    bind = op.get_bind()
+    others = [name for name in sa.inspect(bind).get_pk_constraint(table)["constrained_columns"] if name != column]
+    t = sa.table(table, sa.column(column, sa.String), *(sa.column(name) for name in others))
+    values = bind.execute(sa.select(t.c[column]).where(t.c[column].is_not(None)).distinct()).scalars().all()
+    for old in values:
+        new = _normalize(old)
+        if new == old:
+            continue
+        if not in_pk:
+            bind.execute(t.update().where(t.c[column] == old).values({column: new}))
+            continue
+        if new is None:
+            bind.execute(t.delete().where(t.c[column] == old))
+            continue
+        taken = t.alias("taken")
+        bind.execute(t.delete().where(t.c[column] == old, sa.exists().where(
+            taken.c[column] == new, *(taken.c[name] == t.c[name] for name in others)
+        )))
+        bind.execute(t.update().where(t.c[column] == old).values({column: new}))
+
+
+def _retype(type_, using: str):
+    sqlite = op.get_bind().dialect.name == "sqlite"
+    for table, columns in _by_table():
+        if sqlite:
+            # Rebuild the table with the columns declared as the new type. A plain
+            # alter_column would copy through CAST(x AS DATE), which SQLite turns
+            # into the number 2026; the 'YYYY-MM-DD' text is already what
+            # SQLAlchemy stores for DATE there, so it's copied as-is.
+            overrides = [sa.Column(column, type_, primary_key=in_pk, nullable=not in_pk) for column, in_pk in columns]
+            with op.batch_alter_table(table, recreate="always", reflect_args=overrides):
+                pass
+        else:
+            for column, in_pk in columns:
+                op.alter_column(table, column, type_=type_, existing_nullable=not in_pk,
+                                postgresql_using=using.format(column=column))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column, in_pk in DATE_COLUMNS:
+        # Blank strings were the old "no date" and become NULL with the rest
+        _normalize_column(table, column, in_pk)
+    _retype(sa.Date(), "{column}::date")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _retype(sa.String(), "to_char({column}, 'YYYY-MM-DD')")
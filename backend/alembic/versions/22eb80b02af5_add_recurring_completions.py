@@ -0,0 +1,120 @@
+"""add recurring completions
+
+Revision ID: 22eb80b02af5
+Revises: 041477004cc5
+Create Date: 2026-10-17 03:24:01.269795
+
+"""
+import datetime
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '22eb80b02af5'
+down_revision: Union[str, Sequence[str], None] = '041477004cc5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FIELDS = {
+    "completed": "completed",
+    "actualTime": "actual_time",
+    "time": "time",
+    "betAmount": "bet_amount",
+    "betMultiplier": "bet_multiplier",
+    "betPlaced": "bet_placed",
+    "betWon": "bet_won",
+}
+
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _is_date(key) -> bool:
+    # Only real YYYY-MM-DD keys become rows; anything else in the blobs is dropped
+    if not isinstance(key, str) or not ISO_DATE.fullmatch(key):
+        return False
+    try:
+        datetime.date.fromisoformat(key)
+    except ValueError:
+        return False
+    return True
+
+recurring_tasks = sa.table(
+    "recurring_tasks",
+    sa.column("id", sa.String),
+    sa.column("user_id", sa.String),
+    sa.column("completions", sa.JSON),
+)
+
+recurring_completions = sa.table(
+    "recurring_completions",
+    sa.column("recurring_task_id", sa.String),
+    sa.column("date", sa.String),
+    sa.column("user_id", sa.String),
+    sa.column("completed", sa.Boolean),
+    sa.column("actual_time", sa.Float),
+    sa.column("time", sa.String),
+    sa.column("bet_amount", sa.Float),
+    sa.column("bet_multiplier", sa.Float),
+    sa.column("bet_placed", sa.Boolean),
+    sa.column("bet_won", sa.Boolean),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('recurring_completions',
+    sa.Column('recurring_task_id', sa.String(), nullable=False),
+    sa.Column('date', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('completed', sa.Boolean(), nullable=True),
+    sa.Column('actual_time', sa.Float(), nullable=True),
+    sa.Column('time', sa.String(), nullable=True),
+    sa.Column('bet_amount', sa.Float(), nullable=True),
+    sa.Column('bet_multiplier', sa.Float(), nullable=True),
+    sa.Column('bet_placed', sa.Boolean(), nullable=True),
+    sa.Column('bet_won', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['recurring_task_id'], ['recurring_tasks.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('recurring_task_id', 'date')
+    )
+    op.create_index('ix_recurring_completions_user_id_date', 'recurring_completions', ['user_id', 'date'], unique=False)
+
+    # Backfill one row per date from the JSON blobs
+    bind = op.get_bind()
+    rows = []
+    for task_id, user_id, completions in bind.execute(sa.select(recurring_tasks.c.id, recurring_tasks.c.user_id, recurring_tasks.c.completions)):
+        for date, entry in (completions or {}).items():
+            if not _is_date(date):
+                continue
+            if not isinstance(entry, dict):
+                entry = {"completed": bool(entry)}
+            row = {"recurring_task_id": task_id, "date": date, "user_id": user_id}
+            row.update({column: entry.get(key) for key, column in FIELDS.items()})
+            row["completed"] = bool(row["completed"])
+            rows.append(row)
+    if rows:
+        op.bulk_insert(recurring_completions, rows)
+
+    with op.batch_alter_table('recurring_tasks') as batch_op:
+        batch_op.drop_column('completions')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('recurring_tasks') as batch_op:
+        batch_op.add_column(sa.Column('completions', sa.JSON(), nullable=True))
+
+    # Fold the rows back into the JSON blobs
+    bind = op.get_bind()
+    blobs = {}
+    for row in bind.execute(sa.select(recurring_completions)).mappings():
+        entry = {key: row[column] for key, column in FIELDS.items() if row[column] is not None}
+        blobs.setdefault(row["recurring_task_id"], {})[row["date"]] = entry
+    for task_id, completions in blobs.items():
+        bind.execute(recurring_tasks.update().where(recurring_tasks.c.id == task_id).values(completions=completions))
+
+    op.drop_index('ix_recurring_completions_user_id_date', table_name='recurring_completions')
+    op.drop_table('recurring_completions')
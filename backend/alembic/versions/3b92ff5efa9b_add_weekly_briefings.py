@@ -0,0 +1,39 @@
+"""add weekly briefings
+
+Revision ID: 3b92ff5efa9b
+Revises: 8c31c182a38e
+Create Date: 2026-10-17 03:18:09.151051
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b92ff5efa9b'
+down_revision: Union[str, Sequence[str], None] = '8c31c182a38e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('weekly_briefings',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('week_start', sa.String(), nullable=True),
+    sa.Column('briefing', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'week_start')
+    )
+    op.create_index(op.f('ix_weekly_briefings_user_id'), 'weekly_briefings', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_weekly_briefings_user_id'), table_name='weekly_briefings')
+    op.drop_table('weekly_briefings')
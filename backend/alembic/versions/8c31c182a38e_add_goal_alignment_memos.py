@@ -0,0 +1,42 @@
+"""add goal alignment memos
+
+Revision ID: 8c31c182a38e
+Revises: 25426433af22
+Create Date: 2026-10-17 03:14:06.232208
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c31c182a38e'
+down_revision: Union[str, Sequence[str], None] = '25426433af22'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('goal_alignment_memos',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('description_key', sa.String(), nullable=True),
+    sa.Column('goals_hash', sa.String(), nullable=True),
+    sa.Column('alignment_score', sa.Float(), nullable=True),
+    sa.Column('justification', sa.Text(), nullable=True),
+    sa.Column('aligned_goal_id', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'description_key', 'goals_hash')
+    )
+    op.create_index(op.f('ix_goal_alignment_memos_user_id'), 'goal_alignment_memos', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_goal_alignment_memos_user_id'), table_name='goal_alignment_memos')
+    op.drop_table('goal_alignment_memos')
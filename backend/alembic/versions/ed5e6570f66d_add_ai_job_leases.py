@@ -0,0 +1,31 @@
+"""add ai job leases
+
+Revision ID: ed5e6570f66d
+Revises: 04175b84a2a3
+Create Date: 2026-10-17 04:12:56.900501
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ed5e6570f66d'
+down_revision: Union[str, Sequence[str], None] = '04175b84a2a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ai_jobs', sa.Column('worker_id', sa.String(), nullable=True))
+    op.add_column('ai_jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ai_jobs') as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('worker_id')
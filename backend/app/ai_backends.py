@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from google.genai import types, errors
+from app.ai_cache import cache_key
+
+# Model backends sit behind GenAIModelWrapper. Every backend exposes the same three
+# calls and returns objects with a `.text` attribute, like the SDK responses.
+#   generate(model_name, prompt, json_mode)   -> blocking
+#   agenerate(model_name, prompt, json_mode)  -> awaitable
+#   astream(model_name, prompt, json_mode)    -> async iterator of text chunks
+
+def _config(json_mode: bool):
+    if json_mode:
+        return types.GenerateContentConfig(response_mime_type="application/json")
+    return None
+
+def fixture_key(prompt: str, model_name: str, json_mode: bool) -> str:
+    # Same whitespace normalization as the response cache, minus the endpoint
+    return cache_key("fixture", prompt, model_name, json_mode)
+
+class GeminiBackend:
+    def __init__(self, client):
+        self.client = client
+
+    def generate(self, model_name: str, prompt: str, json_mode: bool):
+        return self.client.models.generate_content(model=model_name, contents=prompt, config=_config(json_mode))
+
+    async def agenerate(self, model_name: str, prompt: str, json_mode: bool):
+        return await self.client.aio.models.generate_content(model=model_name, contents=prompt, config=_config(json_mode))
+
+    async def astream(self, model_name: str, prompt: str, json_mode: bool):
+        stream = await self.client.aio.models.generate_content_stream(model=model_name, contents=prompt, config=_config(json_mode))
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+
+@dataclass
+class FakeResponse:
+    text: str
+
+class LatencyModel:
+    """Parsed from specs like "fixed:0.2", "uniform:0.1:0.8" or "lognormal:0.5:0.6"
+    (median seconds, sigma). All values are seconds."""
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency model: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0] if self.params else 0.0
+        if self.kind == "uniform":
+            return rng.uniform(self.params[0], self.params[1])
+        median, sigma = self.params
+        return median * rng.lognormvariate(0, sigma)
+
+class FakeBackend:
+    """Offline stand-in for Gemini. Replays recorded responses by prompt hash and
+    falls back to canned defaults for prompts it has never seen. Latency, error
+    rate and streaming chunking are configurable so routes can be load tested
+    without a key or a network."""
+
+    def __init__(self, fixtures: Optional[dict] = None, latency: str = "fixed:0", error_rate: float = 0.0,
+                 chunk_words: int = 3, chunk_delay: float = 0.0, seed: Optional[int] = None,
+                 default_text: str = "Stay hard. Who's gonna carry the boats?", default_json: str = "{}"):
+        self.fixtures = fixtures or {}
+        self.latency = LatencyModel(latency)
+        self.error_rate = error_rate
+        self.chunk_words = chunk_words
+        self.chunk_delay = chunk_delay
+        self.default_text = default_text
+        self.default_json = default_json
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.replayed = 0
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "FakeBackend":
+        with open(path) as f:
+            return cls(fixtures=json.load(f), **kwargs)
+
+    def _respond(self, model_name: str, prompt: str, json_mode: bool) -> str:
+        self.calls += 1
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise errors.ServerError(503, {"error": {"code": 503, "message": "Injected fake backend error", "status": "UNAVAILABLE"}})
+        text = self.fixtures.get(fixture_key(prompt, model_name, json_mode))
+        if text is not None:
+            self.replayed += 1
+            return text
+        return self.default_json if json_mode else self.default_text
+
+    def generate(self, model_name: str, prompt: str, json_mode: bool):
+        delay = self.latency.sample(self.rng)
+        time.sleep(delay)
+        return FakeResponse(self._respond(model_name, prompt, json_mode))
+
+    async def agenerate(self, model_name: str, prompt: str, json_mode: bool):
+        await asyncio.sleep(self.latency.sample(self.rng))
+        return FakeResponse(self._respond(model_name, prompt, json_mode))
+
+    async def astream(self, model_name: str, prompt: str, json_mode: bool):
+        # Latency model is time-to-first-chunk; chunk_delay spaces the rest
+        await asyncio.sleep(self.latency.sample(self.rng))
+        words = self._respond(model_name, prompt, json_mode).split(" ")
+        for i in range(0, len(words), self.chunk_words):
+            if i:
+                await asyncio.sleep(self.chunk_delay)
+            chunk = " ".join(words[i:i + self.chunk_words])
+            yield chunk if i + self.chunk_words >= len(words) else chunk + " "
+
+class RecordingBackend:
+    """Passes calls through to another backend and records the answers into a
+    fixtures file that FakeBackend can replay later."""
+
+    def __init__(self, inner, path: str):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _record(self, model_name: str, prompt: str, json_mode: bool, text: str):
+        with self._lock:
+            fixtures = {}
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    fixtures = json.load(f)
+            fixtures[fixture_key(prompt, model_name, json_mode)] = text
+            with open(self.path, "w") as f:
+                json.dump(fixtures, f, indent=2, sort_keys=True)
+
+    def generate(self, model_name: str, prompt: str, json_mode: bool):
+        response = self.inner.generate(model_name, prompt, json_mode)
+        self._record(model_name, prompt, json_mode, response.text)
+        return response
+
+    async def agenerate(self, model_name: str, prompt: str, json_mode: bool):
+        response = await self.inner.agenerate(model_name, prompt, json_mode)
+        await asyncio.to_thread(self._record, model_name, prompt, json_mode, response.text)
+        return response
+
+    async def astream(self, model_name: str, prompt: str, json_mode: bool):
+        chunks = []
+        async for chunk in self.inner.astream(model_name, prompt, json_mode):
+            chunks.append(chunk)
+            yield chunk
+        await asyncio.to_thread(self._record, model_name, prompt, json_mode, "".join(chunks))
@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Only deterministic endpoints are cached. Creative ones (story, chat, feedback)
+# are expected to vary between calls and are never looked up.
+ENDPOINT_TTLS = {
+    "label": 7 * 24 * 3600,
+    "analyze-goal-alignment": 24 * 3600,
+    "atomic-system": 24 * 3600,
+    "contract": 24 * 3600,
+    "betting-odds": 3600,
+}
+
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "2048"))
+# Set to a file path to keep cached responses across restarts.
+AI_CACHE_SQLITE_PATH = os.getenv("AI_CACHE_SQLITE_PATH")
+
+_WHITESPACE = re.compile(r"\s+")
+
+def cache_key(endpoint: str, prompt: str, model_name: str, json_mode: bool) -> str:
+    # Prompts are built from indented f-strings, so collapse whitespace before hashing
+    normalized = _WHITESPACE.sub(" ", prompt).strip()
+    raw = "\x1f".join([endpoint, model_name, "json" if json_mode else "text", normalized])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+class SQLiteCacheTier:
+    """Persistent second tier. sqlite3 is blocking, so callers go through asyncio.to_thread."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_cache (key TEXT PRIMARY KEY, endpoint TEXT, value TEXT, expires_at REAL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str, now: float) -> Optional[tuple]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM ai_cache WHERE key = ?", (key,)).fetchone()
+            if row and row[1] <= now:
+                self._conn.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row
+
+    def set(self, key: str, endpoint: str, value: str, expires_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ai_cache (key, endpoint, value, expires_at) VALUES (?, ?, ?, ?)",
+                (key, endpoint, value, expires_at)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM ai_cache")
+            self._conn.commit()
+
+class AIResponseCache:
+    """In-memory LRU of model responses with per-endpoint TTLs and an optional SQLite tier."""
+
+    def __init__(self, max_entries: int, ttls: dict, persistent: Optional[SQLiteCacheTier] = None):
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self.persistent = persistent
+        self._entries = OrderedDict() # key -> (value, expires_at)
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.by_endpoint = {}
+
+    def is_cacheable(self, endpoint: str) -> bool:
+        return endpoint in self.ttls
+
+    def _count(self, endpoint: str, outcome: str):
+        counts = self.by_endpoint.setdefault(endpoint, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_memory(self, key: str, now: float) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def get(self, endpoint: str, key: str) -> Optional[str]:
+        now = time.time()
+        value = self.get_memory(key, now)
+        if value is not None:
+            self.hits += 1
+            self._count(endpoint, "hits")
+            return value
+        if self.persistent:
+            row = await asyncio.to_thread(self.persistent.get, key, now)
+            if row:
+                self.persistent_hits += 1
+                self._count(endpoint, "hits")
+                self._remember(key, row[0], row[1])
+                return row[0]
+        self.misses += 1
+        self._count(endpoint, "misses")
+        return None
+
+    async def set(self, endpoint: str, key: str, value: str):
+        expires_at = time.time() + self.ttls[endpoint]
+        self._remember(key, value, expires_at)
+        if self.persistent:
+            await asyncio.to_thread(self.persistent.set, key, endpoint, value, expires_at)
+
+    def clear(self):
+        self._entries.clear()
+        if self.persistent:
+            self.persistent.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.persistent_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.persistent_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "persistent": self.persistent is not None,
+            "by_endpoint": self.by_endpoint,
+        }
+
+response_cache = AIResponseCache(
+    AI_CACHE_MAX_ENTRIES,
+    ENDPOINT_TTLS,
+    SQLiteCacheTier(AI_CACHE_SQLITE_PATH) if AI_CACHE_SQLITE_PATH else None
+)
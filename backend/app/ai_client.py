@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException
+from google import genai
+from google.genai import errors
+from app import models
+from app.ai_backends import GeminiBackend, FakeBackend, RecordingBackend
+from app.ai_cache import response_cache, cache_key
+from app.singleflight import SingleFlight
+from app.circuit_breaker import CircuitBreaker
+from app.ai_metrics import ai_metrics
+
+# Max concurrent Gemini calls per process. Extra callers queue on the limiter
+# instead of piling up sockets against the API.
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "16"))
+
+# Process-wide client registry bounds. Clients keep warm HTTP connections, so
+# reusing them per key saves a TLS handshake on every AI call.
+AI_CLIENT_POOL_SIZE = int(os.getenv("AI_CLIENT_POOL_SIZE", "64"))
+AI_CLIENT_IDLE_SECONDS = float(os.getenv("AI_CLIENT_IDLE_SECONDS", "900"))
+
+# Shared breaker: after this many consecutive upstream failures every AI route
+# returns its fallback immediately for AI_BREAKER_RESET_SECONDS.
+AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv("AI_BREAKER_FAILURE_THRESHOLD", "5"))
+AI_BREAKER_RESET_SECONDS = float(os.getenv("AI_BREAKER_RESET_SECONDS", "30"))
+
+# Per-endpoint deadlines (seconds) instead of the SDK's much longer default.
+# For streams the deadline applies to the wait for each chunk.
+AI_DEFAULT_DEADLINE = float(os.getenv("AI_DEFAULT_DEADLINE", "20"))
+ENDPOINT_DEADLINES = {
+    "label": 5,
+    "label-batch": 15,
+    "analyze-goal-alignment": 8,
+    "betting-odds": 8,
+    "enhance-text": 10,
+    "story": 10,
+    "reflection-feedback": 10,
+    "chat": 15,
+    "chat-summary": 30,
+    "review": 30,
+    "contract": 30,
+    "evaluate-weekly": 30,
+}
+
+# Model backend: "gemini" (default), "fake" (offline replay, no key needed) or
+# "record" (Gemini, saving every answer into AI_FIXTURES_PATH for later replay).
+AI_BACKEND = os.getenv("AI_BACKEND", "gemini")
+AI_FIXTURES_PATH = os.getenv("AI_FIXTURES_PATH")
+AI_FAKE_LATENCY = os.getenv("AI_FAKE_LATENCY", "fixed:0")
+AI_FAKE_ERROR_RATE = float(os.getenv("AI_FAKE_ERROR_RATE", "0"))
+
+DEFAULT_MODEL = 'gemini-2.0-flash'
+
+class AIConcurrencyLimiter:
+    """Bounds in-flight model calls. The semaphore is created lazily per event loop
+    so the limiter survives test clients and reloads that spin up new loops."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._semaphore = None
+        self._loop = None
+        self._semaphore_limit = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop or self._semaphore_limit != self.limit:
+            self._semaphore = asyncio.Semaphore(self.limit)
+            self._loop = loop
+            self._semaphore_limit = self.limit
+        return self._semaphore
+
+    async def __aenter__(self):
+        await self._get_semaphore().acquire()
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        self._semaphore.release()
+        return False
+
+limiter = AIConcurrencyLimiter(AI_MAX_CONCURRENCY)
+
+class GenAIClientPool:
+    """LRU registry of genai.Client instances keyed by (a hash of) the API key.
+    Entries idle longer than idle_seconds are dropped on the next lookup."""
+
+    def __init__(self, max_size: int, idle_seconds: float):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._clients = OrderedDict() # key_hash -> (client, last_used)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _key_hash(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode()).hexdigest()
+
+    def _expire(self, now: float):
+        stale = [k for k, (_, last_used) in self._clients.items() if now - last_used > self.idle_seconds]
+        for k in stale:
+            del self._clients[k]
+        self.expirations += len(stale)
+
+    def get(self, api_key: str):
+        key_hash = self._key_hash(api_key)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._clients.get(key_hash)
+            if entry:
+                self.hits += 1
+                client = entry[0]
+                self._clients.move_to_end(key_hash)
+            else:
+                self.misses += 1
+                client = genai.Client(api_key=api_key)
+            self._clients[key_hash] = (client, now)
+            while len(self._clients) > self.max_size:
+                # Evicted clients are only dereferenced, not closed: a request
+                # may still be mid-call on one of them.
+                self._clients.popitem(last=False)
+                self.evictions += 1
+            return client
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "live_clients": len(self._clients),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+client_pool = GenAIClientPool(AI_CLIENT_POOL_SIZE, AI_CLIENT_IDLE_SECONDS)
+
+singleflight = SingleFlight()
+
+breaker = CircuitBreaker(AI_BREAKER_FAILURE_THRESHOLD, AI_BREAKER_RESET_SECONDS)
+
+def deadline_for(endpoint: str) -> float:
+    return ENDPOINT_DEADLINES.get(endpoint, AI_DEFAULT_DEADLINE)
+
+def _is_upstream_failure(e: BaseException) -> bool:
+    # 4xx (bad key, bad request) is the caller's problem, except rate limiting
+    if isinstance(e, errors.ClientError):
+        return e.code == 429
+    return True
+
+# When set, every model uses this backend instead of Gemini (offline mode, tests, benchmarks)
+backend_override = None
+if AI_BACKEND == "fake":
+    backend_override = (
+        FakeBackend.from_file(AI_FIXTURES_PATH, latency=AI_FAKE_LATENCY, error_rate=AI_FAKE_ERROR_RATE)
+        if AI_FIXTURES_PATH else FakeBackend(latency=AI_FAKE_LATENCY, error_rate=AI_FAKE_ERROR_RATE)
+    )
+
+def get_backend(api_key: str):
+    if backend_override is not None:
+        return backend_override
+    backend = GeminiBackend(client_pool.get(api_key))
+    if AI_BACKEND == "record" and AI_FIXTURES_PATH:
+        return RecordingBackend(backend, AI_FIXTURES_PATH)
+    return backend
+
+# Wrapper to mimic old behavior largely but with new Client
+class GenAIModelWrapper:
+    def __init__(self, api_key: str, model_name: str, json_mode: bool = False, user_id: str = None):
+        self.backend = get_backend(api_key)
+        self.key_hash = GenAIClientPool._key_hash(api_key)
+        self.model_name = model_name
+        self.json_mode = json_mode
+        self.user_id = user_id # for per-user metrics only
+
+    def generate_content(self, prompt: str):
+        # Blocking call. Only use outside the event loop (scripts, worker threads).
+        return self.backend.generate(self.model_name, prompt, self.json_mode)
+
+    async def generate_content_async(self, prompt: str, deadline: float = None):
+        # Uses the SDK's native async client so a slow Gemini call never stalls
+        # the event loop serving the rest of the API. The deadline starts once a
+        # limiter slot is free: time queued locally says nothing about Gemini.
+        async with limiter:
+            return await asyncio.wait_for(self.backend.agenerate(self.model_name, prompt, self.json_mode), deadline)
+
+    async def stream_content_async(self, prompt: str, deadline: float = None):
+        # Yields text chunks as Gemini produces them. The limiter slot is held
+        # until the stream is exhausted or the consumer goes away; the deadline
+        # applies to the wait for each chunk once the slot is held.
+        async with limiter:
+            stream = self.backend.astream(self.model_name, prompt, self.json_mode)
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), deadline)
+                    except StopAsyncIteration:
+                        return
+                    yield chunk
+            finally:
+                await stream.aclose()
+
+def _is_valid_json(text: str) -> bool:
+    try:
+        json.loads(text)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+async def generate_text(model: GenAIModelWrapper, prompt: str, endpoint: str) -> str:
+    # Single entry point for the AI router: serves deterministic endpoints from the
+    # response cache and only falls through to Gemini on a miss. Identical prompts
+    # already in flight for the same key share one upstream call.
+    started = time.monotonic()
+    key = cache_key(endpoint, prompt, model.model_name, model.json_mode)
+    cacheable = response_cache.is_cacheable(endpoint)
+    if cacheable:
+        cached = await response_cache.get(endpoint, key)
+        if cached is not None:
+            ai_metrics.observe_call(endpoint, model.user_id, time.monotonic() - started, prompt, cached, cache_hit=True)
+            return cached
+
+    async def call() -> str:
+        breaker.before_call()
+        upstream_started = time.monotonic()
+        try:
+            response = await model.generate_content_async(prompt, deadline_for(endpoint))
+        except Exception as e:
+            if _is_upstream_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_ignored()
+            raise
+        except asyncio.CancelledError:
+            breaker.record_ignored()
+            raise
+        breaker.record_success()
+        text = response.text
+        ai_metrics.observe_upstream(endpoint, time.monotonic() - upstream_started, prompt, response, text)
+        # Never pin a malformed JSON answer in the cache; the handler falls back instead
+        if cacheable and text and (not model.json_mode or _is_valid_json(text)):
+            await response_cache.set(endpoint, key, text)
+        return text
+
+    # Keyed by API key too, so one user's bad key can't fail another user's call
+    try:
+        text = await singleflight.do((model.key_hash, key), call)
+    except Exception as e:
+        ai_metrics.observe_call(endpoint, model.user_id, time.monotonic() - started, prompt, error=e)
+        raise
+    ai_metrics.observe_call(endpoint, model.user_id, time.monotonic() - started, prompt, text)
+    return text
+
+async def stream_text(model: GenAIModelWrapper, prompt: str, endpoint: str):
+    # Streaming counterpart of generate_text. Streams are never cached.
+    started = time.monotonic()
+    chunks = []
+    breaker.before_call()
+    stream = model.stream_content_async(prompt, deadline_for(endpoint))
+    try:
+        async for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+    except Exception as e:
+        if _is_upstream_failure(e):
+            breaker.record_failure()
+        else:
+            breaker.record_ignored()
+        ai_metrics.observe_call(endpoint, model.user_id, time.monotonic() - started, prompt, "".join(chunks), error=e)
+        raise
+    except BaseException:
+        # Client went away (GeneratorExit / cancellation); says nothing about upstream
+        breaker.record_ignored()
+        raise
+    finally:
+        await stream.aclose()
+    breaker.record_success()
+    text = "".join(chunks)
+    ai_metrics.observe_upstream(endpoint, time.monotonic() - started, prompt, text=text)
+    ai_metrics.observe_call(endpoint, model.user_id, time.monotonic() - started, prompt, text)
+
+def _resolve_key(user: models.User) -> str:
+    if backend_override is not None:
+        return user.api_key or "offline"
+    key = user.api_key or os.getenv("GEMINI_API_KEY")
+    if not key:
+        raise HTTPException(status_code=400, detail="Gemini API Key missing")
+    return key
+
+# Helper to get model
+def get_model(user: models.User):
+    # Using gemini-2.0-flash as 2.5 is not standard, defaulting to latest stable flash
+    return GenAIModelWrapper(_resolve_key(user), DEFAULT_MODEL, json_mode=False, user_id=user.id)
+
+def get_json_model(user: models.User):
+    return GenAIModelWrapper(_resolve_key(user), DEFAULT_MODEL, json_mode=True, user_id=user.id)
@@ -0,0 +1,159 @@
+import asyncio
+import datetime
+import logging
+import os
+import socket
+import uuid
+from sqlalchemy import select, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+from app.database import AsyncSessionLocal
+
+# Jobs processed concurrently per process. Each job still goes through the
+# shared AI concurrency limiter.
+AI_JOB_WORKERS = int(os.getenv("AI_JOB_WORKERS", "4"))
+
+# Running jobs refresh their heartbeat this often. Several processes share
+# ai_jobs, so at startup only jobs whose heartbeat is older than the lease are
+# treated as orphaned; live workers elsewhere keep theirs.
+AI_JOB_HEARTBEAT_SECONDS = float(os.getenv("AI_JOB_HEARTBEAT_SECONDS", "15"))
+AI_JOB_LEASE_SECONDS = float(os.getenv("AI_JOB_LEASE_SECONDS", "120"))
+
+logger = logging.getLogger(__name__)
+
+class AIJobQueue:
+    """In-process queue for slow AI generations. Jobs are persisted in ai_jobs, so a
+    client that disconnects can still collect the result by polling."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers = {} # kind -> (request schema, async handler(request, user))
+        self._queue = None
+        self._loop = None
+        self._tasks = []
+
+    def register(self, kind: str, schema, handler):
+        self._handlers[kind] = (schema, handler)
+
+    def kinds(self):
+        return list(self._handlers)
+
+    def _ensure_started(self):
+        # Started lazily so it binds to whichever loop serves requests
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, db: AsyncSession, user: models.User, kind: str, request) -> models.AIJob:
+        job = models.AIJob(
+            user_id=user.id,
+            kind=kind,
+            status="queued",
+            request=request.model_dump(mode="json", by_alias=True)
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        self._ensure_started()
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("AI job %s failed to run", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        async with AsyncSessionLocal() as db:
+            # Claimed in one conditional UPDATE: every process may have the id
+            # queued, only the one whose UPDATE hits the row runs it
+            claim = await db.execute(
+                update(models.AIJob)
+                .where(models.AIJob.id == job_id, models.AIJob.status == "queued")
+                .values(status="running", worker_id=self.worker_id, heartbeat_at=datetime.datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            if claim.rowcount != 1:
+                return
+            job = (await db.execute(select(models.AIJob).where(models.AIJob.id == job_id))).scalars().first()
+            user = (await db.execute(select(models.User).where(models.User.id == job.user_id))).scalars().first()
+
+            heartbeat = asyncio.create_task(self._heartbeat(job_id))
+            try:
+                schema, handler = self._handlers[job.kind]
+                values = {"result": await handler(schema.model_validate(job.request), user), "status": "succeeded"}
+            except Exception as e:
+                values = {"error": str(e), "status": "failed"}
+            finally:
+                heartbeat.cancel()
+            # Only while still ours: a job whose lease lapsed has been failed already
+            await db.execute(
+                update(models.AIJob)
+                .where(models.AIJob.id == job_id, models.AIJob.worker_id == self.worker_id, models.AIJob.status == "running")
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(AI_JOB_HEARTBEAT_SECONDS)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(models.AIJob)
+                        .where(models.AIJob.id == job_id, models.AIJob.worker_id == self.worker_id)
+                        .values(heartbeat_at=datetime.datetime.utcnow())
+                    )
+                    await db.commit()
+            except Exception:
+                logger.warning("Heartbeat for AI job %s failed", job_id, exc_info=True)
+
+    async def drain(self):
+        # Wait until every queued job has finished (used by tests and shutdown)
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def recover(self):
+        # Jobs whose worker died (no heartbeat within the lease) can't be resumed
+        # mid-call; queued ones are picked up again, by whichever process claims them.
+        stale = datetime.datetime.utcnow() - datetime.timedelta(seconds=AI_JOB_LEASE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(models.AIJob)
+                .where(models.AIJob.status == "running",
+                       or_(models.AIJob.heartbeat_at.is_(None), models.AIJob.heartbeat_at < stale))
+                .values(status="failed", error="Interrupted by server restart")
+            )
+            await db.commit()
+            result = await db.execute(select(models.AIJob.id).where(models.AIJob.status == "queued"))
+            queued = result.scalars().all()
+        self._ensure_started()
+        for job_id in queued:
+            self._queue.put_nowait(job_id)
+
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+        }
+
+job_queue = AIJobQueue(AI_JOB_WORKERS)
@@ -0,0 +1,198 @@
+import bisect
+import hashlib
+import hmac
+import os
+import secrets
+from collections import Counter, defaultdict
+from app.prompt_budget import estimate_tokens
+
+# Latency buckets (seconds), Prometheus style: each bucket counts observations <= le
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Distinct users tracked for call volume; the rest are counted under "_other"
+AI_METRICS_MAX_USERS = int(os.getenv("AI_METRICS_MAX_USERS", "1000"))
+# Users are counted under a keyed hash, never the raw id: ids double as bearer
+# tokens. Set AI_METRICS_SECRET to keep the keys stable across restarts.
+AI_METRICS_SECRET = os.getenv("AI_METRICS_SECRET", "").encode() or secrets.token_bytes(32)
+
+def user_key(user_id: str) -> str:
+    return hmac.new(AI_METRICS_SECRET, user_id.encode(), hashlib.sha256).hexdigest()[:16]
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        # [(le, count <= le)], ending with +Inf
+        out, running = [], 0
+        for le, n in zip(list(self.buckets) + ["+Inf"], self.counts):
+            running += n
+            out.append((le, running))
+        return out
+
+    def quantile(self, q: float) -> float:
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for le, running in self.cumulative():
+            if running >= rank:
+                return float("inf") if le == "+Inf" else le
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        # Quantiles past the last bucket are reported as None (JSON has no Infinity)
+        q = lambda v: None if v == float("inf") else v
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": q(self.quantile(0.5)),
+            "p95": q(self.quantile(0.95)),
+            "p99": q(self.quantile(0.99)),
+            "buckets": {str(le): n for le, n in self.cumulative()},
+        }
+
+class EndpointMetrics:
+    def __init__(self):
+        self.calls = 0
+        self.latency = Histogram() # whole generate_text/stream_text call, cache hits included
+        self.upstream_latency = Histogram() # model calls only
+        self.cache_hits = 0
+        self.upstream_calls = 0
+        self.prompt_chars = 0
+        self.prompt_tokens = 0
+        self.response_chars = 0
+        self.response_tokens = 0
+        self.errors = Counter() # exception type -> count, raised out of the AI layer
+        self.fallbacks = Counter() # exception type -> count, canned answer served
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "cache_hits": self.cache_hits,
+            "upstream_calls": self.upstream_calls,
+            "latency": self.latency.snapshot(),
+            "upstream_latency": self.upstream_latency.snapshot(),
+            "prompt_chars": self.prompt_chars,
+            "prompt_tokens": self.prompt_tokens,
+            "response_chars": self.response_chars,
+            "response_tokens": self.response_tokens,
+            "errors": dict(self.errors),
+            "fallbacks": dict(self.fallbacks),
+        }
+
+def _usage_tokens(response, prompt: str, text: str):
+    # Gemini reports real token counts; other backends fall back to the estimate
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    response_tokens = getattr(usage, "candidates_token_count", None)
+    if prompt_tokens is None:
+        prompt_tokens = estimate_tokens(prompt)
+    if response_tokens is None:
+        response_tokens = estimate_tokens(text or "")
+    return prompt_tokens, response_tokens
+
+class AIMetrics:
+    """In-process counters for every AI call, by endpoint. snapshot() is the
+    structured view (tests, /ai/metrics?format=json); render_prometheus() is the
+    text exposition format for scraping."""
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self.reset()
+
+    def reset(self):
+        self.endpoints = defaultdict(EndpointMetrics)
+        self.users = Counter()
+
+    def observe_call(self, endpoint: str, user_id: str, seconds: float, prompt: str, text: str = None,
+                     cache_hit: bool = False, error: BaseException = None):
+        m = self.endpoints[endpoint]
+        m.calls += 1
+        m.latency.observe(seconds)
+        m.prompt_chars += len(prompt)
+        if cache_hit:
+            m.cache_hits += 1
+        if text is not None:
+            m.response_chars += len(text)
+        if error is not None:
+            m.errors[type(error).__name__] += 1
+        if user_id:
+            key = user_key(user_id)
+            if key in self.users or len(self.users) < self.max_users:
+                self.users[key] += 1
+            else:
+                self.users["_other"] += 1
+
+    def observe_upstream(self, endpoint: str, seconds: float, prompt: str, response=None, text: str = None):
+        m = self.endpoints[endpoint]
+        m.upstream_calls += 1
+        m.upstream_latency.observe(seconds)
+        prompt_tokens, response_tokens = _usage_tokens(response, prompt, text)
+        m.prompt_tokens += prompt_tokens
+        m.response_tokens += response_tokens
+
+    def record_fallback(self, endpoint: str, error: BaseException):
+        self.endpoints[endpoint].fallbacks[type(error).__name__] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "endpoints": {name: m.snapshot() for name, m in sorted(self.endpoints.items())},
+            "users": dict(self.users.most_common()),
+        }
+
+    def render_prometheus(self) -> str:
+        lines = []
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        items = sorted(self.endpoints.items())
+        for metric, attr, help_text in (
+            ("ai_request_duration_seconds", "latency", "AI call latency including cache hits"),
+            ("ai_upstream_duration_seconds", "upstream_latency", "Model call latency"),
+        ):
+            family(metric, "histogram", help_text)
+            for endpoint, m in items:
+                hist = getattr(m, attr)
+                for le, n in hist.cumulative():
+                    lines.append(f'{metric}_bucket{{endpoint="{endpoint}",le="{le}"}} {n}')
+                lines.append(f'{metric}_sum{{endpoint="{endpoint}"}} {hist.sum}')
+                lines.append(f'{metric}_count{{endpoint="{endpoint}"}} {hist.count}')
+
+        for metric, attr, help_text in (
+            ("ai_requests_total", "calls", "AI calls"),
+            ("ai_cache_hits_total", "cache_hits", "AI calls answered from the response cache"),
+            ("ai_upstream_calls_total", "upstream_calls", "Calls that reached the model"),
+            ("ai_prompt_chars_total", "prompt_chars", "Prompt characters"),
+            ("ai_prompt_tokens_total", "prompt_tokens", "Prompt tokens sent upstream"),
+            ("ai_response_chars_total", "response_chars", "Response characters"),
+            ("ai_response_tokens_total", "response_tokens", "Response tokens received from upstream"),
+        ):
+            family(metric, "counter", help_text)
+            for endpoint, m in items:
+                lines.append(f'{metric}{{endpoint="{endpoint}"}} {getattr(m, attr)}')
+
+        for metric, attr, help_text in (
+            ("ai_errors_total", "errors", "Exceptions raised by AI calls"),
+            ("ai_fallbacks_total", "fallbacks", "Canned fallback answers served"),
+        ):
+            family(metric, "counter", help_text)
+            for endpoint, m in items:
+                for exc, n in sorted(getattr(m, attr).items()):
+                    lines.append(f'{metric}{{endpoint="{endpoint}",exception="{exc}"}} {n}')
+
+        # Per-user volume is left out here on purpose: one series per user would
+        # blow up scrape cardinality. It's in the JSON snapshot instead.
+        family("ai_users_tracked", "gauge", "Distinct users with AI calls")
+        lines.append(f"ai_users_tracked {len(self.users)}")
+        return "\n".join(lines) + "\n"
+
+ai_metrics = AIMetrics(AI_METRICS_MAX_USERS)
@@ -0,0 +1,56 @@
+from app import models
+from app.schemas import AIStoryRequest, AIWeeklyBriefingRequest
+from app.prompt_budget import PromptBuilder
+
+# Prompts shared by the AI router and the background pre-generation scheduler
+
+GOGGINS_PERSONA = """
+You are David Goggins. You are the hardest man alive. 
+Your tone is intense, military, uncompromising, but ultimately supportive of growth through suffering.
+You do not coddle. You do not accept excuses. You demand calloused minds.
+Use phrases like "Stay hard", "Who's gonna carry the boats", "Merry Christmas", "Roger that", "Taking souls".
+"""
+
+def story_prompt(request: AIStoryRequest, user: models.User) -> str:
+    return f"""
+        {GOGGINS_PERSONA}
+        User: {user.username}
+        Generate a very short, intense motivational story (max 3 sentences) for a user finding a task.
+        Task: {request.task.description}
+        Difficulty: {request.task.difficulty}
+        Category: {request.task.category}
+        Estimated Time: {request.task.estimated_time} mins.
+        Justification: {request.justification or "None"}
+        Goals: {[g.description for g in request.goals]}
+        
+        The story should be about overcoming the specific resistance of this task.
+        """
+
+def weekly_briefing_prompt(request: AIWeeklyBriefingRequest, user: models.User) -> str:
+    return f"""
+        {GOGGINS_PERSONA}
+        Write a weekly briefing for {user.username}.
+        Prev Week Evals: {str(request.previousWeekEvaluations)}
+        Next Week Goals: {[g.description for g in request.nextWeekGoals]}
+        Long Term Goals: {[g.description for g in request.longTermGoals]}
+        
+        Keep it short, brutal, and directive.
+        """
+
+def weekly_evaluation_prompt(description: str, completed_tasks: list, purchased_rewards: list) -> str:
+    return (
+        PromptBuilder("evaluate-weekly")
+        .add("rewards", purchased_rewards, priority=0)
+        .add("tasks", completed_tasks, priority=1)
+        .add("goal", description, priority=2)
+        .build(f"""
+        {GOGGINS_PERSONA}
+        Evaluate this weekly goal: {{goal}}
+        Completed tasks: {{tasks}}
+        Rewards purchased: {{rewards}}
+        
+        Return JSON:
+        - alignmentScore (float 1-10)
+        - feedback (string, brutal honesty)
+        """)
+    )
@@ -0,0 +1,83 @@
+import hashlib
+import re
+from typing import Optional
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+
+_WS = re.compile(r"\s+")
+
+def normalize_description(text: str) -> str:
+    # "Run 5 miles." and "  run 5   miles" are the same task
+    return _WS.sub(" ", (text or "").lower()).strip().rstrip(".!?")
+
+def goals_hash(goals) -> str:
+    # Order-independent; any edit to a goal's description yields a new hash
+    parts = sorted(f"{g.id}\x1f{normalize_description(g.description)}" for g in goals)
+    return hashlib.sha256("\x1e".join(parts).encode()).hexdigest()
+
+class AlignmentMemo:
+    """DB-backed memo of /ai/analyze-goal-alignment answers, keyed by
+    (user, normalized description, active goal set). Rows for a user are dropped
+    whenever one of their goals is edited, completed or deleted."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def lookup(self, db: AsyncSession, user_id: str, description: str, goals) -> Optional[dict]:
+        result = await db.execute(
+            select(models.GoalAlignmentMemo).where(
+                models.GoalAlignmentMemo.user_id == user_id,
+                models.GoalAlignmentMemo.description_key == normalize_description(description),
+                models.GoalAlignmentMemo.goals_hash == goals_hash(goals),
+            )
+        )
+        memo = result.scalars().first()
+        if memo is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {
+            "alignmentScore": memo.alignment_score,
+            "justification": memo.justification,
+            "alignedGoalId": memo.aligned_goal_id,
+        }
+
+    async def store(self, db: AsyncSession, user_id: str, description: str, goals, result: dict):
+        # Only well-formed answers are memoized; anything odd is asked again next time
+        score = result.get("alignmentScore")
+        aligned = result.get("alignedGoalId")
+        if not isinstance(score, (int, float)) or (aligned is not None and aligned not in {g.id for g in goals}):
+            return
+        db.add(models.GoalAlignmentMemo(
+            user_id=user_id,
+            description_key=normalize_description(description),
+            goals_hash=goals_hash(goals),
+            alignment_score=float(score),
+            justification=result.get("justification"),
+            aligned_goal_id=aligned,
+        ))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # A concurrent request stored the same combination first
+            await db.rollback()
+
+    async def invalidate(self, db: AsyncSession, user_id: str):
+        # Caller commits, so invalidation lands atomically with the goal change
+        await db.execute(delete(models.GoalAlignmentMemo).where(models.GoalAlignmentMemo.user_id == user_id))
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+alignment_memo = AlignmentMemo()
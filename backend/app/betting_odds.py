@@ -0,0 +1,148 @@
+import datetime
+import os
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+
+# Multipliers are fair odds (1 / completion probability) clamped to this range
+BETTING_ODDS_MIN = float(os.getenv("BETTING_ODDS_MIN", "1.1"))
+BETTING_ODDS_MAX = float(os.getenv("BETTING_ODDS_MAX", "5.0"))
+BETTING_STATS_MAX_USERS = int(os.getenv("BETTING_STATS_MAX_USERS", "1024"))
+
+# Starting completion rates before a user has any history
+DIFFICULTY_PRIORS = {"Easy": 0.9, "Medium": 0.75, "Hard": 0.55, "Savage": 0.35}
+# How many observations a group needs before its own rate outweighs its parent's
+SHRINKAGE = 5.0
+# Upper bounds (minutes) of the estimated-time buckets
+TIME_BUCKETS = (15, 30, 60, 120)
+
+def time_bucket(minutes) -> str:
+    for bound in TIME_BUCKETS:
+        if (minutes or 0) <= bound:
+            return f"<={bound}m"
+    return f">{TIME_BUCKETS[-1]}m"
+
+def _difficulty(value) -> str:
+    return getattr(value, "value", value) or "Medium"
+
+def _today() -> datetime.date:
+    return datetime.date.today()
+
+def task_outcomes(task, today: datetime.date) -> list:
+    """[(difficulty, category, time bucket, completed)] for a Task row. Open tasks
+    only count once their day has passed."""
+    # Occurrences of recurring tasks are tracked in recurring_completions
+    if task.recurring_master_id:
+        return []
+    if not task.completed and not (task.date and task.date < today):
+        return []
+    return [(_difficulty(task.difficulty), task.category, time_bucket(task.estimated_time), bool(task.completed))]
+
+def recurring_key(task) -> tuple:
+    return (_difficulty(task.difficulty), task.category, time_bucket(task.estimated_time))
+
+def recurring_outcomes(key: tuple, occurrences, today: datetime.date) -> list:
+    # occurrences: [(date, completed)] from recurring_completions
+    return [key + (completed,) for day, completed in occurrences if completed or day < today]
+
+@dataclass
+class Odds:
+    multiplier: float
+    probability: float
+    sample_size: int # observations in the most specific group
+    group: str
+
+class UserBettingStats:
+    """Attempt/completion counts at three levels of detail. Adding or removing
+    one outcome is O(1), so task edits never trigger a reload."""
+
+    def __init__(self, as_of: datetime.date):
+        self.as_of = as_of
+        self.attempts = Counter()
+        self.completions = Counter()
+
+    @staticmethod
+    def _keys(difficulty, category, bucket):
+        return [(difficulty,), (difficulty, category), (difficulty, category, bucket)]
+
+    def apply(self, outcomes: list, weight: int = 1):
+        for difficulty, category, bucket, completed in outcomes:
+            for key in self._keys(difficulty, category, bucket):
+                self.attempts[key] += weight
+                if completed:
+                    self.completions[key] += weight
+
+    def odds(self, difficulty: str, category: str, estimated_time: float) -> Odds:
+        # Each level is shrunk towards the one above it, starting from the prior
+        p = DIFFICULTY_PRIORS.get(difficulty, 0.6)
+        keys = self._keys(difficulty, category, time_bucket(estimated_time))
+        for key in keys:
+            n = self.attempts[key]
+            p = (self.completions[key] + SHRINKAGE * p) / (n + SHRINKAGE)
+        multiplier = min(BETTING_ODDS_MAX, max(BETTING_ODDS_MIN, 1 / max(p, 1e-6)))
+        return Odds(round(multiplier, 2), p, self.attempts[keys[-1]], " / ".join(keys[-1]))
+
+class BettingStatsRegistry:
+    """Per-user stats, loaded from tasks and recurring completions on first use and
+    kept current by the task routes. Reloaded once the day rolls over, since open
+    tasks from yesterday now count as misses."""
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._users = OrderedDict()
+        self.loads = 0
+
+    async def _load(self, db: AsyncSession, user_id: str, today: datetime.date) -> UserBettingStats:
+        stats = UserBettingStats(today)
+        tasks = await db.execute(select(models.Task).where(models.Task.user_id == user_id))
+        for task in tasks.scalars().all():
+            stats.apply(task_outcomes(task, today))
+        recurring = await db.execute(
+            select(models.RecurringTask, models.RecurringCompletion.date, models.RecurringCompletion.completed)
+            .join(models.RecurringCompletion, models.RecurringCompletion.recurring_task_id == models.RecurringTask.id)
+            .where(models.RecurringTask.user_id == user_id)
+        )
+        for task, day, completed in recurring.all():
+            stats.apply(recurring_outcomes(recurring_key(task), [(day, bool(completed))], today))
+        self.loads += 1
+        return stats
+
+    async def get(self, db: AsyncSession, user_id: str) -> UserBettingStats:
+        today = _today()
+        stats = self._users.get(user_id)
+        if stats is None or stats.as_of != today:
+            stats = await self._load(db, user_id, today)
+            self._users[user_id] = stats
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        self._users.move_to_end(user_id)
+        return stats
+
+    async def odds(self, db: AsyncSession, user_id: str, difficulty: str, category: str, estimated_time: float) -> Odds:
+        return (await self.get(db, user_id)).odds(_difficulty(difficulty), category, estimated_time)
+
+    def replace(self, user_id: str, before: list, after: list):
+        # Users that aren't loaded pick the change up from the DB on first use
+        stats = self._users.get(user_id)
+        if stats:
+            stats.apply(before, weight=-1)
+            stats.apply(after)
+
+    def task_outcomes(self, task) -> list:
+        return task_outcomes(task, _today())
+
+    def recurring_outcomes(self, key: tuple, occurrences) -> list:
+        return recurring_outcomes(key, occurrences, _today())
+
+    def clear(self):
+        self._users.clear()
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._users),
+            "loads": self.loads,
+        }
+
+betting_stats = BettingStatsRegistry(BETTING_STATS_MAX_USERS)
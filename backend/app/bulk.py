@@ -0,0 +1,92 @@
+"""Set-based upserts and deletes behind the /bulk routes.
+
+One SELECT finds which ids exist, then each kind of write is a single
+statement: an executemany INSERT for new rows, an ORM bulk UPDATE by primary
+key for existing ones and one DELETE ... WHERE id IN (...). The caller
+commits, so a whole request is one transaction.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from sqlalchemy import select, insert, update, delete, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import schemas
+
+@dataclass
+class BulkOutcome:
+    results: list = field(default_factory=list) # schemas.BulkItemResult, in request order
+    created: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    deleted: list = field(default_factory=list)
+    # Row state before and after, for the in-memory stats the single-row routes keep
+    # in sync: before has updated and deleted rows, after has created and updated ones
+    before: dict = field(default_factory=dict)
+    after: dict = field(default_factory=dict)
+
+def _snapshot(model, row) -> SimpleNamespace:
+    return SimpleNamespace(**{attr.key: getattr(row, attr.key) for attr in inspect(model).column_attrs})
+
+async def apply(db: AsyncSession, model, user_id: str, upserts: list, deletes: list, exclude: set = frozenset(),
+                children: tuple = ()) -> BulkOutcome:
+    """Upserts (schema objects with an id) and deletes (ids) rows of `model` owned
+    by user_id. Fields in `exclude` aren't columns (e.g. completions maps); rows in
+    the `children` foreign-key columns are deleted along with their parents."""
+    outcome = BulkOutcome()
+    ids = [item.id for item in upserts] + list(deletes)
+    repeated = {id for id, n in Counter(ids).items() if n > 1}
+    existing = {}
+    if ids:
+        result = await db.execute(select(model).where(model.id.in_(set(ids))))
+        existing = {row.id: row for row in result.scalars().all()}
+
+    def refused(id: str):
+        if id in repeated:
+            outcome.results.append(schemas.BulkItemResult(id=id, status=422, error="id appears more than once"))
+            return True
+        row = existing.get(id)
+        if row is not None and row.user_id != user_id:
+            # Same answer as for a missing row, so ids of other users don't leak
+            outcome.results.append(schemas.BulkItemResult(id=id, status=404, error="Not found"))
+            return True
+        return False
+
+    inserts, updates = [], []
+    for item in upserts:
+        if refused(item.id):
+            continue
+        row = existing.get(item.id)
+        if row is None:
+            values = {**item.model_dump(exclude=exclude), "user_id": user_id}
+            inserts.append(values)
+            outcome.after[item.id] = SimpleNamespace(**values)
+            outcome.created.append(item.id)
+            outcome.results.append(schemas.BulkItemResult(id=item.id, status=201))
+        else:
+            # Like PUT: only the fields the client sent
+            values = item.model_dump(exclude_unset=True, exclude=exclude)
+            updates.append({**values, "id": item.id})
+            outcome.before[item.id] = _snapshot(model, row)
+            outcome.after[item.id] = SimpleNamespace(**{**vars(outcome.before[item.id]), **values})
+            outcome.updated.append(item.id)
+            outcome.results.append(schemas.BulkItemResult(id=item.id, status=200))
+
+    for id in deletes:
+        if refused(id):
+            continue
+        if id not in existing:
+            outcome.results.append(schemas.BulkItemResult(id=id, status=404, error="Not found"))
+            continue
+        outcome.before[id] = _snapshot(model, existing[id])
+        outcome.deleted.append(id)
+        outcome.results.append(schemas.BulkItemResult(id=id, status=204))
+
+    if inserts:
+        await db.execute(insert(model), inserts)
+    if updates:
+        await db.execute(update(model), updates)
+    if outcome.deleted:
+        # SQLite doesn't enforce ON DELETE CASCADE without foreign_keys=ON
+        for column in children:
+            await db.execute(delete(column.class_).where(column.in_(outcome.deleted)))
+        await db.execute(delete(model).where(model.id.in_(outcome.deleted)))
+    return outcome
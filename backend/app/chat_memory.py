@@ -0,0 +1,133 @@
+import asyncio
+import os
+import traceback
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+from app.database import AsyncSessionLocal
+from app.ai_client import get_model, generate_text
+
+# Messages always sent verbatim. Once more than CHAT_WINDOW + CHAT_SUMMARY_BATCH
+# messages are unsummarized, the oldest ones are folded into the summary in the
+# background, so a prompt never carries more than that many raw messages.
+CHAT_WINDOW = int(os.getenv("AI_CHAT_WINDOW", "10"))
+CHAT_SUMMARY_BATCH = int(os.getenv("AI_CHAT_SUMMARY_BATCH", "6"))
+CHAT_SUMMARY_MAX_CHARS = int(os.getenv("AI_CHAT_SUMMARY_MAX_CHARS", "2000"))
+# Attempts at taking the next seq when concurrent turns (two tabs, a streamed reply
+# landing as the next message arrives) collide on it
+CHAT_APPEND_RETRIES = 5
+
+def _role(sender: str) -> str:
+    return "User" if sender == "user" else "David Goggins"
+
+def _transcript(messages) -> str:
+    return "".join(f"{_role(m.sender)}: {m.content}\n" for m in messages)
+
+async def unsummarized_messages(db: AsyncSession, session: models.ChatSession, limit: int = None) -> list:
+    # Newest `limit` messages not yet in the summary, oldest first
+    query = (
+        select(models.ChatMessage)
+        .where(models.ChatMessage.session_id == session.id, models.ChatMessage.seq > session.summarized_through)
+        .order_by(models.ChatMessage.seq.desc())
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    result = await db.execute(query)
+    return list(reversed(result.scalars().all()))
+
+async def _last_seq(db: AsyncSession, session_id: str) -> int:
+    result = await db.execute(
+        select(models.ChatMessage.seq)
+        .where(models.ChatMessage.session_id == session_id)
+        .order_by(models.ChatMessage.seq.desc())
+        .limit(1)
+    )
+    return result.scalar() or 0
+
+async def append_message(db: AsyncSession, session: models.ChatSession, sender: str, content: str) -> models.ChatMessage:
+    """Inserts the message at the next seq. (session_id, seq) is unique, so a turn
+    that lost the race for a seq rolls back its SAVEPOINT and takes the one after."""
+    for attempt in range(CHAT_APPEND_RETRIES):
+        message = models.ChatMessage(session_id=session.id, seq=await _last_seq(db, session.id) + 1,
+                                     sender=sender, content=content)
+        try:
+            async with db.begin_nested():
+                db.add(message)
+            return message
+        except IntegrityError:
+            if attempt == CHAT_APPEND_RETRIES - 1:
+                raise
+
+def build_prompt(persona: str, user: models.User, session: models.ChatSession, messages: list) -> str:
+    prompt = f"{persona}\nUser: {user.username}\n"
+    if session.summary:
+        prompt += f"Summary of the conversation so far: {session.summary}\n"
+    prompt += _transcript(messages)
+    return prompt + "David Goggins:"
+
+class ChatSummarizer:
+    """Folds older chat turns into ChatSession.summary off the request path. At most
+    one summarization runs per session; a failed one is simply retried after a
+    later turn."""
+
+    def __init__(self):
+        self._running = {} # session_id -> task
+        self.runs = 0
+        self.failures = 0
+
+    def needs_summary(self, unsummarized: int) -> bool:
+        return unsummarized >= CHAT_WINDOW + CHAT_SUMMARY_BATCH
+
+    def schedule(self, session_id: str):
+        if session_id in self._running:
+            return
+        task = asyncio.get_running_loop().create_task(self._summarize(session_id))
+        self._running[session_id] = task
+        task.add_done_callback(lambda _: self._running.pop(session_id, None))
+
+    async def _summarize(self, session_id: str):
+        try:
+            # Read what to fold, then release the connection for the slow model call
+            async with AsyncSessionLocal() as db:
+                session = (await db.execute(select(models.ChatSession).where(models.ChatSession.id == session_id))).scalars().first()
+                user = (await db.execute(select(models.User).where(models.User.id == session.user_id))).scalars().first()
+                fold = (await unsummarized_messages(db, session))[:-CHAT_WINDOW]
+            if not fold:
+                return
+
+            prompt = f"""
+        Update the running summary of a coaching chat between a user and David Goggins.
+        Keep every goal, commitment, excuse and piece of personal context the coach should remember.
+        Plain prose, under {CHAT_SUMMARY_MAX_CHARS // 6} words.
+
+        Current summary: {session.summary or "None"}
+
+        New messages:
+        {_transcript(fold)}
+        """
+            text = await generate_text(get_model(user), prompt, "chat-summary")
+
+            async with AsyncSessionLocal() as db:
+                session = await db.get(models.ChatSession, session_id)
+                session.summary = text.strip()[:CHAT_SUMMARY_MAX_CHARS]
+                session.summarized_through = fold[-1].seq
+                await db.commit()
+            self.runs += 1
+        except Exception as e:
+            self.failures += 1
+            traceback.print_exc()
+            print(f"Chat Summary Error ({session_id}): {e}")
+
+    async def drain(self):
+        # Wait for in-flight summaries (used by tests)
+        await asyncio.gather(*list(self._running.values()), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._running),
+            "runs": self.runs,
+            "failures": self.failures,
+        }
+
+chat_summarizer = ChatSummarizer()
@@ -0,0 +1,70 @@
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the breaker is open."""
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures. After
+    `reset_timeout` seconds one probe call is let through (half-open): success
+    closes the breaker, failure opens it again."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.trips = 0
+        self.rejected = 0
+
+    def before_call(self):
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            else:
+                self.rejected += 1
+                raise CircuitOpenError("AI circuit open")
+        if self.state == HALF_OPEN:
+            if self.probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError("AI circuit half-open, probe in flight")
+            self.probe_in_flight = True
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        self.state = CLOSED
+
+    def record_failure(self):
+        self.probe_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.trips += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def record_ignored(self):
+        # The call finished without telling us anything about upstream health
+        # (e.g. a caller error). Release the probe slot without changing state.
+        self.probe_in_flight = False
+
+    def reset(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
@@ -1,6 +1,11 @@
+from sqlalchemy import event, make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+import logging
 import os
+import time
+import uuid
+from app.sqlite_writer import SQLiteWriter, install_pragmas, session_classes
 
 # Database URL configuration
 # Default to SQLite for easy dev, allow Postgres via ENV
@@ -19,22 +24,141 @@ if DATABASE_URL.startswith("postgres://"):
 elif DATABASE_URL.startswith("postgresql://"):
     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
-# Engine options: for SQLite, we need to disable same_thread_check if we were using synchronous,
-# but for aiosqlite it handles it.
-# Echo=True logs SQL for debugging.
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
-
-# Shared SessionLocal class
-AsyncSessionLocal = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False
-)
+# Engine profiles. DB_PROFILE picks one (default: dev on SQLite, prod otherwise);
+# the DB_* variables below override single settings of it.
+PROFILES = {
+    # echo logs every statement to stdout, which is what you want locally
+    "dev": {"echo": True, "pool_size": 5, "max_overflow": 10, "pool_recycle": -1, "pool_pre_ping": False,
+            "statement_timeout_ms": 0, "slow_query_ms": 0},
+    # pre-ping and recycle drop connections the server or a proxy closed while idle
+    "prod": {"echo": False, "pool_size": 10, "max_overflow": 20, "pool_recycle": 1800, "pool_pre_ping": True,
+             "statement_timeout_ms": 15000, "slow_query_ms": 250},
+    "test": {"echo": False, "pool_size": 5, "max_overflow": 10, "pool_recycle": -1, "pool_pre_ping": False,
+             "statement_timeout_ms": 0, "slow_query_ms": 0},
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "dev" if DATABASE_URL.startswith("sqlite") else "prod")
+# Behind pgbouncer in transaction mode a prepared statement may land on another
+# server connection, so asyncpg's cache is off and statement names are unique.
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "0") == "1"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+# SQLite on a single machine (the Modal volume): WAL, one writer connection that
+# group-commits, and a separate pool of read-only connections. See sqlite_writer.py.
+DB_SQLITE_WAL = os.getenv("DB_SQLITE_WAL", "0") == "1" and DATABASE_URL.startswith("sqlite")
+
+def _env(name: str, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value == "1"
+    return type(default)(value)
+
+def profile_settings(profile: str) -> dict:
+    settings = dict(PROFILES[profile])
+    for key, default in settings.items():
+        settings[key] = _env(f"DB_{key.upper()}", default)
+    return settings
+
+def _sqlite_in_memory(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.database in (None, "", ":memory:") or parsed.query.get("mode") == "memory"
+
+def engine_options(url: str, settings: dict, pgbouncer: bool = False, statement_cache_size: int = 100) -> dict:
+    """Keyword arguments for create_async_engine."""
+    options = {
+        "echo": settings["echo"],
+        "pool_size": settings["pool_size"],
+        "max_overflow": settings["max_overflow"],
+        "pool_recycle": settings["pool_recycle"],
+        "pool_pre_ping": settings["pool_pre_ping"],
+    }
+    if url.startswith("sqlite"):
+        # Statement timeouts have no SQLite equivalent; the pool settings still apply,
+        # except for in-memory databases, which use a StaticPool with no sizing
+        if _sqlite_in_memory(url):
+            del options["pool_size"], options["max_overflow"]
+        options["connect_args"] = {"check_same_thread": False}
+        return options
+
+    connect_args = {}
+    if pgbouncer:
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    else:
+        connect_args["prepared_statement_cache_size"] = statement_cache_size
+        if settings["statement_timeout_ms"]:
+            # pgbouncer rejects unknown startup parameters, so only set this directly
+            connect_args["server_settings"] = {"statement_timeout": str(settings["statement_timeout_ms"])}
+    if settings["statement_timeout_ms"]:
+        # Client-side backstop, also works through pgbouncer
+        connect_args["command_timeout"] = settings["statement_timeout_ms"] / 1000 + 5
+    options["connect_args"] = connect_args
+    return options
+
+slow_logger = logging.getLogger("app.db.slow")
+
+class SlowQueryLog:
+    """Logs statements slower than threshold_ms, instead of echoing all of them."""
+
+    def __init__(self, threshold_ms: float):
+        self.threshold_ms = threshold_ms
+        self.slow = 0
+
+    def install(self, sync_engine):
+        event.listen(sync_engine, "before_cursor_execute", self._before)
+        event.listen(sync_engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        if elapsed_ms >= self.threshold_ms:
+            self.slow += 1
+            slow_logger.warning("Slow query (%.0f ms): %s", elapsed_ms, " ".join(statement.split())[:500])
+
+    def stats(self) -> dict:
+        return {"threshold_ms": self.threshold_ms, "slow": self.slow}
+
+db_settings = profile_settings(DB_PROFILE)
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL, db_settings, DB_PGBOUNCER, DB_STATEMENT_CACHE_SIZE))
+
+slow_query_log = None
+if db_settings["slow_query_ms"]:
+    slow_query_log = SlowQueryLog(db_settings["slow_query_ms"])
+    slow_query_log.install(engine.sync_engine)
+
+sqlite_writer = None
+if DB_SQLITE_WAL and not _sqlite_in_memory(DATABASE_URL):
+    install_pragmas(engine.sync_engine)
+    writer_options = engine_options(DATABASE_URL, db_settings)
+    writer_options.update(pool_size=1, max_overflow=0)
+    writer_engine = create_async_engine(DATABASE_URL, **writer_options)
+    install_pragmas(writer_engine.sync_engine)
+    reader_engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL, db_settings))
+    install_pragmas(reader_engine.sync_engine, query_only=True)
+    if slow_query_log:
+        slow_query_log.install(writer_engine.sync_engine)
+        slow_query_log.install(reader_engine.sync_engine)
+    sqlite_writer = SQLiteWriter(writer_engine)
+    sync_session_class, session_class = session_classes(sqlite_writer, reader_engine)
+    # bind is what db.bind reports (e.g. for the dialect); statements are routed per call
+    AsyncSessionLocal = async_sessionmaker(
+        bind=reader_engine,
+        class_=session_class,
+        sync_session_class=sync_session_class,
+        expire_on_commit=False,
+        autoflush=False
+    )
+else:
+    # Shared SessionLocal class
+    AsyncSessionLocal = async_sessionmaker(
+        bind=engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False
+    )
 
 # Base class for all ORM models
 class Base(DeclarativeBase):
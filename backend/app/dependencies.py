@@ -1,3 +1,5 @@
+import hmac
+import os
 from fastapi import Depends, HTTPException, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -22,6 +24,7 @@ async def get_current_user(authorization: str = Header(None), db: AsyncSession =
         user = result.scalars().first()
         if not user:
              raise HTTPException(status_code=401, detail="No default user found. Register first.")
+        await db.commit()
         return user
 
     result = await db.execute(select(models.User).where(models.User.id == user_id))
@@ -29,5 +32,19 @@ async def get_current_user(authorization: str = Header(None), db: AsyncSession =
     
     if not user:
         raise HTTPException(status_code=401, detail="Invalid Authentication Token")
-        
+
+    # End the auth read transaction so the pooled connection goes back to the pool.
+    # Otherwise a long AI call pins one connection per request and starves CRUD routes.
+    await db.commit()
     return user
+
+# Shared secret for operator endpoints (/ai/stats, /ai/metrics); they're off when unset
+OPERATOR_TOKEN = os.getenv("OPERATOR_TOKEN")
+
+async def require_operator(authorization: str = Header(None), x_operator_token: str = Header(None)):
+    # Header or bearer token, so Prometheus can scrape with its bearer_token setting
+    if not OPERATOR_TOKEN:
+        raise HTTPException(status_code=403, detail="Operator endpoints are disabled (set OPERATOR_TOKEN)")
+    token = x_operator_token or (authorization or "").replace("Bearer ", "")
+    if not hmac.compare_digest(token.encode(), OPERATOR_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid operator token")
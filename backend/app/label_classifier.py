@@ -0,0 +1,165 @@
+import math
+import os
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+
+# Same closed set the /ai/label prompt asks Gemini to choose from
+LABEL_CATEGORIES = ['Physical Training', 'Mental Fortitude', 'Discipline', 'Uncomfortable Zone', 'Side Quest', 'Recovery']
+
+# Predictions at or above this posterior skip the LLM entirely
+LABEL_CLASSIFIER_THRESHOLD = float(os.getenv("LABEL_CLASSIFIER_THRESHOLD", "0.8"))
+LABEL_CLASSIFIER_MAX_USERS = int(os.getenv("LABEL_CLASSIFIER_MAX_USERS", "1024"))
+# Additive smoothing. Kept small because a single keyword hit is strong evidence
+# in a six-way closed set.
+SMOOTHING = 0.02
+
+# Keyword seeds so a brand-new user still gets fast-path answers for obvious texts.
+# Each seed list counts as one labelled example of its category.
+SEED_KEYWORDS = {
+    'Physical Training': "run running miles pushups pullups situps gym lift lifting workout squats deadlift cardio swim bike ruck sprint plank burpees train training",
+    'Mental Fortitude': "read reading book meditate meditation journal study learn focus visualize mindset write writing",
+    'Discipline': "wake early 5am 4am bed schedule routine habit diet sugar alcohol budget clean phone plan",
+    'Uncomfortable Zone': "cold shower ice bath plunge public speak speaking fear stranger fasting fast pitch ask",
+    'Side Quest': "errand groceries laundry email emails fix pay bills organize buy appointment",
+    'Recovery': "sleep stretch stretching rest yoga nap massage foam roll hydrate recovery mobility",
+}
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+_STOPWORDS = {"a", "an", "the", "and", "or", "to", "of", "for", "in", "on", "at", "my", "i", "with", "by", "do", "be", "is", "it", "this", "that"}
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in _STOPWORDS]
+
+@dataclass
+class LabelPrediction:
+    label: str
+    confidence: float
+
+class UserLabelModel:
+    """Multinomial Naive Bayes over keyword counts. Counts are additive, so learning
+    or forgetting one labelled row is O(tokens) and never needs a full retrain."""
+
+    def __init__(self):
+        self.doc_counts = Counter()
+        self.token_counts = {c: Counter() for c in LABEL_CATEGORIES}
+        self.token_totals = Counter()
+        self.vocabulary = Counter()
+        self.examples = 0
+        for label, words in SEED_KEYWORDS.items():
+            self.learn(words, label)
+        self.examples = 0 # seeds don't count as user examples
+
+    def learn(self, text: str, label: str, weight: int = 1):
+        if label not in self.token_counts:
+            return
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        self.doc_counts[label] += weight
+        self.examples += weight
+        for token in tokens:
+            self.token_counts[label][token] += weight
+            self.token_totals[label] += weight
+            self.vocabulary[token] += weight
+            if self.vocabulary[token] <= 0:
+                del self.vocabulary[token]
+
+    def forget(self, text: str, label: str):
+        # Only undo rows we actually learned, so counts can never go negative
+        if label not in self.token_counts or self.doc_counts[label] <= 0:
+            return
+        tokens = Counter(tokenize(text))
+        if tokens and all(self.token_counts[label][t] >= n for t, n in tokens.items()):
+            self.learn(text, label, weight=-1)
+
+    def predict(self, text: str) -> Optional[LabelPrediction]:
+        tokens = [t for t in tokenize(text) if t in self.vocabulary]
+        if not tokens:
+            return None
+        total_docs = sum(self.doc_counts.values())
+        vocab_size = len(self.vocabulary)
+        scores = {}
+        for label in LABEL_CATEGORIES:
+            score = math.log((self.doc_counts[label] + 1) / (total_docs + len(LABEL_CATEGORIES)))
+            denominator = self.token_totals[label] + SMOOTHING * vocab_size
+            for token in tokens:
+                score += math.log((self.token_counts[label][token] + SMOOTHING) / denominator)
+            scores[label] = score
+        best = max(scores, key=scores.get)
+        peak = scores[best]
+        normalizer = sum(math.exp(s - peak) for s in scores.values())
+        return LabelPrediction(best, 1 / normalizer)
+
+class LabelClassifierRegistry:
+    """Per-user models, built on first use from the user's own labelled rows
+    (Task.category, Wish.label, CoreTask.label) and kept up to date as rows are saved."""
+
+    def __init__(self, max_users: int, threshold: float):
+        self.max_users = max_users
+        self.threshold = threshold
+        self._models = OrderedDict()
+        self.fast_path = 0
+        self.fallthrough = 0
+
+    async def _load(self, db: AsyncSession, user_id: str) -> UserLabelModel:
+        model = UserLabelModel()
+        queries = [
+            select(models.Task.description, models.Task.category).where(models.Task.user_id == user_id),
+            select(models.Wish.description, models.Wish.label).where(models.Wish.user_id == user_id),
+            select(models.CoreTask.description, models.CoreTask.label).where(models.CoreTask.user_id == user_id),
+        ]
+        for query in queries:
+            result = await db.execute(query)
+            for description, label in result.all():
+                model.learn(description, label)
+        return model
+
+    async def get(self, db: AsyncSession, user_id: str) -> UserLabelModel:
+        model = self._models.get(user_id)
+        if model is None:
+            model = await self._load(db, user_id)
+            self._models[user_id] = model
+            while len(self._models) > self.max_users:
+                self._models.popitem(last=False)
+        self._models.move_to_end(user_id)
+        return model
+
+    async def classify(self, db: AsyncSession, user_id: str, text: str) -> Optional[str]:
+        # Returns a label only when confident; None means "ask Gemini"
+        prediction = (await self.get(db, user_id)).predict(text)
+        if prediction and prediction.confidence >= self.threshold:
+            self.fast_path += 1
+            return prediction.label
+        self.fallthrough += 1
+        return None
+
+    def learn(self, user_id: str, text: str, label: str):
+        # Users that aren't loaded yet will pick the row up from the DB on first use
+        model = self._models.get(user_id)
+        if model:
+            model.learn(text, label)
+
+    def forget(self, user_id: str, text: str, label: str):
+        model = self._models.get(user_id)
+        if model:
+            model.forget(text, label)
+
+    def clear(self):
+        self._models.clear()
+
+    def stats(self) -> dict:
+        decisions = self.fast_path + self.fallthrough
+        return {
+            "users": len(self._models),
+            "threshold": self.threshold,
+            "fast_path": self.fast_path,
+            "fallthrough": self.fallthrough,
+            "fast_path_rate": self.fast_path / decisions if decisions else 0.0,
+        }
+
+label_classifier = LabelClassifierRegistry(LABEL_CLASSIFIER_MAX_USERS, LABEL_CLASSIFIER_THRESHOLD)
@@ -8,11 +8,36 @@ if not os.getenv("GEMINI_API_KEY"):
     load_dotenv("../../.env")
     load_dotenv("../../../.env")
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import auth, tasks, goals, ai, resources
+from app.ai_jobs import job_queue
+from app.pregen import pregen_scheduler, AI_PREGEN_ENABLED
+from app.weekly_eval import weekly_evaluation_scheduler, AI_EVAL_ENABLED
+from app.database import sqlite_writer
 
-app = FastAPI(title="Goggins Habit Tracker API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Re-queue AI jobs left over from a previous run and start the workers
+    try:
+        await job_queue.recover()
+    except Exception as e:
+        print(f"AI job recovery skipped: {e}")
+    # Off-peak pre-generation of stories and weekly briefings
+    if AI_PREGEN_ENABLED:
+        pregen_scheduler.start()
+    # Nightly evaluation of last week's weekly goals
+    if AI_EVAL_ENABLED:
+        weekly_evaluation_scheduler.start()
+    yield
+    await pregen_scheduler.stop()
+    await weekly_evaluation_scheduler.stop()
+    await job_queue.shutdown()
+    if sqlite_writer:
+        await sqlite_writer.close()
+
+app = FastAPI(title="Goggins Habit Tracker API", version="1.0.0", lifespan=lifespan)
 
 # CORS (Allow frontend)
 app.add_middleware(
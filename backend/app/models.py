@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, JSON, Text
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, Date, DateTime, JSON, Text, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 import uuid
@@ -16,9 +16,10 @@ class User(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (Index("ix_tasks_user_id_date", "user_id", "date"),)
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    date = Column(String, index=True) # YYYY-MM-DD
+    date = Column(Date, index=True)
     description = Column(String)
     difficulty = Column(String)
     completed = Column(Boolean, default=False)
@@ -40,28 +41,42 @@ class Task(Base):
 class RecurringTask(Base):
     __tablename__ = "recurring_tasks"
     id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     description = Column(String)
     difficulty = Column(String)
     category = Column(String)
     recurrence_rule = Column(String)
-    start_date = Column(String)
+    start_date = Column(Date)
     estimated_time = Column(Float)
     goal_alignment = Column(Float, nullable=True)
     aligned_goal_id = Column(String, ForeignKey("goals.id"), nullable=True)
     justification = Column(Text, nullable=True)
     time = Column(String, nullable=True)
-    completions = Column(JSON, default={}) # JSON blob for completions history
+    # Per-date completions live in recurring_completions
+
+class RecurringCompletion(Base):
+    __tablename__ = "recurring_completions"
+    __table_args__ = (Index("ix_recurring_completions_user_id_date", "user_id", "date"),)
+    recurring_task_id = Column(String, ForeignKey("recurring_tasks.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, primary_key=True) # day of the occurrence
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    completed = Column(Boolean, default=False)
+    actual_time = Column(Float, nullable=True)
+    time = Column(String, nullable=True)
+    bet_amount = Column(Float, nullable=True)
+    bet_multiplier = Column(Float, nullable=True)
+    bet_placed = Column(Boolean, nullable=True)
+    bet_won = Column(Boolean, nullable=True)
 
 class Goal(Base):
     __tablename__ = "goals"
     id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     description = Column(String)
-    target_date = Column(String)
+    target_date = Column(Date)
     label = Column(String, nullable=True)
     completed = Column(Boolean, default=False)
-    completion_date = Column(String, nullable=True)
+    completion_date = Column(Date, nullable=True)
     completion_proof = Column(Text, nullable=True)
     completion_feedback = Column(Text, nullable=True)
     system = Column(JSON, nullable=True) # JSON blob for Atomic Habits system
@@ -69,10 +84,11 @@ class Goal(Base):
 
 class WeeklyGoal(Base):
     __tablename__ = "weekly_goals"
+    __table_args__ = (Index("ix_weekly_goals_user_id_target_date", "user_id", "target_date"),)
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     description = Column(String)
-    target_date = Column(String)
+    target_date = Column(Date)
     aligned_goal_id = Column(String, ForeignKey("goals.id"), nullable=True)
     goal_alignment = Column(Float, nullable=True)
     label = Column(String, nullable=True)
@@ -82,30 +98,41 @@ class WeeklyGoal(Base):
 class SideQuest(Base):
     __tablename__ = "side_quests"
     id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     description = Column(String)
     difficulty = Column(String)
     daily_goal = Column(Integer)
-    completions = Column(JSON, default={})
+    # Per-date counts live in side_quest_completions
+
+class SideQuestCompletion(Base):
+    __tablename__ = "side_quest_completions"
+    __table_args__ = (Index("ix_side_quest_completions_user_id_date", "user_id", "date"),)
+    side_quest_id = Column(String, ForeignKey("side_quests.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    count = Column(Integer, default=0)
 
 class Reward(Base):
     __tablename__ = "rewards"
     id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String)
     cost = Column(Float)
 
 class PurchasedReward(Base):
     __tablename__ = "purchased_rewards"
+    __table_args__ = (Index("ix_purchased_rewards_user_id_purchase_date", "user_id", "purchase_date"),)
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     reward_id = Column(String, ForeignKey("rewards.id"))
     name = Column(String)
     cost = Column(Float)
-    purchase_date = Column(String)
+    purchase_date = Column(Date)
 
 class DiaryEntry(Base):
     __tablename__ = "diary_entries"
+    # The PK leads with date, which doesn't help per-user lookups
+    __table_args__ = (Index("ix_diary_entries_user_id_date", "user_id", "date"),)
     # Composite PK? Or just date + user_id?
     # Keeping date as PK makes it hard for multi-user unless composite.
     # Changing to internal ID or composite PK.
@@ -114,7 +141,7 @@ class DiaryEntry(Base):
     # No, logic uses `where(date == ...)`.
     # Let's add ID and make date just a column, OR use composite.
     # SQLAlchemy composite PK:
-    date = Column(String, primary_key=True)
+    date = Column(Date, primary_key=True)
     user_id = Column(String, ForeignKey("users.id"), primary_key=True)
     initial_reflection = Column(Text, nullable=True)
     initial_feedback = Column(Text, nullable=True)
@@ -131,7 +158,7 @@ class Character(Base):
 class Wish(Base):
     __tablename__ = "wish_list"
     id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     description = Column(String)
     explanation = Column(Text, nullable=True)
     label = Column(Text, nullable=True)
@@ -139,7 +166,62 @@ class Wish(Base):
 class CoreTask(Base):
     __tablename__ = "core_list"
     id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     description = Column(String)
     explanation = Column(Text, nullable=True)
     label = Column(Text, nullable=True)
+
+class AIJob(Base):
+    __tablename__ = "ai_jobs"
+    id = Column(String, primary_key=True, default=generate_uuid)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String) # review, evaluate-weekly, weekly-briefing, contract
+    status = Column(String, default="queued") # queued, running, succeeded, failed
+    request = Column(JSON)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    worker_id = Column(String, nullable=True) # process that claimed the job
+    heartbeat_at = Column(DateTime, nullable=True) # refreshed while running; a stale one means the worker died
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class ChatSession(Base):
+    __tablename__ = "chat_sessions"
+    id = Column(String, primary_key=True, default=generate_uuid)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    summary = Column(Text, nullable=True) # Rolling summary of every message up to summarized_through
+    summarized_through = Column(Integer, default=0) # seq of the last message folded into summary
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class ChatMessage(Base):
+    __tablename__ = "chat_messages"
+    # Two turns racing for the same seq: the loser retries (chat_memory.append_message)
+    __table_args__ = (UniqueConstraint("session_id", "seq", name="uq_chat_messages_session_id_seq"),)
+    id = Column(String, primary_key=True, default=generate_uuid)
+    session_id = Column(String, ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
+    seq = Column(Integer) # 1-based position within the session
+    sender = Column(String) # user, ai
+    content = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class GoalAlignmentMemo(Base):
+    __tablename__ = "goal_alignment_memos"
+    __table_args__ = (UniqueConstraint("user_id", "description_key", "goals_hash"),)
+    id = Column(String, primary_key=True, default=generate_uuid)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    description_key = Column(String) # normalized task description
+    goals_hash = Column(String) # sha256 of the active goals' ids and descriptions
+    alignment_score = Column(Float)
+    justification = Column(Text, nullable=True)
+    aligned_goal_id = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class WeeklyBriefing(Base):
+    __tablename__ = "weekly_briefings"
+    __table_args__ = (UniqueConstraint("user_id", "week_start"),)
+    id = Column(String, primary_key=True, default=generate_uuid)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    week_start = Column(Date) # Monday of the week the briefing is for
+    briefing = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
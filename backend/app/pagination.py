@@ -0,0 +1,118 @@
+"""Keyset pagination and NDJSON streaming for the list routes.
+
+A page is ordered by a unique key: (date, id) for dated rows, id otherwise.
+The cursor is the key of the page's last row, so the next page is one indexed
+range scan however deep the client has scrolled (no OFFSET). Rows with a NULL
+date (legacy rows the date migration couldn't read) sort last. Lists stay plain
+JSON arrays unless the client asks for a `limit`, a `cursor` or `format=ndjson`.
+"""
+import base64
+import datetime
+import json
+from typing import Optional
+from fastapi import HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import tuple_, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+from app import schemas
+
+MAX_LIMIT = 1000
+STREAM_BATCH = 500 # rows per fetch (yield_per) while streaming
+
+def encode_cursor(values) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime.date) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, keys) -> tuple:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or len(raw) != len(keys):
+            raise ValueError
+        return tuple(
+            datetime.date.fromisoformat(v) if v is not None and key.type.python_type is datetime.date else v
+            for key, v in zip(keys, raw)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+
+def _nullable(key) -> bool:
+    return key.expression.nullable
+
+def _after(keys, values):
+    # Rows after `values` in (key NULLS LAST, ...) order. A row-value comparison
+    # would never match a NULL, skipping those rows and any page after them.
+    key, value = keys[0], values[0]
+    if len(keys) == 1:
+        return key > value
+    if value is None:
+        return and_(key.is_(None), _after(keys[1:], values[1:]))
+    later = or_(key > value, and_(key == value, _after(keys[1:], values[1:])))
+    return or_(later, key.is_(None)) if _nullable(key) else later
+
+def keyset(query, keys, cursor: Optional[str] = None):
+    """`query` ordered by `keys`, starting after `cursor`."""
+    query = query.order_by(*(key.asc().nulls_last() if _nullable(key) else key for key in keys))
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        if any(_nullable(key) for key in keys):
+            query = query.where(_after(keys, values))
+        else:
+            query = query.where(tuple_(*keys) > tuple_(*values))
+    return query
+
+class PageParams:
+    """Query parameters shared by the list routes (use as `page: PageParams = Depends()`)."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+        cursor: Optional[str] = None,
+        format: str = Query("json", pattern="^(json|ndjson)$"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.format = format
+
+async def fetch_page(db: AsyncSession, query, keys, limit: Optional[int], cursor: Optional[str]):
+    """(rows, next_cursor); next_cursor is None on the last page."""
+    limit = limit or MAX_LIMIT
+    rows = (await db.execute(keyset(query, keys, cursor).limit(limit + 1))).scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], key.key) for key in keys])
+
+async def _plain(db, rows, schema):
+    return [schema.model_validate(row) for row in rows]
+
+def ndjson_response(query, keys, cursor: Optional[str], limit: Optional[int], schema, build=None) -> StreamingResponse:
+    """Streams the rows one JSON object per line. Rows are fetched STREAM_BATCH at a
+    time, so memory stays flat however long the history is. `build(db, rows)` turns
+    a batch of rows into response models (default: schema.model_validate)."""
+    query = keyset(query, keys, cursor)
+    if limit:
+        query = query.limit(limit)
+    build = build or (lambda db, rows: _plain(db, rows, schema))
+
+    async def lines():
+        # The request's db session is closed once the response starts streaming
+        async with AsyncSessionLocal() as db:
+            result = await db.stream_scalars(query.execution_options(yield_per=STREAM_BATCH))
+            async for rows in result.partitions():
+                for item in await build(db, rows):
+                    yield item.model_dump_json(by_alias=True) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+async def list_response(db: AsyncSession, query, keys, page: PageParams, schema, build=None):
+    """A list route's response: the whole list (no paging parameters, as older
+    clients expect), a schemas.Page, or an NDJSON stream."""
+    if page.format == "ndjson":
+        return ndjson_response(query, keys, page.cursor, page.limit, schema, build)
+    build = build or (lambda db, rows: _plain(db, rows, schema))
+    if page.limit is None and page.cursor is None:
+        rows = (await db.execute(keyset(query, keys))).scalars().all()
+        return await build(db, rows)
+    rows, next_cursor = await fetch_page(db, query, keys, page.limit, page.cursor)
+    return schemas.Page[schema](items=await build(db, rows), next_cursor=next_cursor)
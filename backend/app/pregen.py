@@ -0,0 +1,216 @@
+import asyncio
+import datetime
+import logging
+import os
+import time
+from collections import defaultdict
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from app import models, schemas
+from app.database import AsyncSessionLocal
+from app.ai_client import get_model, generate_text
+from app.ai_prompts import story_prompt, weekly_briefing_prompt
+from app.circuit_breaker import CircuitOpenError
+
+# Pre-generation runs once a day inside the off-peak window [start, end) of
+# server-local hours, e.g. "2-6".
+AI_PREGEN_ENABLED = os.getenv("AI_PREGEN_ENABLED", "1") == "1"
+AI_PREGEN_HOURS = os.getenv("AI_PREGEN_HOURS", "2-6")
+AI_PREGEN_CHECK_SECONDS = float(os.getenv("AI_PREGEN_CHECK_SECONDS", "600"))
+# Calls per minute per API key. Users without their own key share the server key's budget.
+AI_PREGEN_RATE_PER_MINUTE = float(os.getenv("AI_PREGEN_RATE_PER_MINUTE", "6"))
+
+logger = logging.getLogger(__name__)
+
+def briefing_week(today: datetime.date) -> datetime.date:
+    # The upcoming week: today if it's Monday, otherwise next Monday
+    return today + datetime.timedelta(days=(7 - today.weekday()) % 7)
+
+class KeyRateLimiter:
+    """Spaces calls for the same key at least 60/per_minute seconds apart."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = {}
+        self.waits = 0
+
+    async def acquire(self, key: str):
+        now = time.monotonic()
+        slot = max(now, self._next.get(key, 0.0))
+        self._next[key] = slot + self.interval
+        if slot > now:
+            self.waits += 1
+            await asyncio.sleep(slot - now)
+
+class NightlyScheduler:
+    """Runs job(today) once a day, at the first check that falls inside the
+    off-peak window of server-local hours. A failed run is retried next check."""
+
+    def __init__(self, job, hours: str, check_seconds: float):
+        start, end = hours.split("-")
+        self.window = (int(start), int(end))
+        self.check_seconds = check_seconds
+        self.job = job
+        self.last_run = None
+        self._task = None
+
+    def in_window(self, hour: int) -> bool:
+        start, end = self.window
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    async def tick(self, now: datetime.datetime):
+        if self.in_window(now.hour) and self.last_run != now.date().isoformat():
+            try:
+                await self.job(now.date())
+                self.last_run = now.date().isoformat()
+            except Exception:
+                logger.exception("Nightly job %s failed", getattr(self.job, "__qualname__", self.job))
+
+    async def _loop(self):
+        while True:
+            await self.tick(datetime.datetime.now())
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+class PregenScheduler(NightlyScheduler):
+    """Writes today's task stories into Task.story and next week's briefing into
+    weekly_briefings ahead of time, so the interactive routes can answer from the
+    DB. One sequential worker per API key, all keys in parallel."""
+
+    def __init__(self, hours: str, check_seconds: float, rate_per_minute: float):
+        super().__init__(self.run_once, hours, check_seconds)
+        self.rate = KeyRateLimiter(rate_per_minute)
+        self.stories = 0
+        self.briefings = 0
+        self.failures = 0
+
+    async def _collect(self, today: datetime.date) -> list:
+        # Set-based reads: one query per kind of row, across all users
+        week_start = briefing_week(today)
+        prev_start = week_start - datetime.timedelta(days=7)
+        week_end = week_start + datetime.timedelta(days=6)
+
+        async with AsyncSessionLocal() as db:
+            users = {u.id: u for u in (await db.execute(select(models.User))).scalars().all()}
+            goals = defaultdict(list)
+            for goal in (await db.execute(select(models.Goal).where(models.Goal.completed.isnot(True)))).scalars().all():
+                goals[goal.user_id].append(schemas.Goal.model_validate(goal))
+            tasks = (await db.execute(
+                select(models.Task).where(models.Task.date == today, models.Task.story.is_(None), models.Task.completed.isnot(True))
+            )).scalars().all()
+            weekly = (await db.execute(
+                select(models.WeeklyGoal).where(models.WeeklyGoal.target_date >= prev_start, models.WeeklyGoal.target_date <= week_end)
+            )).scalars().all()
+            done = set((await db.execute(
+                select(models.WeeklyBriefing.user_id).where(models.WeeklyBriefing.week_start == week_start)
+            )).scalars().all())
+
+        work = [] # (user, endpoint, prompt, save coroutine factory)
+        for task in tasks:
+            user = users[task.user_id]
+            request = schemas.AIStoryRequest(task=schemas.Task.model_validate(task), goals=goals[user.id], justification=task.justification)
+            work.append((user, "story", story_prompt(request, user), self._save_story(task.id)))
+
+        previous, upcoming = defaultdict(list), defaultdict(list)
+        for goal in weekly:
+            if goal.target_date >= week_start:
+                upcoming[goal.user_id].append(schemas.WeeklyGoal.model_validate(goal))
+            elif goal.evaluation:
+                try:
+                    previous[goal.user_id].append(schemas.WeeklyGoalEvaluation.model_validate(goal.evaluation))
+                except ValueError:
+                    pass # malformed evaluation blob; leave it out of the prompt
+        for user_id in set(upcoming) | set(goals):
+            if user_id in done:
+                continue
+            user = users[user_id]
+            request = schemas.AIWeeklyBriefingRequest(
+                previousWeekEvaluations=previous[user_id], nextWeekGoals=upcoming[user_id], longTermGoals=goals[user_id]
+            )
+            work.append((user, "weekly-briefing", weekly_briefing_prompt(request, user), self._save_briefing(user_id, week_start)))
+        return work
+
+    def _save_story(self, task_id: str):
+        async def save(text: str):
+            async with AsyncSessionLocal() as db:
+                # Never overwrite a story that appeared in the meantime
+                await db.execute(
+                    update(models.Task).where(models.Task.id == task_id, models.Task.story.is_(None)).values(story=text)
+                )
+                await db.commit()
+            self.stories += 1
+        return save
+
+    def _save_briefing(self, user_id: str, week_start: datetime.date):
+        async def save(text: str):
+            await store_briefing(user_id, week_start, text)
+            self.briefings += 1
+        return save
+
+    async def _run_key(self, key: str, items: list):
+        for model, endpoint, prompt, save in items:
+            await self.rate.acquire(key)
+            try:
+                text = await generate_text(model, prompt, endpoint)
+                await save(text.strip())
+            except CircuitOpenError:
+                # Upstream is down; the next night picks up whatever is left
+                self.failures += 1
+                return
+            except Exception as e:
+                self.failures += 1
+                print(f"Pregen Error ({endpoint}): {e}")
+
+    async def run_once(self, today: datetime.date = None) -> dict:
+        today = today or datetime.date.today()
+        by_key = defaultdict(list)
+        for user, endpoint, prompt, save in await self._collect(today):
+            try:
+                model = get_model(user)
+            except HTTPException:
+                continue # no API key for this user
+            by_key[model.key_hash].append((model, endpoint, prompt, save))
+        await asyncio.gather(*(self._run_key(key, items) for key, items in by_key.items()))
+        self.last_run = today.isoformat()
+        return self.stats()
+
+    def stats(self) -> dict:
+        return {
+            "last_run": self.last_run,
+            "stories": self.stories,
+            "briefings": self.briefings,
+            "failures": self.failures,
+            "rate_limited_waits": self.rate.waits,
+        }
+
+async def stored_story(db, user_id: str, task_id: str):
+    result = await db.execute(select(models.Task.story).where(models.Task.id == task_id, models.Task.user_id == user_id))
+    return result.scalar()
+
+async def stored_briefing(db, user_id: str, today: datetime.date = None):
+    week = briefing_week(today or datetime.date.today())
+    result = await db.execute(
+        select(models.WeeklyBriefing.briefing).where(models.WeeklyBriefing.user_id == user_id, models.WeeklyBriefing.week_start == week)
+    )
+    return result.scalar()
+
+async def store_briefing(user_id: str, week_start: datetime.date, text: str):
+    async with AsyncSessionLocal() as db:
+        db.add(models.WeeklyBriefing(user_id=user_id, week_start=week_start, briefing=text))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Already generated for this week (scheduler and a user request raced)
+            await db.rollback()
+
+pregen_scheduler = PregenScheduler(AI_PREGEN_HOURS, AI_PREGEN_CHECK_SECONDS, AI_PREGEN_RATE_PER_MINUTE)
@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+from typing import Any
+
+# Rough Gemini tokenizer ratio for English/JSON. Good enough for budgeting and
+# needs no tokenizer download.
+CHARS_PER_TOKEN = 4
+
+# Upper bound for a whole prompt (persona + instructions + data), per endpoint
+ENDPOINT_TOKEN_BUDGETS = {
+    "review": int(os.getenv("AI_PROMPT_BUDGET_REVIEW", "3000")),
+    "evaluate-weekly": int(os.getenv("AI_PROMPT_BUDGET_EVALUATE_WEEKLY", "2000")),
+}
+AI_PROMPT_BUDGET_DEFAULT = int(os.getenv("AI_PROMPT_BUDGET_DEFAULT", "4000"))
+
+# Keys that cost tokens but tell the model nothing about performance
+LOW_VALUE_KEYS = {
+    "id", "userId", "user_id", "recurringMasterId", "recurring_master_id",
+    "alignedGoalId", "aligned_goal_id", "story", "createdAt", "updatedAt",
+}
+
+logger = logging.getLogger(__name__)
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def budget_for(endpoint: str) -> int:
+    return ENDPOINT_TOKEN_BUDGETS.get(endpoint, AI_PROMPT_BUDGET_DEFAULT)
+
+def render(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def compact(value: Any) -> Any:
+    """Lossless-ish cleanup: drops empty values and low-value keys, removes
+    duplicate list items and hoists keys that repeat the same value in every
+    row of a list into a single "_all" entry."""
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            if k in LOW_VALUE_KEYS:
+                continue
+            v = compact(v)
+            if v is None or v == "" or v == [] or v == {}:
+                continue
+            out[k] = v
+        return out
+    if isinstance(value, (list, tuple)):
+        items, seen = [], set()
+        for item in value:
+            item = compact(item)
+            marker = render(item)
+            if marker in seen:
+                continue
+            seen.add(marker)
+            items.append(item)
+        return _hoist_common(items)
+    return value
+
+def _hoist_common(items: list) -> list:
+    if len(items) < 3 or not all(isinstance(i, dict) for i in items):
+        return items
+    common = {
+        k: v for k, v in items[0].items()
+        if all(k in i and i[k] == v for i in items[1:])
+    }
+    if not common:
+        return items
+    return [{"_all": common}] + [{k: v for k, v in i.items() if k not in common} for i in items]
+
+def fit(value: Any, max_tokens: int) -> Any:
+    """Shrinks `value` until it renders within `max_tokens`. Lists keep their
+    first items and say how many were dropped; strings are cut; dicts shrink
+    their largest fields first."""
+    if estimate_tokens(render(value)) <= max_tokens:
+        return value
+    if isinstance(value, str):
+        keep = max(0, max_tokens * CHARS_PER_TOKEN - 8)
+        return value[:keep] + "…"
+    if isinstance(value, list):
+        # Binary search on the number of leading items that still fit
+        lo, hi = 0, len(value)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            candidate = value[:mid] + [f"+{len(value) - mid} more omitted"]
+            if estimate_tokens(render(candidate)) <= max_tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        if lo == 0:
+            return [f"{len(value)} items omitted"]
+        return value[:lo] + [f"+{len(value) - lo} more omitted"]
+    if isinstance(value, dict):
+        out = dict(value)
+        for key in sorted(out, key=lambda k: len(render(out[k])), reverse=True):
+            over = estimate_tokens(render(out)) - max_tokens
+            if over <= 0:
+                break
+            size = estimate_tokens(render(out[key]))
+            out[key] = fit(out[key], max(1, size - over))
+        return out
+    return value
+
+def _fill(template: str, values: dict) -> str:
+    # Plain replacement rather than str.format: persona text and JSON examples
+    # in the template may contain braces of their own.
+    for name, text in values.items():
+        template = template.replace("{" + name + "}", text)
+    return template
+
+class PromptBuilder:
+    """Assembles a prompt from a fixed template plus data sections, and trims the
+    sections (lowest priority first) until the whole prompt fits the endpoint's
+    token budget."""
+
+    def __init__(self, endpoint: str, budget: int = None):
+        self.endpoint = endpoint
+        self.budget = budget if budget is not None else budget_for(endpoint)
+        self._sections = [] # (name, value, priority)
+
+    def add(self, name: str, value: Any, priority: int = 0) -> "PromptBuilder":
+        self._sections.append((name, value, priority))
+        return self
+
+    def build(self, template: str) -> str:
+        # Template uses {name} placeholders for every section
+        raw = {name: render(value) for name, value, _ in self._sections}
+        before = estimate_tokens(_fill(template, raw))
+
+        values = {name: compact(value) for name, value, _ in self._sections}
+        rendered = {name: render(v) for name, v in values.items()}
+        overhead = estimate_tokens(_fill(template, {name: "" for name in values}))
+        available = max(0, self.budget - overhead)
+
+        for name, _, _ in sorted(self._sections, key=lambda s: s[2]):
+            others = sum(estimate_tokens(r) for n, r in rendered.items() if n != name)
+            if others + estimate_tokens(rendered[name]) <= available:
+                break
+            rendered[name] = render(fit(values[name], max(1, available - others)))
+
+        prompt = _fill(template, rendered)
+        after = estimate_tokens(prompt)
+        prompt_stats.record(before, after)
+        logger.debug("Prompt budget (%s): %d -> %d tokens (budget %d)", self.endpoint, before, after, self.budget)
+        return prompt
+
+class PromptStats:
+    def __init__(self):
+        self.prompts = 0
+        self.trimmed = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def record(self, before: int, after: int):
+        self.prompts += 1
+        self.tokens_before += before
+        self.tokens_after += after
+        if after < before:
+            self.trimmed += 1
+
+    def stats(self) -> dict:
+        return {
+            "prompts": self.prompts,
+            "trimmed": self.trimmed,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+        }
+
+prompt_stats = PromptStats()
@@ -0,0 +1,117 @@
+import datetime
+from sqlalchemy import select, insert, update, delete, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, schemas
+
+def completion_entry(row: models.RecurringCompletion) -> dict:
+    # The camelCase shape RecurringTask.completions entries have always had
+    return schemas.RecurringCompletion.model_validate(row).model_dump(by_alias=True, exclude_none=True, exclude={"date"})
+
+def _fields(entry) -> dict:
+    # Old clients stored bare booleans as well as objects
+    if not isinstance(entry, dict):
+        entry = {"completed": bool(entry)}
+    return schemas.RecurringCompletion.model_validate(entry).model_dump(exclude_unset=True, exclude={"date"})
+
+async def load_completions(db: AsyncSession, user_id: str, start_date: datetime.date = None, end_date: datetime.date = None,
+                           task_id: str = None, task_ids: list = None) -> dict:
+    """{recurring_task_id: {date: entry}} in one query, served by the (user_id, date) index."""
+    query = select(models.RecurringCompletion).where(models.RecurringCompletion.user_id == user_id)
+    if task_id:
+        query = query.where(models.RecurringCompletion.recurring_task_id == task_id)
+    if task_ids is not None:
+        query = query.where(models.RecurringCompletion.recurring_task_id.in_(task_ids))
+    if start_date and end_date:
+        query = query.where(models.RecurringCompletion.date >= start_date, models.RecurringCompletion.date <= end_date)
+    out = {}
+    for row in (await db.execute(query.order_by(models.RecurringCompletion.date))).scalars().all():
+        out.setdefault(row.recurring_task_id, {})[row.date] = completion_entry(row)
+    return out
+
+async def completion_history(db: AsyncSession, task_id: str) -> list:
+    # [(date, completed)] for every occurrence of one task
+    result = await db.execute(
+        select(models.RecurringCompletion.date, models.RecurringCompletion.completed)
+        .where(models.RecurringCompletion.recurring_task_id == task_id)
+    )
+    return [(day, bool(completed)) for day, completed in result.all()]
+
+async def completion_histories(db: AsyncSession, user_id: str, task_ids: list) -> dict:
+    """{task_id: [(date, completed)]} for several of a user's tasks in one query."""
+    if not task_ids:
+        return {}
+    result = await db.execute(
+        select(models.RecurringCompletion.recurring_task_id, models.RecurringCompletion.date, models.RecurringCompletion.completed)
+        .where(models.RecurringCompletion.user_id == user_id, models.RecurringCompletion.recurring_task_id.in_(task_ids))
+    )
+    out = {}
+    for task_id, day, completed in result.all():
+        out.setdefault(task_id, []).append((day, bool(completed)))
+    return out
+
+def _new_row(task: models.RecurringTask, date: datetime.date) -> models.RecurringCompletion:
+    return models.RecurringCompletion(recurring_task_id=task.id, date=date, user_id=task.user_id, completed=False)
+
+async def upsert_completion(db: AsyncSession, task: models.RecurringTask, date: datetime.date, fields: dict):
+    """Writes one occurrence. Returns (the previous (date, completed) or None, the row)."""
+    row = await db.get(models.RecurringCompletion, (task.id, date))
+    previous = (row.date, bool(row.completed)) if row else None
+    if row is None:
+        row = _new_row(task, date)
+        db.add(row)
+    for key, value in fields.items():
+        setattr(row, key, value)
+    return previous, row
+
+async def sync_completions(db: AsyncSession, task: models.RecurringTask, completions: dict):
+    """Applies a completions map as sent with the whole task. The map is a patch:
+    dates it leaves out are kept, a null entry deletes that date, and only dates
+    whose values changed are written. Returns ([(date, completed)] before, after)
+    for those dates."""
+    changes = await sync_completions_many(db, task.user_id, {task.id: completions} if completions else {})
+    return changes.get(task.id, ([], []))
+
+async def sync_completions_many(db: AsyncSession, user_id: str, completions_by_task: dict) -> dict:
+    """sync_completions for several tasks with one SELECT, one INSERT, one UPDATE
+    and one DELETE. Returns {task_id: ([(date, completed)] before, after)} for the
+    changed dates."""
+    wanted = {(task_id, date): None if entry is None else _fields(entry)
+              for task_id, completions in completions_by_task.items() for date, entry in completions.items()}
+    if not wanted:
+        return {}
+    result = await db.execute(
+        select(models.RecurringCompletion).where(
+            models.RecurringCompletion.recurring_task_id.in_(list(completions_by_task)),
+            models.RecurringCompletion.date.in_({date for _, date in wanted}),
+        )
+    )
+    existing = {(row.recurring_task_id, row.date): row for row in result.scalars().all()}
+    inserts, updates, deletes, out = [], [], [], {}
+    for (task_id, date), fields in wanted.items():
+        row = existing.get((task_id, date))
+        before, after = out.setdefault(task_id, ([], []))
+        keys = {"recurring_task_id": task_id, "date": date}
+        if fields is None:
+            if row is not None:
+                before.append((date, bool(row.completed)))
+                deletes.append((task_id, date))
+            continue
+        if row is not None:
+            if all(getattr(row, key) == value for key, value in fields.items()):
+                continue
+            before.append((date, bool(row.completed)))
+            updates.append({**fields, **keys})
+            completed = fields.get("completed", row.completed)
+        else:
+            inserts.append({"completed": False, **fields, **keys, "user_id": user_id})
+            completed = fields.get("completed", False)
+        after.append((date, bool(completed)))
+    if inserts:
+        await db.execute(insert(models.RecurringCompletion), inserts)
+    if updates:
+        await db.execute(update(models.RecurringCompletion), updates)
+    if deletes:
+        await db.execute(delete(models.RecurringCompletion).where(
+            tuple_(models.RecurringCompletion.recurring_task_id, models.RecurringCompletion.date).in_(deletes)
+        ))
+    return out
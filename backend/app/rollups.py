@@ -0,0 +1,55 @@
+import datetime
+from sqlalchemy import select, func, case, cast, type_coerce, Date
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+
+PERIODS = ("week", "month")
+
+def period_start(column, period: str, dialect: str):
+    """SQL expression for the first day of the week (Monday) or month holding `column`."""
+    if dialect == "postgresql":
+        return cast(func.date_trunc(period, column), Date)
+    # SQLite stores DATE as 'YYYY-MM-DD' text; its date() modifiers do the truncation
+    if period == "week":
+        return type_coerce(func.date(column, "weekday 0", "-6 days"), Date)
+    return type_coerce(func.date(column, "start of month"), Date)
+
+async def task_rollup(db: AsyncSession, user_id: str, period: str, start_date: datetime.date = None,
+                      end_date: datetime.date = None) -> list:
+    """Per-period task totals for one user, aggregated in the database."""
+    bucket = period_start(models.Task.date, period, db.bind.dialect.name).label("period")
+    query = (
+        select(
+            bucket,
+            func.count().label("total"),
+            func.sum(case((models.Task.completed.is_(True), 1), else_=0)).label("completed"),
+            func.coalesce(func.sum(models.Task.actual_time), 0).label("actual_time"),
+        )
+        .where(models.Task.user_id == user_id, models.Task.date.is_not(None)) # legacy undated rows have no period
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    if start_date and end_date:
+        query = query.where(models.Task.date >= start_date, models.Task.date <= end_date)
+    return [row._asdict() for row in (await db.execute(query)).all()]
+
+async def completion_summary(db: AsyncSession, user_id: str, before: datetime.date) -> list:
+    """Completed tasks and recurring occurrences dated before `before`, counted per
+    (date, difficulty, category, goal alignment, aligned goal). That is all the
+    client's scoring reads, so it can score history it doesn't load in full."""
+    task, rt, occurrence = models.Task, models.RecurringTask, models.RecurringCompletion
+    tasks = (
+        select(task.date, task.difficulty, task.category, task.goal_alignment, task.aligned_goal_id,
+               func.count().label("count"), func.coalesce(func.sum(task.actual_time), 0).label("actual_time"))
+        .where(task.user_id == user_id, task.completed.is_(True), task.date < before)
+        .group_by(task.date, task.difficulty, task.category, task.goal_alignment, task.aligned_goal_id)
+    )
+    occurrences = (
+        select(occurrence.date, rt.difficulty, rt.category, rt.goal_alignment, rt.aligned_goal_id,
+               func.count().label("count"), func.coalesce(func.sum(occurrence.actual_time), 0).label("actual_time"))
+        .join(rt, rt.id == occurrence.recurring_task_id)
+        .where(occurrence.user_id == user_id, occurrence.completed.is_(True), occurrence.date < before)
+        .group_by(occurrence.date, rt.difficulty, rt.category, rt.goal_alignment, rt.aligned_goal_id)
+    )
+    rows = [row._asdict() for query in (tasks, occurrences) for row in (await db.execute(query)).all()]
+    return sorted(rows, key=lambda row: row["date"])
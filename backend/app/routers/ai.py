@@ -1,5 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from typing import List, Optional
+import asyncio
+import datetime
 import os
+import time
 from dotenv import load_dotenv
 load_dotenv()
 if not os.getenv("GEMINI_API_KEY"):
@@ -14,88 +19,150 @@ if key:
 else:
     print("DEBUG: GEMINI_API_KEY still not found in environment.")
 
-from google import genai
-from google.genai import types
-
 from app.schemas import (
-    AIStoryRequest, AILabelRequest, AIAnalyzeGoalAlignmentRequest, 
+    AIStoryRequest, AILabelRequest, AILabelBatchRequest, AILabelBatchResponse,
+    AIAnalyzeGoalAlignmentRequest, 
     AIReflectionFeedbackRequest, AIDiaryFeedbackRequest, AIReviewRequest,
     AIGoalChangeVerdictRequest, AIGoalCompletionVerdictRequest, 
     AIAtomicSystemRequest, AIWeeklyBriefingRequest, AIEnhanceTextRequest,
     AIChatRequest, AtomicHabitsSuggestions, ReviewResult, WeeklyGoalEvaluation,
     AIGoalContractRequest, AIBettingOddsRequest, AIWeeklyGoalEvaluationRequest,
-    GoalContract, GoalKPI
+    GoalContract, GoalKPI, AIJob, AIChatMessageRequest, ChatSession,
+    ChatMessage as ChatMessageSchema
 )
 import json
-from app.dependencies import get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from app.database import get_db, AsyncSessionLocal
+from app.dependencies import get_current_user, require_operator
 from app import models
+from app.label_classifier import label_classifier, LABEL_CATEGORIES
+from app.ai_client import GenAIModelWrapper, get_model, get_json_model, generate_text, stream_text, client_pool, singleflight, breaker
+from app.ai_cache import response_cache
+from app.ai_jobs import job_queue
+from app.ai_metrics import ai_metrics
+from app.alignment_memo import alignment_memo
+from app.betting_odds import betting_stats
+from app.prompt_budget import PromptBuilder, prompt_stats
+from app.ai_prompts import GOGGINS_PERSONA, story_prompt, weekly_briefing_prompt, weekly_evaluation_prompt
+from app.pregen import pregen_scheduler, stored_story, stored_briefing, store_briefing, briefing_week
+from app.weekly_eval import weekly_evaluations
+from app.chat_memory import (
+    CHAT_WINDOW, CHAT_SUMMARY_BATCH, append_message, build_prompt, unsummarized_messages, chat_summarizer
+)
 
 router = APIRouter(prefix="/ai", tags=["AI"])
 
-# Wrapper to mimic old behavior largely but with new Client
-class GenAIModelWrapper:
-    def __init__(self, api_key: str, model_name: str, json_mode: bool = False):
-        self.client = genai.Client(api_key=api_key)
-        self.model_name = model_name
-        self.json_mode = json_mode
-
-    def generate_content(self, prompt: str):
-        config = None
-        if self.json_mode:
-            config = types.GenerateContentConfig(response_mime_type="application/json")
-        
-        return self.client.models.generate_content(
-            model=self.model_name,
-            contents=prompt,
-            config=config
-        )
+@router.get("/stats", dependencies=[Depends(require_operator)])
+async def ai_stats():
+    return {
+        "clients": client_pool.stats(),
+        "cache": response_cache.stats(),
+        "label_classifier": label_classifier.stats(),
+        "singleflight": singleflight.stats(),
+        "breaker": breaker.stats(),
+        "jobs": job_queue.stats(),
+        "prompts": prompt_stats.stats(),
+        "chat_summaries": chat_summarizer.stats(),
+        "alignment_memo": alignment_memo.stats(),
+        "betting_stats": betting_stats.stats(),
+        "pregen": pregen_scheduler.stats(),
+        "weekly_evaluations": weekly_evaluations.stats(),
+    }
+
+@router.get("/metrics", dependencies=[Depends(require_operator)])
+async def ai_metrics_export(format: str = "prometheus"):
+    # Prometheus text by default; ?format=json returns the structured snapshot
+    if format == "json":
+        return ai_metrics.snapshot()
+    return PlainTextResponse(ai_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# --- Streaming (Server-Sent Events) ---
+# Each chunk is sent as `data: {"text": "..."}`. On failure the canned fallback is
+# sent the same way with "fallback": true, and every stream ends with `event: done`.
+def _sse(payload: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload)}\n\n"
+
+def _sse_response(user: models.User, prompt: str, endpoint: str, fallback: str, on_complete=None) -> StreamingResponse:
+    # on_complete(text) is awaited with the full text once a stream finishes cleanly
+    async def events():
+        chunks = []
+        try:
+            model = get_model(user)
+            async for chunk in stream_text(model, prompt, endpoint):
+                chunks.append(chunk)
+                yield _sse({"text": chunk})
+        except Exception as e:
+            ai_metrics.record_fallback(endpoint, e)
+            print(f"AI Stream Error: {e}")
+            yield _sse({"text": fallback, "fallback": True})
+        else:
+            if on_complete:
+                await on_complete("".join(chunks))
+        yield _sse({}, event="done")
 
-# Helper to get model
-def get_model(user: models.User):
-    key = user.api_key or os.getenv("GEMINI_API_KEY")
-    if not key:
-        raise HTTPException(status_code=400, detail="Gemini API Key missing")
-    # Using gemini-2.0-flash as 2.5 is not standard, defaulting to latest stable flash
-    return GenAIModelWrapper(key, 'gemini-2.0-flash', json_mode=False)
-
-def get_json_model(user: models.User):
-    key = user.api_key or os.getenv("GEMINI_API_KEY")
-    if not key:
-        raise HTTPException(status_code=400, detail="Gemini API Key missing")
-    return GenAIModelWrapper(key, 'gemini-2.0-flash', json_mode=True)
-
-GOGGINS_PERSONA = """
-You are David Goggins. You are the hardest man alive. 
-Your tone is intense, military, uncompromising, but ultimately supportive of growth through suffering.
-You do not coddle. You do not accept excuses. You demand calloused minds.
-Use phrases like "Stay hard", "Who's gonna carry the boats", "Merry Christmas", "Roger that", "Taking souls".
-"""
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse_stored(text: str) -> StreamingResponse:
+    # Stored content goes out as a single chunk in the same event format
+    async def events():
+        yield _sse({"text": text})
+        yield _sse({}, event="done")
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def _story_fallback(user: models.User) -> str:
+    return f"Stay hard, {user.username}. The AI is offline, but you are not."
 
 @router.post("/story")
-async def generate_story(request: AIStoryRequest, user: models.User = Depends(get_current_user)):
+async def generate_story(request: AIStoryRequest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    # Stories pre-generated overnight (or by an earlier request) are served from Task.story
+    stored = await stored_story(db, user.id, request.task.id)
+    await db.commit()
+    if stored:
+        return {"story": stored}
     try:
         model = get_model(user)
-        prompt = f"""
-        {GOGGINS_PERSONA}
-        User: {user.username}
-        Generate a very short, intense motivational story (max 3 sentences) for a user finding a task.
-        Task: {request.task.description}
-        Difficulty: {request.task.difficulty}
-        Category: {request.task.category}
-        Estimated Time: {request.task.estimated_time} mins.
-        Justification: {request.justification or "None"}
-        Goals: {[g.description for g in request.goals]}
-        
-        The story should be about overcoming the specific resistance of this task.
-        """
-        response = model.generate_content(prompt)
-        return {"story": response.text.strip()}
+        prompt = story_prompt(request, user)
+        text = (await generate_text(model, prompt, "story")).strip()
+        await db.execute(
+            update(models.Task)
+            .where(models.Task.id == request.task.id, models.Task.user_id == user.id, models.Task.story.is_(None))
+            .values(story=text)
+        )
+        await db.commit()
+        return {"story": text}
     except Exception as e:
+        ai_metrics.record_fallback("story", e)
         print(f"AI Error: {e}")
-        return {"story": f"Stay hard, {user.username}. The AI is offline, but you are not."}
+        return {"story": _story_fallback(user)}
+
+@router.post("/story/stream")
+async def stream_story(request: AIStoryRequest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    stored = await stored_story(db, user.id, request.task.id)
+    await db.commit()
+    if stored:
+        return _sse_stored(stored)
+    return _sse_response(user, story_prompt(request, user), "story", _story_fallback(user))
+
+LABEL_FALLBACK = "General"
+# Batch packing: at most this many texts, and roughly this many characters of
+# text, per Gemini call. Keeps each prompt well inside the context window.
+LABEL_BATCH_MAX_ITEMS = 50
+LABEL_BATCH_MAX_CHARS = 20000
+# Gemini calls one batch request may have in flight; the rest wait their turn
+LABEL_BATCH_CONCURRENCY = 4
 
 @router.post("/label")
-async def generate_label(request: AILabelRequest, user: models.User = Depends(get_current_user)):
+async def generate_label(request: AILabelRequest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    # Confident local predictions never reach Gemini
+    local = await label_classifier.classify(db, user.id, request.text)
+    if local:
+        return {"label": local}
     try:
         model = get_model(user)
         prompt = f"""
@@ -103,13 +170,83 @@ async def generate_label(request: AILabelRequest, user: models.User = Depends(ge
         Text: "{request.text}"
         Return ONLY the category name.
         """
-        response = model.generate_content(prompt)
-        return {"label": response.text.strip().replace("'", "").replace('"', '')}
+        text = await generate_text(model, prompt, "label")
+        return {"label": text.strip().replace("'", "").replace('"', '')}
+    except Exception as e:
+        ai_metrics.record_fallback("label", e)
+        return {"label": LABEL_FALLBACK}
+
+def _pack_label_batches(texts: List[str]) -> List[List[int]]:
+    batches, current, chars = [], [], 0
+    for i, text in enumerate(texts):
+        if current and (len(current) >= LABEL_BATCH_MAX_ITEMS or chars + len(text) > LABEL_BATCH_MAX_CHARS):
+            batches.append(current)
+            current, chars = [], 0
+        current.append(i)
+        chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+async def _label_batch(model, texts: List[str], indices: List[int], labels: List[str]) -> dict:
+    start = time.perf_counter()
+    failed = False
+    try:
+        items = "\n".join(json.dumps({"index": i, "text": texts[i]}) for i in indices)
+        prompt = f"""
+        Classify each text into one of these exact categories: {", ".join(f"'{c}'" for c in LABEL_CATEGORIES)}.
+        Texts (one JSON object per line):
+        {items}
+        
+        Return a JSON array with one object per text: {{"index": number, "label": "category name"}}
+        """
+        text = await generate_text(model, prompt, "label-batch")
+        results = json.loads(text)
+        if isinstance(results, dict):
+            # Tolerate the model wrapping the array, e.g. {"labels": [...]}
+            results = next((v for v in results.values() if isinstance(v, list)), [])
+        for item in results:
+            i, label = item.get("index"), item.get("label")
+            if i in indices and label in LABEL_CATEGORIES:
+                labels[i] = label
     except Exception as e:
-        return {"label": "General"}
+        ai_metrics.record_fallback("label-batch", e)
+        print(f"Label Batch Error: {e}")
+        failed = True
+    return {"size": len(indices), "elapsed_ms": (time.perf_counter() - start) * 1000, "failed": failed}
+
+@router.post("/label/batch", response_model=AILabelBatchResponse, response_model_by_alias=True)
+async def generate_label_batch(request: AILabelBatchRequest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    labels = [LABEL_FALLBACK] * len(request.texts)
+    pending = []
+    for i, text in enumerate(request.texts):
+        local = await label_classifier.classify(db, user.id, text)
+        if local:
+            labels[i] = local
+        else:
+            pending.append(i)
+    if not pending:
+        return {"labels": labels, "batches": []}
+    try:
+        model = get_json_model(user)
+    except HTTPException:
+        return {"labels": labels, "batches": []}
+    semaphore = asyncio.Semaphore(LABEL_BATCH_CONCURRENCY)
+
+    async def label(indices):
+        async with semaphore:
+            return await _label_batch(model, request.texts, [pending[j] for j in indices], labels)
+
+    batches = await asyncio.gather(*[label(indices) for indices in _pack_label_batches([request.texts[i] for i in pending])])
+    return {"labels": labels, "batches": batches}
 
 @router.post("/analyze-goal-alignment")
-async def analyze_goal_alignment(request: AIAnalyzeGoalAlignmentRequest, user: models.User = Depends(get_current_user)):
+async def analyze_goal_alignment(request: AIAnalyzeGoalAlignmentRequest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    # Same description against an unchanged goal set is answered from the memo table
+    memo = await alignment_memo.lookup(db, user.id, request.taskDescription, request.activeGoals)
+    await db.commit() # release the connection before the model call
+    if memo:
+        return memo
     try:
         model = get_json_model(user)
         active_goals_str = "\n".join([f"- {g.id}: {g.description}" for g in request.activeGoals]) if request.activeGoals else "No active goals."
@@ -124,9 +261,12 @@ async def analyze_goal_alignment(request: AIAnalyzeGoalAlignmentRequest, user: m
         - justification (Why?)
         - alignedGoalId (The ID of the aligned goal, or null)
         """
-        response = model.generate_content(prompt)
-        return json.loads(response.text)
+        text = await generate_text(model, prompt, "analyze-goal-alignment")
+        result = json.loads(text)
+        await alignment_memo.store(db, user.id, request.taskDescription, request.activeGoals, result)
+        return result
     except Exception as e:
+        ai_metrics.record_fallback("analyze-goal-alignment", e)
         print(f"Err: {e}")
         return {
             "alignmentScore": 5,
@@ -146,9 +286,10 @@ async def reflection_feedback(request: AIReflectionFeedbackRequest, user: models
         
         Give them intense feedback. 1-2 sentences.
         """
-        response = model.generate_content(prompt)
-        return {"feedback": response.text.strip()}
+        text = await generate_text(model, prompt, "reflection-feedback")
+        return {"feedback": text.strip()}
     except Exception as e:
+        ai_metrics.record_fallback("reflection-feedback", e)
         return {"feedback": "Good morning. Get after it. (Offline)"}
 
 @router.post("/diary-feedback")
@@ -168,30 +309,43 @@ async def diary_feedback(request: AIDiaryFeedbackRequest, user: models.User = De
         - feedback (Intense Goggins commentary)
         - grade (A, B, C, D, or F)
         """
-        response = model.generate_content(prompt)
-        return json.loads(response.text)
+        text = await generate_text(model, prompt, "diary-feedback")
+        return json.loads(text)
     except Exception as e:
+        ai_metrics.record_fallback("diary-feedback", e)
         return {"feedback": "Log received. Stay hard.", "grade": "N/A"}
 
-@router.post("/review")
-async def review(request: AIReviewRequest, user: models.User = Depends(get_current_user)):
-    try:
-        model = get_json_model(user)
-        # simplified prompt
-        prompt = f"""
+# The generations that also run as background jobs are split in two: the bare
+# generation raises, so a job records the failure, and the route wraps it with
+# its canned fallback.
+async def _review(request: AIReviewRequest, user: models.User) -> dict:
+    model = get_json_model(user)
+    # reviewData is whatever the client collected; trim it before the goals
+    prompt = (
+        PromptBuilder("review")
+        .add("data", request.reviewData, priority=0)
+        .add("goals", [g.description for g in request.goals], priority=1)
+        .build(f"""
         {GOGGINS_PERSONA}
         Review this performance.
-        Data: {str(request.reviewData)}
-        Goals: {[g.description for g in request.goals]}
-        
+        Data: {{data}}
+        Goals: {{goals}}
+    
         Return JSON:
         - good (List of strings, what they did well)
         - bad (List of strings, where they were weak)
         - suggestions (Object with 'keep', 'remove', 'add' lists of strings)
-        """
-        response = model.generate_content(prompt)
-        return json.loads(response.text)
+        """)
+    )
+    text = await generate_text(model, prompt, "review")
+    return json.loads(text)
+
+@router.post("/review")
+async def review(request: AIReviewRequest, user: models.User = Depends(get_current_user)):
+    try:
+        return await _review(request, user)
     except Exception as e:
+        ai_metrics.record_fallback("review", e)
         return {
             "good": ["You showed up"],
             "bad": ["Data unavailable"],
@@ -211,9 +365,10 @@ async def goal_change_verdict(request: AIGoalChangeVerdictRequest, user: models.
         - approved (boolean)
         - feedback (string, intense criticism or approval)
         """
-        response = model.generate_content(prompt)
-        return json.loads(response.text)
+        text = await generate_text(model, prompt, "goal-change-verdict")
+        return json.loads(text)
     except Exception as e:
+        ai_metrics.record_fallback("goal-change-verdict", e)
         return {"approved": False, "feedback": "System offline. Hold the line."}
 
 @router.post("/goal-completion-verdict")
@@ -230,9 +385,10 @@ async def goal_completion_verdict(request: AIGoalCompletionVerdictRequest, user:
         - approved (boolean)
         - feedback (string)
         """
-        response = model.generate_content(prompt)
-        return json.loads(response.text)
+        text = await generate_text(model, prompt, "goal-completion-verdict")
+        return json.loads(text)
     except Exception as e:
+        ai_metrics.record_fallback("goal-completion-verdict", e)
         return {"approved": True, "feedback": "Logged. (Offline)"}
 
 @router.post("/atomic-system")
@@ -245,9 +401,10 @@ async def atomic_system(request: AIAtomicSystemRequest, user: models.User = Depe
         Accomplishments so far: {str(request.accomplishmentsSummary)}
         Return JSON with 4 keys: obvious, attractive, easy, satisfying (each a list of strings).
         """
-        response = model.generate_content(prompt)
-        return json.loads(response.text)
+        text = await generate_text(model, prompt, "atomic-system")
+        return json.loads(text)
     except Exception as e:
+         ai_metrics.record_fallback("atomic-system", e)
          return {
             "obvious": ["Define the goal clearly"],
             "attractive": ["Visualize success"],
@@ -255,23 +412,35 @@ async def atomic_system(request: AIAtomicSystemRequest, user: models.User = Depe
             "satisfying": ["Track progress"]
         }
 
+WEEKLY_BRIEFING_FALLBACK = "New week. New war. Get after it."
+
+async def _weekly_briefing(request: AIWeeklyBriefingRequest, user: models.User) -> dict:
+    # Opens its own session: this also runs as a background job without a db dependency
+    async with AsyncSessionLocal() as db:
+        stored = await stored_briefing(db, user.id)
+    if stored:
+        return {"briefing": stored}
+    model = get_model(user)
+    prompt = weekly_briefing_prompt(request, user)
+    text = (await generate_text(model, prompt, "weekly-briefing")).strip()
+    await store_briefing(user.id, briefing_week(datetime.date.today()), text)
+    return {"briefing": text}
+
 @router.post("/weekly-briefing")
 async def weekly_briefing(request: AIWeeklyBriefingRequest, user: models.User = Depends(get_current_user)):
     try:
-        model = get_model(user)
-        prompt = f"""
-        {GOGGINS_PERSONA}
-        Write a weekly briefing for {user.username}.
-        Prev Week Evals: {str(request.previousWeekEvaluations)}
-        Next Week Goals: {[g.description for g in request.nextWeekGoals]}
-        Long Term Goals: {[g.description for g in request.longTermGoals]}
-        
-        Keep it short, brutal, and directive.
-        """
-        response = model.generate_content(prompt)
-        return {"briefing": response.text.strip()}
+        return await _weekly_briefing(request, user)
     except Exception as e:
-        return {"briefing": "New week. New war. Get after it."}
+        ai_metrics.record_fallback("weekly-briefing", e)
+        return {"briefing": WEEKLY_BRIEFING_FALLBACK}
+
+@router.post("/weekly-briefing/stream")
+async def stream_weekly_briefing(request: AIWeeklyBriefingRequest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    stored = await stored_briefing(db, user.id)
+    await db.commit()
+    if stored:
+        return _sse_stored(stored)
+    return _sse_response(user, weekly_briefing_prompt(request, user), "weekly-briefing", WEEKLY_BRIEFING_FALLBACK)
 
 @router.post("/enhance-text")
 async def enhance_text(request: AIEnhanceTextRequest, user: models.User = Depends(get_current_user)):
@@ -283,38 +452,120 @@ async def enhance_text(request: AIEnhanceTextRequest, user: models.User = Depend
         Text: "{request.text}"
         Type: {request.type}
         """
-        response = model.generate_content(prompt)
-        return {"enhanced_text": response.text.strip()}
+        text = await generate_text(model, prompt, "enhance-text")
+        return {"enhanced_text": text.strip()}
     except Exception as e:
+         ai_metrics.record_fallback("enhance-text", e)
          return {"enhanced_text": request.text}
 
+def _chat_conversation(request: AIChatRequest, user: models.User) -> str:
+    conversation = f"{GOGGINS_PERSONA}\nUser: {user.username}\n"
+    for msg in request.messages[-10:]: # limit context
+        role = "User" if msg.get("sender") == "user" else "David Goggins"
+        conversation += f"{role}: {msg.get('content')}\n"
+    
+    conversation += "David Goggins:"
+    return conversation
+
+CHAT_FALLBACK = "Radio silence. (Offline)"
+
 @router.post("/chat")
 async def chat(request: AIChatRequest, user: models.User = Depends(get_current_user)):
     try:
         model = get_model(user)
-        conversation = f"{GOGGINS_PERSONA}\nUser: {user.username}\n"
-        for msg in request.messages[-10:]: # limit context
-            role = "User" if msg.get("sender") == "user" else "David Goggins"
-            conversation += f"{role}: {msg.get('content')}\n"
-        
-        conversation += "David Goggins:"
-        
-        response = model.generate_content(conversation)
-        return {"response": response.text.strip()}
+        conversation = _chat_conversation(request, user)
+        text = await generate_text(model, conversation, "chat")
+        return {"response": text.strip()}
     except Exception as e:
-        return {"response": "Radio silence. (Offline)"}
+        ai_metrics.record_fallback("chat", e)
+        return {"response": CHAT_FALLBACK}
 
-# --- NEW ENDPOINTS ---
+@router.post("/chat/stream")
+async def stream_chat(request: AIChatRequest, user: models.User = Depends(get_current_user)):
+    return _sse_response(user, _chat_conversation(request, user), "chat", CHAT_FALLBACK)
 
-@router.post("/contract")
-async def generate_contract(request: AIGoalContractRequest, user: models.User = Depends(get_current_user)):
+# --- Chat Sessions ---
+# History lives server-side: each turn uploads only the new message, and the prompt
+# is the rolling summary plus a bounded window of recent messages.
+async def _get_chat_session(db: AsyncSession, id: str, user: models.User) -> models.ChatSession:
+    result = await db.execute(select(models.ChatSession).where(models.ChatSession.id == id, models.ChatSession.user_id == user.id))
+    session = result.scalars().first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return session
+
+async def _chat_session_turn(db: AsyncSession, id: str, user: models.User, content: str):
+    # Stores the user's message and returns the prompt plus how many messages are unsummarized
+    session = await _get_chat_session(db, id, user)
+    await append_message(db, session, "user", content)
+    await db.commit()
+    messages = await unsummarized_messages(db, session, limit=CHAT_WINDOW + CHAT_SUMMARY_BATCH)
+    prompt = build_prompt(GOGGINS_PERSONA, user, session, messages)
+    await db.commit() # release the connection before the model call
+    return session, prompt
+
+async def _save_chat_reply(db: AsyncSession, session: models.ChatSession, text: str):
+    await append_message(db, session, "ai", text)
+    await db.commit()
+    pending = await unsummarized_messages(db, session, limit=CHAT_WINDOW + CHAT_SUMMARY_BATCH)
+    await db.commit()
+    if chat_summarizer.needs_summary(len(pending)):
+        chat_summarizer.schedule(session.id)
+
+@router.post("/chat/sessions", response_model=ChatSession)
+async def create_chat_session(db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    session = models.ChatSession(user_id=user.id, summarized_through=0)
+    db.add(session)
+    await db.commit()
+    await db.refresh(session)
+    return ChatSession(id=session.id, created_at=session.created_at)
+
+@router.get("/chat/sessions/{id}", response_model=ChatSession)
+async def get_chat_session(id: str, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    session = await _get_chat_session(db, id, user)
+    result = await db.execute(
+        select(models.ChatMessage).where(models.ChatMessage.session_id == session.id).order_by(models.ChatMessage.seq)
+    )
+    return ChatSession(
+        id=session.id,
+        summary=session.summary,
+        summarized_through=session.summarized_through,
+        messages=[ChatMessageSchema.model_validate(m) for m in result.scalars().all()],
+        created_at=session.created_at
+    )
+
+@router.post("/chat/sessions/{id}/messages")
+async def chat_session_message(id: str, request: AIChatMessageRequest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    session, prompt = await _chat_session_turn(db, id, user, request.content)
     try:
-        model = get_json_model(user)
-        prompt = f"""
+        text = (await generate_text(get_model(user), prompt, "chat")).strip()
+    except Exception as e:
+        ai_metrics.record_fallback("chat", e)
+        # The user's message is kept; the fallback isn't saved as part of the conversation
+        return {"response": CHAT_FALLBACK}
+    await _save_chat_reply(db, session, text)
+    return {"response": text}
+
+@router.post("/chat/sessions/{id}/messages/stream")
+async def stream_chat_session_message(id: str, request: AIChatMessageRequest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    session, prompt = await _chat_session_turn(db, id, user, request.content)
+
+    async def save(text: str):
+        # The request's db session is closed once the response starts streaming
+        async with AsyncSessionLocal() as reply_db:
+            await _save_chat_reply(reply_db, session, text.strip())
+
+    return _sse_response(user, prompt, "chat", CHAT_FALLBACK, on_complete=save)
+
+# --- NEW ENDPOINTS ---
+
+async def _contract(request: AIGoalContractRequest, user: models.User) -> dict:
+    model = get_json_model(user)
+    prompt = f"""
         {GOGGINS_PERSONA}
         Generate a binding Goal Contract for: "{request.description}".
         Type: {request.type}
-        
+    
         Return JSON matching this schema:
         {{
             "primaryObjective": "string",
@@ -325,9 +576,15 @@ async def generate_contract(request: AIGoalContractRequest, user: models.User =
             "fiveWhys": ["string", "string", "string", "string", "string"]
         }}
         """
-        response = model.generate_content(prompt)
-        return json.loads(response.text)
+    text = await generate_text(model, prompt, "contract")
+    return json.loads(text)
+
+@router.post("/contract")
+async def generate_contract(request: AIGoalContractRequest, user: models.User = Depends(get_current_user)):
+    try:
+        return await _contract(request, user)
     except Exception as e:
+        ai_metrics.record_fallback("contract", e)
         print(f"Contract Error: {e}")
         return {
             "primaryObjective": request.description,
@@ -338,43 +595,98 @@ async def generate_contract(request: AIGoalContractRequest, user: models.User =
             "fiveWhys": ["Stub"] * 5
         }
 
+def _odds_rationale(request: AIBettingOddsRequest, odds) -> str:
+    if not odds.sample_size:
+        return f"No record on {request.difficulty.value} {request.category} tasks yet. {odds.multiplier}x. Prove it."
+    return f"You finish {round(odds.probability * 100)}% of tasks like this ({odds.sample_size} on record). {odds.multiplier}x. Stay hard."
+
+def _odds_response(odds, rationale: str) -> dict:
+    return {
+        "multiplier": odds.multiplier,
+        "rationale": rationale,
+        "probability": round(odds.probability, 3),
+        "sampleSize": odds.sample_size,
+    }
+
 @router.post("/betting-odds")
-async def generate_betting_odds(request: AIBettingOddsRequest, user: models.User = Depends(get_current_user)):
-    try:
-        model = get_json_model(user)
-        prompt = f"""
+async def generate_betting_odds(request: AIBettingOddsRequest, ai_rationale: bool = False, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    # Odds come from the user's own completion history, no model call. With
+    # ai_rationale=true a background job also writes a Goggins-style rationale;
+    # poll GET /ai/jobs/{rationaleJobId} for it.
+    odds = await betting_stats.odds(db, user.id, request.difficulty, request.category, request.estimated_time)
+    response = _odds_response(odds, _odds_rationale(request, odds))
+    if ai_rationale:
+        job = await job_queue.submit(db, user, "betting-rationale", request)
+        response["rationaleJobId"] = job.id
+    return response
+
+async def _betting_rationale(request: AIBettingOddsRequest, user: models.User) -> dict:
+    # Only runs as a job; on failure the client keeps the plain rationale it already has
+    async with AsyncSessionLocal() as db:
+        odds = await betting_stats.odds(db, user.id, request.difficulty, request.category, request.estimated_time)
+    model = get_json_model(user)
+    prompt = f"""
         {GOGGINS_PERSONA}
-        Calculate betting odds for this task:
+        The user is betting on finishing this task:
         Description: {request.description}
         Difficulty: {request.difficulty}
         Category: {request.category}
         Estimated Time: {request.estimated_time} mins
         Context: {str(request.context)}
-        
+
+        Their record on similar tasks: {round(odds.probability * 100)}% completion over {odds.sample_size} tasks.
+        The odds are fixed at {odds.multiplier}x. Do not change them.
+
         Return JSON:
-        - multiplier (float, usually 1.5 to 5.0 depending on risk)
-        - rationale (string, why these odds?)
+        - rationale (string, 1-2 sentences on why these odds fit this user)
         """
-        response = model.generate_content(prompt)
-        return json.loads(response.text)
-    except Exception as e:
-        return {"multiplier": 2.0, "rationale": "Standard risk. Get after it."}
+    text = await generate_text(model, prompt, "betting-odds")
+    return _odds_response(odds, json.loads(text)["rationale"])
+
+async def _evaluate_weekly(request: AIWeeklyGoalEvaluationRequest, user: models.User) -> dict:
+    model = get_json_model(user)
+    prompt = weekly_evaluation_prompt(request.description, request.completed_tasks, request.purchased_rewards)
+    text = await generate_text(model, prompt, "evaluate-weekly")
+    return json.loads(text)
 
 @router.post("/evaluate-weekly")
 async def evaluate_weekly(request: AIWeeklyGoalEvaluationRequest, user: models.User = Depends(get_current_user)):
     try:
-        model = get_json_model(user)
-        prompt = f"""
-        {GOGGINS_PERSONA}
-        Evaluate this weekly goal: "{request.description}"
-        Completed tasks: {str(request.completed_tasks)}
-        Rewards purchased: {str(request.purchased_rewards)}
-        
-        Return JSON:
-        - alignmentScore (float 1-10)
-        - feedback (string, brutal honesty)
-        """
-        response = model.generate_content(prompt)
-        return json.loads(response.text)
+        return await _evaluate_weekly(request, user)
     except Exception as e:
+        ai_metrics.record_fallback("evaluate-weekly", e)
         return {"alignmentScore": 5, "feedback": "Evaluation offline. Keep grinding."}
+
+# --- Background Jobs ---
+# Long generations can be submitted as jobs: the POST returns a job id right away
+# and the result is persisted for GET /ai/jobs/{id}, even if the client disconnects.
+# A generation that fails marks the job failed rather than storing a fallback.
+job_queue.register("review", AIReviewRequest, _review)
+job_queue.register("evaluate-weekly", AIWeeklyGoalEvaluationRequest, _evaluate_weekly)
+job_queue.register("weekly-briefing", AIWeeklyBriefingRequest, _weekly_briefing)
+job_queue.register("contract", AIGoalContractRequest, _contract)
+job_queue.register("betting-rationale", AIBettingOddsRequest, _betting_rationale)
+
+@router.post("/jobs/review", response_model=AIJob, status_code=202)
+async def submit_review_job(request: AIReviewRequest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    return await job_queue.submit(db, user, "review", request)
+
+@router.post("/jobs/evaluate-weekly", response_model=AIJob, status_code=202)
+async def submit_evaluate_weekly_job(request: AIWeeklyGoalEvaluationRequest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    return await job_queue.submit(db, user, "evaluate-weekly", request)
+
+@router.post("/jobs/weekly-briefing", response_model=AIJob, status_code=202)
+async def submit_weekly_briefing_job(request: AIWeeklyBriefingRequest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    return await job_queue.submit(db, user, "weekly-briefing", request)
+
+@router.post("/jobs/contract", response_model=AIJob, status_code=202)
+async def submit_contract_job(request: AIGoalContractRequest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    return await job_queue.submit(db, user, "contract", request)
+
+@router.get("/jobs/{id}", response_model=AIJob)
+async def get_job(id: str, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    result = await db.execute(select(models.AIJob).where(models.AIJob.id == id, models.AIJob.user_id == user.id))
+    job = result.scalars().first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
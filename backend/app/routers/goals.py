@@ -1,18 +1,20 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from typing import List, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app import schemas, models
 from app.database import get_db
 from app.dependencies import get_current_user
+from app.alignment_memo import alignment_memo
+from app.pagination import PageParams, list_response
 
 router = APIRouter(tags=["Goals"])
 
 # --- Goals ---
-@router.get("/goals", response_model=List[schemas.Goal])
-async def get_goals(db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
-    result = await db.execute(select(models.Goal).where(models.Goal.user_id == user.id))
-    return result.scalars().all()
+@router.get("/goals", response_model=Union[List[schemas.Goal], schemas.Page[schemas.Goal]])
+async def get_goals(page: PageParams = Depends(), db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    query = select(models.Goal).where(models.Goal.user_id == user.id)
+    return await list_response(db, query, (models.Goal.id,), page, schemas.Goal)
 
 @router.post("/goals", response_model=schemas.Goal, status_code=201)
 async def create_goal(goal: schemas.Goal, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
@@ -33,6 +35,8 @@ async def update_goal(id: str, goal: schemas.Goal, db: AsyncSession = Depends(ge
     goal_data = goal.model_dump(exclude_unset=True)
     for key, value in goal_data.items():
         setattr(db_goal, key, value)
+    # Edits and completions change what tasks align with
+    await alignment_memo.invalidate(db, user.id)
         
     await db.commit()
     await db.refresh(db_goal)
@@ -44,14 +48,15 @@ async def delete_goal(id: str, db: AsyncSession = Depends(get_db), user: models.
     db_goal = result.scalars().first()
     if db_goal:
         await db.delete(db_goal)
+        await alignment_memo.invalidate(db, user.id)
         await db.commit()
     return
 
 # --- Weekly Goals ---
-@router.get("/weekly-goals", response_model=List[schemas.WeeklyGoal])
-async def get_weekly_goals(db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
-    result = await db.execute(select(models.WeeklyGoal).where(models.WeeklyGoal.user_id == user.id))
-    return result.scalars().all()
+@router.get("/weekly-goals", response_model=Union[List[schemas.WeeklyGoal], schemas.Page[schemas.WeeklyGoal]])
+async def get_weekly_goals(page: PageParams = Depends(), db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    query = select(models.WeeklyGoal).where(models.WeeklyGoal.user_id == user.id)
+    return await list_response(db, query, (models.WeeklyGoal.target_date, models.WeeklyGoal.id), page, schemas.WeeklyGoal)
 
 @router.post("/weekly-goals", response_model=schemas.WeeklyGoal, status_code=201)
 async def create_weekly_goal(goal: schemas.WeeklyGoal, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
@@ -72,6 +77,8 @@ async def update_weekly_goal(id: str, goal: schemas.WeeklyGoal, db: AsyncSession
     goal_data = goal.model_dump(exclude_unset=True)
     for key, value in goal_data.items():
         setattr(db_goal, key, value)
+    # Edits and completions change what tasks align with
+    await alignment_memo.invalidate(db, user.id)
         
     await db.commit()
     await db.refresh(db_goal)
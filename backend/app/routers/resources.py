@@ -1,18 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends, Header
-from typing import List
+from typing import List, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app import schemas, models
 from app.database import get_db
 from app.dependencies import get_current_user
+from app.pagination import PageParams, list_response
 
 router = APIRouter(tags=["Resources"])
 
 # --- Rewards ---
-@router.get("/rewards", response_model=List[schemas.Reward])
-async def get_rewards(db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
-    result = await db.execute(select(models.Reward).where(models.Reward.user_id == user.id))
-    return result.scalars().all()
+@router.get("/rewards", response_model=Union[List[schemas.Reward], schemas.Page[schemas.Reward]])
+async def get_rewards(page: PageParams = Depends(), db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    query = select(models.Reward).where(models.Reward.user_id == user.id)
+    return await list_response(db, query, (models.Reward.id,), page, schemas.Reward)
 
 @router.post("/rewards", response_model=schemas.Reward, status_code=201)
 async def create_reward(reward: schemas.Reward, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
@@ -31,10 +32,11 @@ async def delete_reward(id: str, db: AsyncSession = Depends(get_db), user: model
         await db.commit()
 
 # --- Purchased Rewards ---
-@router.get("/purchased-rewards", response_model=List[schemas.PurchasedReward])
-async def get_purchased_rewards(db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
-    result = await db.execute(select(models.PurchasedReward).where(models.PurchasedReward.user_id == user.id))
-    return result.scalars().all()
+@router.get("/purchased-rewards", response_model=Union[List[schemas.PurchasedReward], schemas.Page[schemas.PurchasedReward]])
+async def get_purchased_rewards(page: PageParams = Depends(), db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    query = select(models.PurchasedReward).where(models.PurchasedReward.user_id == user.id)
+    keys = (models.PurchasedReward.purchase_date, models.PurchasedReward.id)
+    return await list_response(db, query, keys, page, schemas.PurchasedReward)
 
 @router.post("/purchased-rewards", response_model=schemas.PurchasedReward, status_code=201)
 async def create_purchased_reward(reward: schemas.PurchasedReward, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
@@ -45,10 +47,19 @@ async def create_purchased_reward(reward: schemas.PurchasedReward, db: AsyncSess
     return db_reward
 
 # --- Diary Entries ---
-@router.get("/diary-entries", response_model=List[schemas.DiaryEntry])
-async def get_diary_entries(db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
-    result = await db.execute(select(models.DiaryEntry).where(models.DiaryEntry.user_id == user.id))
-    return result.scalars().all()
+@router.get("/diary-entries", response_model=Union[List[schemas.DiaryEntry], schemas.Page[schemas.DiaryEntry]])
+async def get_diary_entries(
+    start_date: schemas.QueryDate = None,
+    end_date: schemas.QueryDate = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    # One entry per user and date, so the date alone is the key
+    query = select(models.DiaryEntry).where(models.DiaryEntry.user_id == user.id)
+    if start_date and end_date:
+        query = query.where(models.DiaryEntry.date >= start_date, models.DiaryEntry.date <= end_date)
+    return await list_response(db, query, (models.DiaryEntry.date,), page, schemas.DiaryEntry)
 
 @router.post("/diary-entries", response_model=schemas.DiaryEntry, status_code=201)
 async def create_diary_entry(entry: schemas.DiaryEntry, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
@@ -71,7 +82,7 @@ async def create_diary_entry(entry: schemas.DiaryEntry, db: AsyncSession = Depen
     return db_entry
 
 @router.put("/diary-entries/{date}", response_model=schemas.DiaryEntry)
-async def update_diary_entry(date: str, entry: schemas.DiaryEntry, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+async def update_diary_entry(date: schemas.ISODate, entry: schemas.DiaryEntry, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
     result = await db.execute(select(models.DiaryEntry).where(models.DiaryEntry.date == date, models.DiaryEntry.user_id == user.id))
     db_entry = result.scalars().first()
     
@@ -1,28 +1,56 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List, Optional
+from typing import List, Optional, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
 from app import schemas, models
 from app.database import get_db
 from app.dependencies import get_current_user
+from app.label_classifier import label_classifier
+from app.betting_odds import betting_stats, recurring_key
+from app.recurring_completions import (
+    load_completions, completion_history, upsert_completion, sync_completions, completion_histories, sync_completions_many
+)
+from app import side_quest_counts
+from app.rollups import PERIODS, task_rollup, completion_summary
+from app.pagination import PageParams, list_response
+from app import bulk
 
 router = APIRouter(tags=["Tasks"])
 
 # --- Tasks ---
-@router.get("/tasks", response_model=List[schemas.Task])
+@router.get("/tasks", response_model=Union[List[schemas.Task], schemas.Page[schemas.Task]])
 async def get_tasks(
-    start_date: Optional[str] = None, 
-    end_date: Optional[str] = None, 
+    start_date: schemas.QueryDate = None, 
+    end_date: schemas.QueryDate = None, 
+    page: PageParams = Depends(),
     db: AsyncSession = Depends(get_db),
     user: models.User = Depends(get_current_user)
 ):
     query = select(models.Task).where(models.Task.user_id == user.id)
     if start_date and end_date:
         query = query.where(models.Task.date >= start_date, models.Task.date <= end_date)
-    
-    result = await db.execute(query)
-    tasks = result.scalars().all()
-    return tasks
+    return await list_response(db, query, (models.Task.date, models.Task.id), page, schemas.Task)
+
+@router.get("/tasks/rollup", response_model=List[schemas.TaskRollup])
+async def get_task_rollup(
+    period: str = "week",
+    start_date: schemas.QueryDate = None,
+    end_date: schemas.QueryDate = None,
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    if period not in PERIODS:
+        raise HTTPException(status_code=422, detail=f"period must be one of {', '.join(PERIODS)}")
+    return await task_rollup(db, user.id, period, start_date, end_date)
+
+@router.get("/tasks/summary", response_model=List[schemas.CompletionSummary])
+async def get_completion_summary(
+    before: schemas.ISODate,
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    # Clients load a window of recent days in full and score older days from this
+    return await completion_summary(db, user.id, before)
 
 @router.post("/tasks", response_model=schemas.Task, status_code=201)
 async def create_task(task: schemas.Task, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
@@ -32,6 +60,8 @@ async def create_task(task: schemas.Task, db: AsyncSession = Depends(get_db), us
     db.add(db_task)
     await db.commit()
     await db.refresh(db_task)
+    label_classifier.learn(user.id, db_task.description, db_task.category)
+    betting_stats.replace(user.id, [], betting_stats.task_outcomes(db_task))
     return db_task
 
 @router.put("/tasks/{id}", response_model=schemas.Task)
@@ -42,6 +72,8 @@ async def update_task(id: str, task: schemas.Task, db: AsyncSession = Depends(ge
     if not db_task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    previous_label = (db_task.description, db_task.category)
+    previous_outcomes = betting_stats.task_outcomes(db_task)
     # Update fields
     task_data = task.model_dump(exclude_unset=True)
     for key, value in task_data.items():
@@ -50,6 +82,10 @@ async def update_task(id: str, task: schemas.Task, db: AsyncSession = Depends(ge
     
     await db.commit()
     await db.refresh(db_task)
+    if previous_label != (db_task.description, db_task.category):
+        label_classifier.forget(user.id, *previous_label)
+        label_classifier.learn(user.id, db_task.description, db_task.category)
+    betting_stats.replace(user.id, previous_outcomes, betting_stats.task_outcomes(db_task))
     return db_task
 
 @router.delete("/tasks/{id}", status_code=204)
@@ -59,52 +95,213 @@ async def delete_task(id: str, db: AsyncSession = Depends(get_db), user: models.
     if db_task:
         await db.delete(db_task)
         await db.commit()
+        label_classifier.forget(user.id, db_task.description, db_task.category)
+        betting_stats.replace(user.id, betting_stats.task_outcomes(db_task), [])
     return
 
+@router.post("/tasks/bulk", response_model=schemas.BulkResponse)
+async def bulk_tasks(request: schemas.BulkRequest[schemas.Task], db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    outcome = await bulk.apply(db, models.Task, user.id, request.upserts, request.deletes)
+    await db.commit()
+    for id in outcome.created + outcome.updated + outcome.deleted:
+        before, after = outcome.before.get(id), outcome.after.get(id)
+        labels = [(row.description, row.category) if row else None for row in (before, after)]
+        if labels[0] != labels[1]:
+            if before:
+                label_classifier.forget(user.id, *labels[0])
+            if after:
+                label_classifier.learn(user.id, *labels[1])
+        betting_stats.replace(
+            user.id,
+            betting_stats.task_outcomes(before) if before else [],
+            betting_stats.task_outcomes(after) if after else [],
+        )
+    return {"results": outcome.results}
+
 # --- Recurring Tasks ---
-@router.get("/recurring-tasks", response_model=List[schemas.RecurringTask])
-async def get_recurring_tasks(db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
-    result = await db.execute(select(models.RecurringTask).where(models.RecurringTask.user_id == user.id))
-    return result.scalars().all() 
+# Completions are stored per occurrence in recurring_completions; the
+# `completions` map on RecurringTask is assembled from those rows.
+async def _get_recurring_task(db: AsyncSession, id: str, user: models.User) -> models.RecurringTask:
+    result = await db.execute(select(models.RecurringTask).where(models.RecurringTask.id == id, models.RecurringTask.user_id == user.id))
+    db_task = result.scalars().first()
+    if not db_task:
+        raise HTTPException(status_code=404, detail="Recurring Task not found")
+    return db_task
+
+def _recurring_response(db_task: models.RecurringTask, completions: dict) -> schemas.RecurringTask:
+    return schemas.RecurringTask.model_validate(db_task).model_copy(update={"completions": completions})
+
+@router.get("/recurring-tasks", response_model=Union[List[schemas.RecurringTask], schemas.Page[schemas.RecurringTask]])
+async def get_recurring_tasks(
+    start_date: schemas.QueryDate = None,
+    end_date: schemas.QueryDate = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    # With a date range only the completions inside it are returned
+    async def build(db, rows):
+        completions = await load_completions(db, user.id, start_date, end_date, task_ids=[t.id for t in rows])
+        return [_recurring_response(t, completions.get(t.id, {})) for t in rows]
+
+    query = select(models.RecurringTask).where(models.RecurringTask.user_id == user.id)
+    return await list_response(db, query, (models.RecurringTask.id,), page, schemas.RecurringTask, build)
 
 @router.post("/recurring-tasks", response_model=schemas.RecurringTask, status_code=201)
 async def create_recurring_task(task: schemas.RecurringTask, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
-    db_task = models.RecurringTask(**task.model_dump(), user_id=user.id)
+    db_task = models.RecurringTask(**task.model_dump(exclude={"completions"}), user_id=user.id)
     db.add(db_task)
+    await db.flush()
+    _, after = await sync_completions(db, db_task, task.completions)
     await db.commit()
-    await db.refresh(db_task)
-    return db_task
+    betting_stats.replace(user.id, [], betting_stats.recurring_outcomes(recurring_key(db_task), after))
+    completions = await load_completions(db, user.id, task_id=db_task.id)
+    return _recurring_response(db_task, completions.get(db_task.id, {}))
 
 @router.put("/recurring-tasks/{id}", response_model=schemas.RecurringTask)
 async def update_recurring_task(id: str, task: schemas.RecurringTask, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
-    result = await db.execute(select(models.RecurringTask).where(models.RecurringTask.id == id, models.RecurringTask.user_id == user.id))
-    db_task = result.scalars().first()
-    
-    if not db_task:
-        raise HTTPException(status_code=404, detail="Recurring Task not found")
-    
+    db_task = await _get_recurring_task(db, id, user)
+
+    previous_key = recurring_key(db_task)
     task_data = task.model_dump(exclude_unset=True)
+    # Older clients send the whole completions map; it is applied as a patch and
+    # only changed dates are written (see schemas.RecurringTask.completions)
+    completions = task_data.pop("completions", None)
     for key, value in task_data.items():
         if hasattr(db_task, key):
             setattr(db_task, key, value)
-        
+
+    key_changed = previous_key != recurring_key(db_task)
+    history = await completion_history(db, db_task.id) if key_changed else None
+    before, after = await sync_completions(db, db_task, completions)
     await db.commit()
-    await db.refresh(db_task)
-    return db_task
 
-# --- Side Quests ---
-@router.get("/side-quests", response_model=List[schemas.SideQuest])
-async def get_side_quests(db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
-    result = await db.execute(select(models.SideQuest).where(models.SideQuest.user_id == user.id))
+    if key_changed:
+        # Every occurrence moves to a different odds group
+        current = dict(history)
+        for date, _ in before:
+            current.pop(date, None) # deleted unless also in after
+        current.update(after)
+        before, after = history, list(current.items())
+    betting_stats.replace(
+        user.id,
+        betting_stats.recurring_outcomes(previous_key, before),
+        betting_stats.recurring_outcomes(recurring_key(db_task), after),
+    )
+    completions = await load_completions(db, user.id, task_id=db_task.id)
+    return _recurring_response(db_task, completions.get(db_task.id, {}))
+
+@router.get("/recurring-tasks/{id}/completions", response_model=List[schemas.RecurringCompletion])
+async def get_recurring_completions(
+    id: str,
+    start_date: schemas.QueryDate = None,
+    end_date: schemas.QueryDate = None,
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    await _get_recurring_task(db, id, user)
+    query = select(models.RecurringCompletion).where(models.RecurringCompletion.recurring_task_id == id)
+    if start_date and end_date:
+        query = query.where(models.RecurringCompletion.date >= start_date, models.RecurringCompletion.date <= end_date)
+    result = await db.execute(query.order_by(models.RecurringCompletion.date))
     return result.scalars().all()
 
+@router.get("/recurring-tasks/{id}/completions/{date}", response_model=schemas.RecurringCompletion)
+async def get_recurring_completion(id: str, date: schemas.ISODate, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    await _get_recurring_task(db, id, user)
+    row = await db.get(models.RecurringCompletion, (id, date))
+    if not row:
+        raise HTTPException(status_code=404, detail="Completion not found")
+    return row
+
+@router.put("/recurring-tasks/{id}/completions/{date}", response_model=schemas.RecurringCompletion)
+async def upsert_recurring_completion(
+    id: str,
+    date: schemas.ISODate,
+    completion: schemas.RecurringCompletion,
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    # Writes one row, whatever the size of the task's history
+    db_task = await _get_recurring_task(db, id, user)
+    previous, row = await upsert_completion(db, db_task, date, completion.model_dump(exclude_unset=True, exclude={"date"}))
+    await db.commit()
+    key = recurring_key(db_task)
+    betting_stats.replace(
+        user.id,
+        betting_stats.recurring_outcomes(key, [previous] if previous else []),
+        betting_stats.recurring_outcomes(key, [(row.date, bool(row.completed))]),
+    )
+    return row
+
+@router.post("/recurring-tasks/bulk", response_model=schemas.BulkResponse)
+async def bulk_recurring_tasks(
+    request: schemas.BulkRequest[schemas.RecurringTask],
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    # An upsert's completions map is partial: only the dates it contains are written
+    deleted_history = await completion_histories(db, user.id, request.deletes)
+    outcome = await bulk.apply(db, models.RecurringTask, user.id, request.upserts, request.deletes,
+                               exclude={"completions"}, children=(models.RecurringCompletion.recurring_task_id,))
+    moved = [id for id in outcome.updated if recurring_key(outcome.before[id]) != recurring_key(outcome.after[id])]
+    moved_history = await completion_histories(db, user.id, moved)
+    written = set(outcome.created + outcome.updated)
+    changes = await sync_completions_many(
+        db, user.id, {t.id: t.completions for t in request.upserts if t.id in written and t.completions}
+    )
+    await db.commit()
+
+    for id in outcome.created + outcome.updated:
+        before, after = changes.get(id, ([], []))
+        if id in moved:
+            # Every occurrence moves to a different odds group
+            current = dict(moved_history.get(id, []))
+            for date, _ in before:
+                current.pop(date, None) # deleted unless also in after
+            current.update(after)
+            before, after = moved_history.get(id, []), list(current.items())
+        previous = outcome.before.get(id)
+        betting_stats.replace(
+            user.id,
+            betting_stats.recurring_outcomes(recurring_key(previous), before) if previous else [],
+            betting_stats.recurring_outcomes(recurring_key(outcome.after[id]), after),
+        )
+    for id in outcome.deleted:
+        betting_stats.replace(
+            user.id, betting_stats.recurring_outcomes(recurring_key(outcome.before[id]), deleted_history.get(id, [])), []
+        )
+    return {"results": outcome.results}
+
+# --- Side Quests ---
+# Per-day counts are stored in side_quest_completions; the `completions` map on
+# SideQuest is assembled from those rows.
+def _side_quest_response(db_quest: models.SideQuest, completions: dict) -> schemas.SideQuest:
+    return schemas.SideQuest.model_validate(db_quest).model_copy(update={"completions": completions})
+
+@router.get("/side-quests", response_model=Union[List[schemas.SideQuest], schemas.Page[schemas.SideQuest]])
+async def get_side_quests(
+    start_date: schemas.QueryDate = None,
+    end_date: schemas.QueryDate = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    async def build(db, rows):
+        counts = await side_quest_counts.load_counts(db, user.id, start_date, end_date, quest_ids=[q.id for q in rows])
+        return [_side_quest_response(q, counts.get(q.id, {})) for q in rows]
+
+    query = select(models.SideQuest).where(models.SideQuest.user_id == user.id)
+    return await list_response(db, query, (models.SideQuest.id,), page, schemas.SideQuest, build)
+
 @router.post("/side-quests", response_model=schemas.SideQuest, status_code=201)
 async def create_side_quest(quest: schemas.SideQuest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
-    db_quest = models.SideQuest(**quest.model_dump(), user_id=user.id)
+    db_quest = models.SideQuest(**quest.model_dump(exclude={"completions"}), user_id=user.id)
     db.add(db_quest)
+    await db.flush()
+    await side_quest_counts.sync_counts(db, db_quest, quest.completions)
     await db.commit()
-    await db.refresh(db_quest)
-    return db_quest
+    return _side_quest_response(db_quest, dict(quest.completions))
 
 @router.put("/side-quests/{id}", response_model=schemas.SideQuest)
 async def update_side_quest(id: str, quest: schemas.SideQuest, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
@@ -114,37 +311,76 @@ async def update_side_quest(id: str, quest: schemas.SideQuest, db: AsyncSession
     if not db_quest:
         raise HTTPException(status_code=404, detail="Side Quest not found")
         
-    quest_data = quest.model_dump(exclude_unset=True)
+    # Counts only change through the atomic increment route: a completions map
+    # sent here is ignored, so a client's stale copy can't overwrite newer taps
+    quest_data = quest.model_dump(exclude_unset=True, exclude={"completions"})
     for key, value in quest_data.items():
         if hasattr(db_quest, key):
              setattr(db_quest, key, value)
-        
-    try:
-        await db.commit()
-        await db.refresh(db_quest)
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"ERROR committing side quest update: {e}")
-        await db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+    await db.commit()
     
-    return db_quest
+    counts = await side_quest_counts.load_counts(db, user.id, quest_id=db_quest.id)
+    return _side_quest_response(db_quest, counts.get(db_quest.id, {}))
 
 @router.delete("/side-quests/{id}", status_code=204)
 async def delete_side_quest(id: str, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
     result = await db.execute(select(models.SideQuest).where(models.SideQuest.id == id, models.SideQuest.user_id == user.id))
     db_quest = result.scalars().first()
     if db_quest:
+        # SQLite doesn't enforce the ON DELETE CASCADE without foreign_keys=ON
+        await db.execute(delete(models.SideQuestCompletion).where(models.SideQuestCompletion.side_quest_id == id))
         await db.delete(db_quest)
         await db.commit()
     return
 
+@router.post("/side-quests/bulk", response_model=schemas.BulkResponse)
+async def bulk_side_quests(request: schemas.BulkRequest[schemas.SideQuest], db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    outcome = await bulk.apply(db, models.SideQuest, user.id, request.upserts, request.deletes,
+                               exclude={"completions"}, children=(models.SideQuestCompletion.side_quest_id,))
+    # As on PUT, completions only seed new quests; existing counts change by increment
+    created = set(outcome.created)
+    await side_quest_counts.sync_counts_many(
+        db, user.id, {q.id: q.completions for q in request.upserts if q.id in created and q.completions}
+    )
+    await db.commit()
+    return {"results": outcome.results}
+
+async def _own_side_quest(db: AsyncSession, id: str, user: models.User):
+    result = await db.execute(select(models.SideQuest.id).where(models.SideQuest.id == id, models.SideQuest.user_id == user.id))
+    if result.scalar() is None:
+        raise HTTPException(status_code=404, detail="Side Quest not found")
+
+@router.post("/side-quests/{id}/completions/{date}", response_model=schemas.SideQuestCount)
+async def increment_side_quest(
+    id: str,
+    date: schemas.ISODate,
+    body: schemas.SideQuestIncrement = schemas.SideQuestIncrement(),
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    # One tap: a single upsert, safe against concurrent taps
+    await _own_side_quest(db, id, user)
+    count = await side_quest_counts.increment(db, id, user.id, date, body.delta)
+    await db.commit()
+    return schemas.SideQuestCount(date=date, count=count)
+
+@router.get("/side-quests/{id}/completions", response_model=List[schemas.SideQuestCount])
+async def get_side_quest_history(
+    id: str,
+    start_date: schemas.QueryDate = None,
+    end_date: schemas.QueryDate = None,
+    db: AsyncSession = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    await _own_side_quest(db, id, user)
+    counts = await side_quest_counts.load_counts(db, user.id, start_date, end_date, quest_id=id)
+    return [schemas.SideQuestCount(date=date, count=count) for date, count in counts.get(id, {}).items()]
+
 # --- Wish List ---
-@router.get("/wish-list", response_model=List[schemas.Wish])
-async def get_wishinfos(db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
-    result = await db.execute(select(models.Wish).where(models.Wish.user_id == user.id))
-    return result.scalars().all()
+@router.get("/wish-list", response_model=Union[List[schemas.Wish], schemas.Page[schemas.Wish]])
+async def get_wishinfos(page: PageParams = Depends(), db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    query = select(models.Wish).where(models.Wish.user_id == user.id)
+    return await list_response(db, query, (models.Wish.id,), page, schemas.Wish)
 
 @router.post("/wish-list", response_model=schemas.Wish, status_code=201)
 async def create_wish(wish: schemas.Wish, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
@@ -152,6 +388,7 @@ async def create_wish(wish: schemas.Wish, db: AsyncSession = Depends(get_db), us
     db.add(db_wish)
     await db.commit()
     await db.refresh(db_wish)
+    label_classifier.learn(user.id, db_wish.description, db_wish.label)
     return db_wish
 
 @router.delete("/wish-list/{id}", status_code=204)
@@ -161,13 +398,14 @@ async def delete_wish(id: str, db: AsyncSession = Depends(get_db), user: models.
     if db_wish:
         await db.delete(db_wish)
         await db.commit()
+        label_classifier.forget(user.id, db_wish.description, db_wish.label)
     return
 
 # --- Core List ---
-@router.get("/core-list", response_model=List[schemas.CoreTask])
-async def get_core_tasks(db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
-    result = await db.execute(select(models.CoreTask).where(models.CoreTask.user_id == user.id))
-    return result.scalars().all()
+@router.get("/core-list", response_model=Union[List[schemas.CoreTask], schemas.Page[schemas.CoreTask]])
+async def get_core_tasks(page: PageParams = Depends(), db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
+    query = select(models.CoreTask).where(models.CoreTask.user_id == user.id)
+    return await list_response(db, query, (models.CoreTask.id,), page, schemas.CoreTask)
 
 @router.post("/core-list", response_model=schemas.CoreTask, status_code=201)
 async def create_core_task(task: schemas.CoreTask, db: AsyncSession = Depends(get_db), user: models.User = Depends(get_current_user)):
@@ -175,6 +413,7 @@ async def create_core_task(task: schemas.CoreTask, db: AsyncSession = Depends(ge
     db.add(db_task)
     await db.commit()
     await db.refresh(db_task)
+    label_classifier.learn(user.id, db_task.description, db_task.label)
     return db_task
 
 @router.delete("/core-list/{id}", status_code=204)
@@ -184,4 +423,5 @@ async def delete_core_task(id: str, db: AsyncSession = Depends(get_db), user: mo
     if db_task:
         await db.delete(db_task)
         await db.commit()
+        label_classifier.forget(user.id, db_task.description, db_task.label)
     return
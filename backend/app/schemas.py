@@ -1,7 +1,25 @@
-from pydantic import BaseModel, ConfigDict, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, BeforeValidator
+from typing import List, Optional, Dict, Any, Annotated, Generic, TypeVar
 from enum import Enum
-from datetime import date
+from datetime import date, datetime
+import re
+
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+def _iso_date(value):
+    # Only YYYY-MM-DD on the wire; pydantic alone would also take timestamps
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str) or not ISO_DATE.fullmatch(value):
+        raise ValueError("expected a YYYY-MM-DD date")
+    return date.fromisoformat(value)
+
+def _optional_iso_date(value):
+    # Query strings send missing dates as ""
+    return _iso_date(value) if value not in (None, "") else None
+
+ISODate = Annotated[date, BeforeValidator(_iso_date)]
+QueryDate = Annotated[Optional[date], BeforeValidator(_optional_iso_date)]
 
 # --- Enums ---
 class TaskDifficulty(str, Enum):
@@ -49,7 +67,7 @@ class AuthResponse(BaseModel):
 class Task(BaseModel):
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
     id: str
-    date: str 
+    date: Optional[ISODate] # null only on legacy rows whose date couldn't be read
     description: str
     difficulty: TaskDifficulty
     completed: bool
@@ -68,6 +86,34 @@ class Task(BaseModel):
     bet_won: Optional[bool] = Field(None, alias="betWon")
     recurrence_rule: Optional[RecurrenceRule] = Field(None, alias="recurrenceRule")
 
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    # One keyset page of a list route; pass next_cursor back as ?cursor= for the next
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    items: List[T]
+    next_cursor: Optional[str] = Field(None, alias="nextCursor")
+
+class BulkRequest(BaseModel, Generic[T]):
+    # Upserts create or update rows by id; deletes are ids. Applied in one transaction.
+    upserts: List[T] = Field(default=[], max_length=1000)
+    deletes: List[str] = Field(default=[], max_length=1000)
+
+class BulkItemResult(BaseModel):
+    id: str
+    status: int # 201 created, 200 updated, 204 deleted, 404 not found, 422 id repeated in the request
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    results: List[BulkItemResult]
+
+class TaskRollup(BaseModel):
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    period: ISODate # first day of the week (Monday) or month
+    total: int
+    completed: int
+    actual_time: float = Field(alias="actualTime")
+
 class RecurringTask(BaseModel):
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
     id: str
@@ -75,13 +121,26 @@ class RecurringTask(BaseModel):
     difficulty: TaskDifficulty
     category: str
     recurrence_rule: RecurrenceRule = Field(alias="recurrenceRule")
-    start_date: str = Field(alias="startDate")
+    start_date: Optional[ISODate] = Field(alias="startDate")
     estimated_time: float = Field(alias="estimatedTime")
     goal_alignment: Optional[float] = Field(None, alias="goalAlignment")
     aligned_goal_id: Optional[str] = Field(None, alias="alignedGoalId")
     justification: Optional[str] = None
     time: Optional[str] = None
-    completions: Dict[str, Dict[str, Any]] = {}
+    # Written as a patch: dates left out are kept and a null entry deletes its date
+    completions: Dict[ISODate, Optional[Dict[str, Any]]] = {}
+
+class RecurringCompletion(BaseModel):
+    # One occurrence of a RecurringTask; the entries of RecurringTask.completions
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    date: Optional[ISODate] = None # taken from the URL on upsert
+    completed: Optional[bool] = None
+    actual_time: Optional[float] = Field(None, alias="actualTime")
+    time: Optional[str] = None
+    bet_amount: Optional[float] = Field(None, alias="betAmount")
+    bet_multiplier: Optional[float] = Field(None, alias="betMultiplier")
+    bet_placed: Optional[bool] = Field(None, alias="betPlaced")
+    bet_won: Optional[bool] = Field(None, alias="betWon")
 
 class GoalKPI(BaseModel):
     description: str
@@ -103,14 +162,25 @@ class AtomicHabitsSuggestions(BaseModel):
     easy: List[str]
     satisfying: List[str]
 
+class CompletionSummary(BaseModel):
+    # Completed tasks of one kind on one day, for scoring history the client hasn't loaded
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    date: ISODate
+    difficulty: Optional[str] = None
+    category: Optional[str] = None
+    goal_alignment: Optional[float] = Field(None, alias="goalAlignment")
+    aligned_goal_id: Optional[str] = Field(None, alias="alignedGoalId")
+    count: int
+    actual_time: float = Field(alias="actualTime")
+
 class Goal(BaseModel):
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
     id: str
     description: str
-    target_date: str = Field(alias="targetDate")
+    target_date: Optional[ISODate] = Field(alias="targetDate")
     label: Optional[str] = None
     completed: Optional[bool] = False
-    completion_date: Optional[str] = Field(None, alias="completionDate")
+    completion_date: Optional[ISODate] = Field(None, alias="completionDate")
     completion_proof: Optional[str] = Field(None, alias="completionProof")
     completion_feedback: Optional[str] = Field(None, alias="completionFeedback")
     system: Optional[AtomicHabitsSuggestions] = None
@@ -124,7 +194,7 @@ class WeeklyGoal(BaseModel):
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
     id: str
     description: str
-    target_date: str = Field(alias="targetDate")
+    target_date: Optional[ISODate] = Field(alias="targetDate")
     aligned_goal_id: Optional[str] = Field(None, alias="alignedGoalId")
     goal_alignment: Optional[float] = Field(None, alias="goalAlignment")
     label: Optional[str] = None
@@ -137,7 +207,16 @@ class SideQuest(BaseModel):
     description: str
     difficulty: TaskDifficulty
     daily_goal: int = Field(alias="dailyGoal")
-    completions: Dict[str, int] = {}
+    # Seeds counts on create; ignored on update (counts change through the increment route)
+    completions: Dict[ISODate, int] = {}
+
+class SideQuestCount(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    date: ISODate
+    count: int
+
+class SideQuestIncrement(BaseModel):
+    delta: int = 1 # negative to undo; counts never go below zero
 
 class Reward(BaseModel):
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
@@ -151,11 +230,11 @@ class PurchasedReward(BaseModel):
     reward_id: str = Field(alias="rewardId")
     name: str
     cost: float
-    purchase_date: str = Field(alias="purchaseDate")
+    purchase_date: Optional[ISODate] = Field(alias="purchaseDate")
 
 class DiaryEntry(BaseModel):
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
-    date: str
+    date: ISODate
     initial_reflection: Optional[str] = Field(None, alias="initialReflection")
     initial_feedback: Optional[str] = Field(None, alias="initialFeedback")
     debrief: Optional[str] = None
@@ -201,6 +280,21 @@ class AIStoryRequest(BaseModel):
 class AILabelRequest(BaseModel):
     text: str
 
+class AILabelBatchRequest(BaseModel):
+    # Same ceiling as a bulk write; callers send bigger sets in parts
+    texts: List[str] = Field(max_length=1000)
+
+class AILabelBatchTiming(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+    size: int
+    elapsed_ms: float = Field(alias="elapsedMs")
+    failed: bool
+
+class AILabelBatchResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+    labels: List[str]
+    batches: List[AILabelBatchTiming]
+
 class AIAnalyzeGoalAlignmentRequest(BaseModel):
     taskDescription: str = Field(alias="taskDescription") # Manual or snake? Probably came from dict.
     activeGoals: List[Goal] = Field(alias="activeGoals")
@@ -258,3 +352,39 @@ class AIWeeklyGoalEvaluationRequest(BaseModel):
     description: str
     completed_tasks: List[Dict[str, Any]] = Field(alias="completedTasks")
     purchased_rewards: List[Dict[str, Any]] = Field(alias="purchasedRewards")
+
+# --- AI Chat Sessions ---
+class AIChatMessageRequest(BaseModel):
+    content: str = Field(max_length=4000)
+
+class ChatMessage(BaseModel):
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    seq: int
+    sender: str
+    content: str
+    created_at: Optional[datetime] = Field(None, alias="createdAt")
+
+class ChatSession(BaseModel):
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    id: str
+    summary: Optional[str] = None
+    summarized_through: int = Field(0, alias="summarizedThrough")
+    messages: List[ChatMessage] = []
+    created_at: Optional[datetime] = Field(None, alias="createdAt")
+
+# --- AI Jobs ---
+class AIJobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+class AIJob(BaseModel):
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    id: str
+    kind: str
+    status: AIJobStatus
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = Field(None, alias="createdAt")
+    updated_at: Optional[datetime] = Field(None, alias="updatedAt")
@@ -0,0 +1,69 @@
+import datetime
+from sqlalchemy import select, case, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+
+def _upsert(db: AsyncSession):
+    # INSERT .. ON CONFLICT exists on both backends we run on, under different constructs
+    return (postgresql if db.bind.dialect.name == "postgresql" else sqlite).insert(models.SideQuestCompletion)
+
+async def increment(db: AsyncSession, quest_id: str, user_id: str, date: datetime.date, delta: int = 1) -> int:
+    """Adds delta to the (quest, date) count in one atomic statement and returns
+    the new count, so concurrent taps never overwrite each other."""
+    count = models.SideQuestCompletion.count
+    stmt = (
+        _upsert(db)
+        .values(side_quest_id=quest_id, date=date, user_id=user_id, count=max(delta, 0))
+        .on_conflict_do_update(
+            index_elements=["side_quest_id", "date"],
+            set_={"count": case((count + delta < 0, 0), else_=count + delta)},
+        )
+        .returning(count)
+    )
+    return (await db.execute(stmt)).scalar_one()
+
+async def load_counts(db: AsyncSession, user_id: str, start_date: datetime.date = None, end_date: datetime.date = None,
+                      quest_id: str = None, quest_ids: list = None) -> dict:
+    """{side_quest_id: {date: count}} in one query, served by the (user_id, date) index."""
+    query = select(models.SideQuestCompletion).where(models.SideQuestCompletion.user_id == user_id)
+    if quest_id:
+        query = query.where(models.SideQuestCompletion.side_quest_id == quest_id)
+    if quest_ids is not None:
+        query = query.where(models.SideQuestCompletion.side_quest_id.in_(quest_ids))
+    if start_date and end_date:
+        query = query.where(models.SideQuestCompletion.date >= start_date, models.SideQuestCompletion.date <= end_date)
+    out = {}
+    for row in (await db.execute(query.order_by(models.SideQuestCompletion.date))).scalars().all():
+        out.setdefault(row.side_quest_id, {})[row.date] = row.count
+    return out
+
+async def sync_counts(db: AsyncSession, quest: models.SideQuest, completions: dict):
+    """Seeds the counts of a quest being created from its completions map."""
+    await sync_counts_many(db, quest.user_id, {quest.id: completions} if completions else {})
+
+async def sync_counts_many(db: AsyncSession, user_id: str, completions_by_quest: dict):
+    """Writes completions maps for several quests with one SELECT, one INSERT and
+    one UPDATE, touching only the dates whose counts changed."""
+    wanted = {(quest_id, date): count for quest_id, completions in completions_by_quest.items()
+              for date, count in completions.items()}
+    if not wanted:
+        return
+    result = await db.execute(
+        select(models.SideQuestCompletion).where(
+            models.SideQuestCompletion.side_quest_id.in_(list(completions_by_quest)),
+            models.SideQuestCompletion.date.in_({date for _, date in wanted}),
+        )
+    )
+    existing = {(row.side_quest_id, row.date): row.count for row in result.scalars().all()}
+    inserts, updates = [], []
+    for (quest_id, date), count in wanted.items():
+        values = {"side_quest_id": quest_id, "date": date, "count": count}
+        if (quest_id, date) not in existing:
+            inserts.append({**values, "user_id": user_id})
+        elif existing[(quest_id, date)] != count:
+            updates.append(values)
+    if inserts:
+        await db.execute(insert(models.SideQuestCompletion), inserts)
+    if updates:
+        await db.execute(update(models.SideQuestCompletion), updates)
@@ -0,0 +1,222 @@
+"""Single-writer mode for SQLite deployments (the Modal volume).
+
+SQLite allows one writer at a time; with several pooled connections writing,
+the losers spin on the file lock and eventually fail with "database is locked".
+Here one connection does all the writing. Sessions take turns on it in arrival
+order, each inside a SAVEPOINT of a long-running transaction, and a background
+task COMMITs everything released since the last commit in one go (group commit).
+Reads go to a separate pool of query-only connections, which WAL lets run
+alongside the writer.
+"""
+import asyncio
+import logging
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.util import await_only
+
+logger = logging.getLogger(__name__)
+
+def install_pragmas(sync_engine, busy_timeout_ms: int = 5000, mmap_size: int = 256 * 1024 * 1024, query_only: bool = False):
+    @event.listens_for(sync_engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL only syncs at checkpoints; a power cut can lose the
+        # last commits but never corrupts the database
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        if query_only:
+            cursor.execute("PRAGMA query_only=1")
+        cursor.close()
+
+def _explicit_transactions(sync_engine):
+    # pysqlite's implicit BEGIN handling breaks SAVEPOINT; take over transaction control
+    @event.listens_for(sync_engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sync_engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+class SQLiteWriter:
+    """Owns the one writing connection and group-commits what sessions release to it."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        _explicit_transactions(engine.sync_engine)
+        self._loop = None
+        self._conn = None
+        self._lock = None
+        self._wake = None
+        self._ready = None
+        self._task = None
+        self._waiting = []
+        self._broken = None # why the writing connection couldn't be reopened
+        self.transactions = 0
+        self.commits = 0
+        self.largest_group = 0
+        self.reconnects = 0
+
+    async def _start(self):
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._conn = await self.engine.connect()
+        await self._conn.begin()
+        self._task = asyncio.create_task(self._run())
+
+    async def acquire(self):
+        """Waits for the writer's turn and returns its (sync) connection."""
+        # Started lazily so it binds to whichever loop serves requests
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._loop is not None:
+                # The previous loop's connection can't be used or closed from this one;
+                # drop it along with the pool that still counts it as checked out
+                self.engine.sync_engine.dispose(close=False)
+            self._loop = loop
+            self._waiting = []
+            self._broken = None
+            self._ready = loop.create_task(self._start())
+        await self._ready
+        await self._lock.acquire()
+        if self._broken is not None:
+            # Try again for every session rather than staying down for good
+            await self._reconnect()
+            if self._broken is not None:
+                self._lock.release()
+                raise RuntimeError("SQLite writer connection is unavailable") from self._broken
+        return self._conn.sync_connection
+
+    def release(self, committed: bool):
+        """Hands the connection back. For a committed session, returns a future that
+        resolves once its changes are durable."""
+        future = None
+        if committed:
+            future = asyncio.get_running_loop().create_future()
+            self._waiting.append(future)
+            self.transactions += 1
+            self._wake.set()
+        self._lock.release()
+        return future
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            # Queued sessions are ahead of us on the lock, so by the time we get it
+            # they've all released and join this commit
+            async with self._lock:
+                group, self._waiting = self._waiting, []
+                error = None
+                try:
+                    await self._conn.commit()
+                except Exception as e:
+                    error = e
+                try:
+                    if error is not None:
+                        await self._conn.rollback()
+                    await self._conn.begin()
+                except Exception:
+                    # The connection is in an unknown state; the next sessions get a new one
+                    await self._reconnect()
+            self.commits += 1
+            self.largest_group = max(self.largest_group, len(group))
+            self._resolve(group, error)
+
+    async def _reconnect(self):
+        """Replaces the writing connection. Never raises: on failure the writer is
+        marked broken and acquire() fails fast until a later attempt succeeds."""
+        self.reconnects += 1
+        try:
+            await self._conn.invalidate()
+            await self._conn.close()
+        except Exception:
+            pass
+        try:
+            self._conn = await self.engine.connect()
+            await self._conn.begin()
+            self._broken = None
+        except Exception as e:
+            logger.exception("SQLite writer could not reopen its connection")
+            self._broken = e
+
+    def _resolve(self, group: list, error: Exception = None):
+        for future in group:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+    async def close(self):
+        if self._task is None:
+            return
+        async with self._lock:
+            self._task.cancel()
+            # Sessions released since the last group commit are still waiting on it
+            group, self._waiting = self._waiting, []
+            error = None
+            try:
+                await self._conn.commit()
+            except Exception as e:
+                error = e
+            await self._conn.close()
+            self._resolve(group, error)
+        self._task = self._ready = self._loop = None
+
+    def stats(self) -> dict:
+        return {
+            "transactions": self.transactions,
+            "commits": self.commits,
+            "largest_group": self.largest_group,
+            "reconnects": self.reconnects,
+            "broken": self._broken is not None,
+        }
+
+def session_classes(writer: SQLiteWriter, reader_engine):
+    """(sync_session_class, class_) for async_sessionmaker in single-writer mode."""
+
+    class RoutingSession(Session):
+        def __init__(self, *args, **kwargs):
+            # Commit/rollback release or undo this session's SAVEPOINT, not the writer's transaction
+            kwargs.setdefault("join_transaction_mode", "create_savepoint")
+            super().__init__(*args, **kwargs)
+
+        def get_bind(self, mapper=None, clause=None, **kw):
+            conn = self.info.get("sqlite_writer")
+            if conn is None and (self._flushing or isinstance(clause, UpdateBase)):
+                # First write of this session: queue for the writer. Reads after
+                # this stay on it so the session sees its own changes.
+                conn = self.info["sqlite_writer"] = await_only(writer.acquire())
+            return conn if conn is not None else reader_engine.sync_engine
+
+    class WriterSession(AsyncSession):
+        async def _release(self, committed: bool):
+            if self.sync_session.info.pop("sqlite_writer", None) is None:
+                return
+            durable = writer.release(committed)
+            if durable is not None:
+                await durable
+
+        async def commit(self):
+            try:
+                await super().commit()
+            except BaseException:
+                await self.rollback()
+                raise
+            await self._release(committed=True)
+
+        async def rollback(self):
+            await super().rollback()
+            await self._release(committed=False)
+
+        async def close(self):
+            await super().close()
+            await self._release(committed=False)
+
+    return RoutingSession, WriterSession
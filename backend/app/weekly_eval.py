@@ -0,0 +1,145 @@
+import asyncio
+import datetime
+import json
+import os
+import time
+from collections import defaultdict
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from app import models, schemas
+from app.database import AsyncSessionLocal
+from app.ai_client import get_json_model, generate_text
+from app.ai_prompts import weekly_evaluation_prompt
+from app.circuit_breaker import CircuitOpenError
+from app.pregen import NightlyScheduler
+
+# Model calls in flight at once for the batch (still bounded by the AI limiter too)
+AI_EVAL_CONCURRENCY = int(os.getenv("AI_EVAL_CONCURRENCY", "8"))
+AI_EVAL_RETRIES = int(os.getenv("AI_EVAL_RETRIES", "2"))
+AI_EVAL_BACKOFF_SECONDS = float(os.getenv("AI_EVAL_BACKOFF_SECONDS", "2"))
+# The nightly batch has its own switch and off-peak window, independent of
+# story/briefing pre-generation
+AI_EVAL_ENABLED = os.getenv("AI_EVAL_ENABLED", "1") == "1"
+AI_EVAL_HOURS = os.getenv("AI_EVAL_HOURS", "2-6")
+AI_EVAL_CHECK_SECONDS = float(os.getenv("AI_EVAL_CHECK_SECONDS", "600"))
+
+def last_week(today: datetime.date):
+    # Monday..Sunday of the week before the one containing `today`
+    start = today - datetime.timedelta(days=today.weekday() + 7)
+    return start, start + datetime.timedelta(days=6)
+
+class WeeklyEvaluationPipeline:
+    """Evaluates every unevaluated WeeklyGoal of the week that just ended, for all
+    users, in three stages: collect (set-based reads), generate (bounded fan-out
+    with retries) and write (one bulk UPDATE)."""
+
+    def __init__(self, concurrency: int, retries: int, backoff: float):
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.last_report = None
+
+    async def _collect(self, start: datetime.date, end: datetime.date):
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(
+                select(models.WeeklyGoal).where(models.WeeklyGoal.target_date >= start, models.WeeklyGoal.target_date <= end)
+            )
+            # Filtered here rather than in SQL: an empty JSON column may hold SQL NULL or JSON null
+            goals = [g for g in rows.scalars().all() if not g.evaluation]
+            user_ids = {g.user_id for g in goals}
+            if not user_ids:
+                return [], {}, {}, {}
+
+            users = {u.id: u for u in (await db.execute(select(models.User).where(models.User.id.in_(user_ids)))).scalars().all()}
+            tasks, rewards = defaultdict(list), defaultdict(list)
+            rows = await db.execute(
+                select(models.Task.user_id, models.Task.date, models.Task.description, models.Task.difficulty,
+                       models.Task.category, models.Task.actual_time)
+                .where(models.Task.user_id.in_(user_ids), models.Task.completed.is_(True),
+                       models.Task.date >= start, models.Task.date <= end)
+            )
+            for user_id, date, description, difficulty, category, actual_time in rows.all():
+                tasks[user_id].append({"date": date, "description": description, "difficulty": difficulty,
+                                       "category": category, "actualTime": actual_time})
+            rows = await db.execute(
+                select(models.PurchasedReward.user_id, models.PurchasedReward.name, models.PurchasedReward.cost,
+                       models.PurchasedReward.purchase_date)
+                .where(models.PurchasedReward.user_id.in_(user_ids),
+                       models.PurchasedReward.purchase_date >= start, models.PurchasedReward.purchase_date <= end)
+            )
+            for user_id, name, cost, purchase_date in rows.all():
+                rewards[user_id].append({"name": name, "cost": cost, "purchaseDate": purchase_date})
+        return goals, users, tasks, rewards
+
+    async def _evaluate(self, semaphore, model, prompt: str, counters: dict):
+        async with semaphore:
+            for attempt in range(self.retries + 1):
+                try:
+                    text = await generate_text(model, prompt, "evaluate-weekly")
+                    evaluation = schemas.WeeklyGoalEvaluation.model_validate(json.loads(text))
+                    return evaluation.model_dump(by_alias=True)
+                except CircuitOpenError:
+                    return None # don't hammer a tripped breaker; tomorrow's run retries
+                except Exception as e:
+                    if attempt == self.retries:
+                        print(f"Weekly Eval Error: {e}")
+                        return None
+                    counters["retries"] += 1
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def run(self, today: datetime.date = None) -> dict:
+        today = today or datetime.date.today()
+        start, end = last_week(today)
+        counters = {"retries": 0}
+        timings = {}
+
+        started = time.perf_counter()
+        goals, users, tasks, rewards = await self._collect(start, end)
+        timings["collect"] = time.perf_counter() - started
+
+        stage = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending, skipped = [], 0
+        for goal in goals:
+            try:
+                model = get_json_model(users[goal.user_id])
+            except HTTPException:
+                skipped += 1 # user has no API key
+                continue
+            prompt = weekly_evaluation_prompt(goal.description, tasks[goal.user_id], rewards[goal.user_id])
+            pending.append((goal.id, self._evaluate(semaphore, model, prompt, counters)))
+        results = await asyncio.gather(*(coro for _, coro in pending))
+        evaluations = [{"id": goal_id, "evaluation": ev} for (goal_id, _), ev in zip(pending, results) if ev]
+        timings["generate"] = time.perf_counter() - stage
+
+        stage = time.perf_counter()
+        if evaluations:
+            async with AsyncSessionLocal() as db:
+                # ORM bulk UPDATE by primary key: one executemany for the whole batch
+                await db.execute(update(models.WeeklyGoal), evaluations)
+                await db.commit()
+        timings["write"] = time.perf_counter() - stage
+        timings["total"] = time.perf_counter() - started
+
+        report = {
+            "week_start": start.isoformat(),
+            "goals": len(goals),
+            "evaluated": len(evaluations),
+            "failed": len(pending) - len(evaluations),
+            "skipped": skipped,
+            "retries": counters["retries"],
+            "throughput": len(evaluations) / timings["generate"] if timings["generate"] else 0.0,
+            "timings": timings,
+        }
+        self.last_report = report
+        print(
+            f"Weekly evaluations {start}: {report['evaluated']}/{report['goals']} in {timings['total']:.2f}s "
+            f"(collect {timings['collect']:.2f}s, generate {timings['generate']:.2f}s, write {timings['write']:.2f}s)"
+        )
+        return report
+
+    def stats(self) -> dict:
+        return {"last_report": self.last_report}
+
+weekly_evaluations = WeeklyEvaluationPipeline(AI_EVAL_CONCURRENCY, AI_EVAL_RETRIES, AI_EVAL_BACKOFF_SECONDS)
+weekly_evaluation_scheduler = NightlyScheduler(weekly_evaluations.run, AI_EVAL_HOURS, AI_EVAL_CHECK_SECONDS)
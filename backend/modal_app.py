@@ -55,6 +55,8 @@ image = (
 def web():
     # Configure the application to use the SQLite DB on the persistent volume
     os.environ["DATABASE_URL"] = "sqlite+aiosqlite:////data/goggins.db"
+    # WAL, a single group-committing writer and read-only reader connections
+    os.environ.setdefault("DB_SQLITE_WAL", "1")
     
     # Import the FastAPI app
     from app.main import app as fastapi_app
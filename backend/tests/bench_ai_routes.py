@@ -0,0 +1,116 @@
+"""Load-tests every /api/ai route against the offline FakeBackend.
+
+Usage: uv run python -m tests.bench_ai_routes --requests 200 --concurrency 32 --latency lognormal:0.4:0.5
+No Gemini key or network is needed. Payloads carry a per-request nonce so the
+response cache and single-flight don't hide the upstream latency.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+_db = os.path.join(tempfile.mkdtemp(), "bench_ai.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db}"
+
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client
+from app.ai_backends import FakeBackend
+from app.ai_cache import response_cache
+from app.circuit_breaker import CircuitBreaker
+from app.label_classifier import label_classifier
+
+GOAL = {"id": "g1", "description": "Run a marathon", "targetDate": "2026-12-31"}
+
+def _task(n):
+    return {"id": f"t{n}", "date": "2026-10-17", "description": f"Run {n} miles", "difficulty": "Hard",
+            "completed": True, "category": "Physical Training", "estimatedTime": 60}
+
+# route -> payload factory; n makes every prompt unique
+PAYLOADS = {
+    "story": lambda n: {"task": _task(n), "goals": [GOAL]},
+    "label": lambda n: {"text": f"Thing number {n}"},
+    "label/batch": lambda n: {"texts": [f"Thing {n}.{i}" for i in range(10)]},
+    "analyze-goal-alignment": lambda n: {"taskDescription": f"Run {n} miles", "activeGoals": [GOAL]},
+    "reflection-feedback": lambda n: {"reflection": f"Day {n} was hard", "goals": [GOAL]},
+    "diary-feedback": lambda n: {"debrief": {"day": n, "wins": "ran"}, "goals": [GOAL]},
+    "review": lambda n: {"reviewData": {"week": n}, "goals": [GOAL], "sideQuests": []},
+    "goal-change-verdict": lambda n: {"justification": f"Reason {n}", "currentGoal": "Run a marathon"},
+    "goal-completion-verdict": lambda n: {"goalDescription": "Run a marathon", "completionProof": f"Medal {n}"},
+    "atomic-system": lambda n: {"newGoal": GOAL, "allGoals": [GOAL], "accomplishmentsSummary": {"n": n}},
+    "weekly-briefing": lambda n: {"previousWeekEvaluations": [], "nextWeekGoals": [], "longTermGoals": [dict(GOAL, description=f"Goal {n}")]},
+    "enhance-text": lambda n: {"text": f"run {n}", "type": "task"},
+    "chat": lambda n: {"messages": [{"sender": "user", "content": f"Message {n}"}]},
+    "contract": lambda n: {"description": f"Goal {n}", "type": "goal"},
+    "betting-odds": lambda n: {"description": f"Run {n} miles", "difficulty": "Hard", "category": "Physical Training", "estimatedTime": 60},
+    "evaluate-weekly": lambda n: {"description": f"Goal {n}", "completedTasks": [], "purchasedRewards": []},
+}
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+async def bench_route(client, route, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one(n):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            resp = await client.post(f"/api/ai/{route}", json=PAYLOADS[route](n))
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code != 200:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(requests)))
+    wall = time.perf_counter() - start
+    return {
+        "throughput": requests / wall,
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "mean": statistics.mean(latencies) * 1000,
+        "failures": failures,
+    }
+
+async def main(args):
+    ai_client.backend_override = FakeBackend(latency=args.latency, error_rate=args.error_rate, seed=args.seed)
+    # Injected errors should exercise the fallbacks, not open the breaker for the whole run
+    ai_client.breaker = CircuitBreaker(failure_threshold=10 ** 9, reset_timeout=0)
+    label_classifier.threshold = 1.1
+    engine.sync_engine.echo = False
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    routes = args.routes or list(PAYLOADS)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test", timeout=120) as client:
+        resp = await client.post("/api/auth/register", json={"username": f"bench_{uuid.uuid4().hex[:6]}"})
+        client.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+
+        print(f"latency={args.latency} error_rate={args.error_rate} requests={args.requests} concurrency={args.concurrency}")
+        print(f"{'route':<26}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'fail':>6}")
+        for route in routes:
+            response_cache.clear()
+            r = await bench_route(client, route, args.requests, args.concurrency)
+            print(f"{route:<26}{r['throughput']:>9.1f}{r['p50']:>9.1f}{r['p95']:>9.1f}{r['p99']:>9.1f}{r['failures']:>6}")
+
+    await engine.dispose()
+    os.remove(_db)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", default="lognormal:0.3:0.5", help="fixed:S | uniform:A:B | lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--routes", nargs="*", help="subset of routes, e.g. story label")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,114 @@
+"""Compares engine profiles on a read-heavy workload: the per-user, date-ranged
+task list every calendar view issues.
+
+Usage: uv run python -m tests.bench_db_profiles --requests 2000 --concurrency 32
+       DATABASE_URL=postgresql+asyncpg://... uv run python -m tests.bench_db_profiles --profiles dev prod
+"before" is the dev profile (echo on, default pool), "after" is prod. Echo output
+goes to /dev/null unless --echo-stdout is given, so the numbers are a lower bound
+on what logging every statement costs in a real deployment.
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+_db = os.path.join(tempfile.mkdtemp(), "bench_db.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_db}")
+# Keep the app's own engine quiet; the profiles under test get engines of their own
+os.environ["DB_PROFILE"] = "test"
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.database import DATABASE_URL, Base, profile_settings, engine_options, SlowQueryLog
+from app import models
+
+DAYS = 365
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+async def seed(engine, users: int, tasks_per_day: int) -> list:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    start = datetime.date(2026, 1, 1)
+    ids = [str(uuid.uuid4()) for _ in range(users)]
+    async with async_sessionmaker(engine, class_=AsyncSession)() as db:
+        db.add_all(models.User(id=user_id, username=f"bench_{user_id[:8]}") for user_id in ids)
+        await db.flush()
+        db.add_all(
+            models.Task(user_id=user_id, date=start + datetime.timedelta(days=d), description=f"Task {d}.{n}",
+                        difficulty="Medium", category="Work", estimated_time=30, completed=d % 3 == 0)
+            for user_id in ids for d in range(DAYS) for n in range(tasks_per_day)
+        )
+        await db.commit()
+    return ids
+
+async def run(engine, ids: list, requests: int, concurrency: int) -> dict:
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(n):
+        week = datetime.date(2026, 1, 1) + datetime.timedelta(days=(n * 7) % (DAYS - 7))
+        async with semaphore:
+            started = time.perf_counter()
+            async with sessions() as db:
+                result = await db.execute(select(models.Task).where(
+                    models.Task.user_id == ids[n % len(ids)],
+                    models.Task.date >= week, models.Task.date <= week + datetime.timedelta(days=6),
+                ))
+                result.scalars().all()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(requests)))
+    elapsed = time.perf_counter() - started
+    ms = [s * 1000 for s in latencies]
+    return {"throughput": requests / elapsed, "p50": statistics.median(ms), "p95": percentile(ms, 0.95), "p99": percentile(ms, 0.99)}
+
+async def main(args):
+    print(f"url={DATABASE_URL.split('@')[-1]} requests={args.requests} concurrency={args.concurrency}")
+    print(f"{'profile':<10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'slow':>6}")
+    ids = None
+    for profile in args.profiles:
+        settings = profile_settings(profile)
+        stdout = sys.stdout
+        if settings["echo"] and not args.echo_stdout:
+            # SQLAlchemy binds its echo handler to sys.stdout when the engine is created
+            sys.stdout = open(os.devnull, "w")
+        try:
+            engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL, settings))
+            slow = None
+            if settings["slow_query_ms"]:
+                slow = SlowQueryLog(settings["slow_query_ms"])
+                slow.install(engine.sync_engine)
+            if ids is None:
+                ids = await seed(engine, args.users, args.tasks_per_day)
+            await run(engine, ids, min(args.requests, 100), args.concurrency) # warm the pool
+            r = await run(engine, ids, args.requests, args.concurrency)
+            await engine.dispose()
+        finally:
+            if sys.stdout is not stdout:
+                sys.stdout.close()
+                sys.stdout = stdout
+        print(f"{profile:<10}{r['throughput']:>9.1f}{r['p50']:>9.1f}{r['p95']:>9.1f}{r['p99']:>9.1f}{slow.slow if slow else '-':>6}")
+
+    if os.path.exists(_db):
+        os.remove(_db)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks-per-day", type=int, default=3)
+    parser.add_argument("--profiles", nargs="*", default=["dev", "prod"])
+    parser.add_argument("--echo-stdout", action="store_true", help="let the dev profile echo to the terminal")
+    asyncio.run(main(parser.parse_args()))
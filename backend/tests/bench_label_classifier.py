@@ -0,0 +1,75 @@
+"""Compares the local label classifier with the Gemini /ai/label path.
+
+Usage: uv run python -m tests.bench_label_classifier
+The Gemini half only runs when GEMINI_API_KEY is set.
+"""
+import asyncio
+import os
+import random
+import time
+from app.label_classifier import UserLabelModel, LABEL_CATEGORIES
+
+# (text, label) pairs in the style of real task descriptions
+DATASET = [
+    ("Run 5 miles", "Physical Training"), ("100 pushups", "Physical Training"), ("Leg day at the gym", "Physical Training"),
+    ("Ruck 10 miles with 40lbs", "Physical Training"), ("Swim 2km", "Physical Training"), ("Hill sprints", "Physical Training"),
+    ("Read 30 pages", "Mental Fortitude"), ("Meditate 20 minutes", "Mental Fortitude"), ("Journal about failures", "Mental Fortitude"),
+    ("Study Spanish vocab", "Mental Fortitude"), ("Visualize the race", "Mental Fortitude"), ("Write 500 words", "Mental Fortitude"),
+    ("Wake up at 5am", "Discipline"), ("No sugar today", "Discipline"), ("In bed by 10pm", "Discipline"),
+    ("No phone before noon", "Discipline"), ("Stick to the budget", "Discipline"), ("Meal prep for the week", "Discipline"),
+    ("Cold shower", "Uncomfortable Zone"), ("Ice bath 5 minutes", "Uncomfortable Zone"), ("Speak up in the meeting", "Uncomfortable Zone"),
+    ("24 hour fast", "Uncomfortable Zone"), ("Talk to a stranger", "Uncomfortable Zone"), ("Pitch the idea to my boss", "Uncomfortable Zone"),
+    ("Buy groceries", "Side Quest"), ("Do the laundry", "Side Quest"), ("Pay the bills", "Side Quest"),
+    ("Answer emails", "Side Quest"), ("Fix the bike tire", "Side Quest"), ("Book dentist appointment", "Side Quest"),
+    ("Sleep 8 hours", "Recovery"), ("Stretch for 15 minutes", "Recovery"), ("Yoga session", "Recovery"),
+    ("Foam roll legs", "Recovery"), ("Take a nap", "Recovery"), ("Rest day walk", "Recovery"),
+]
+
+def bench_local(threshold: float = 0.8, folds: int = 6):
+    random.seed(7)
+    rows = DATASET[:]
+    random.shuffle(rows)
+    correct = confident = confident_correct = 0
+    elapsed = 0.0
+    for fold in range(folds):
+        test = rows[fold::folds]
+        model = UserLabelModel()
+        for text, label in rows:
+            if (text, label) not in test:
+                model.learn(text, label)
+        for text, label in test:
+            start = time.perf_counter()
+            prediction = model.predict(text)
+            elapsed += time.perf_counter() - start
+            if prediction and prediction.label == label:
+                correct += 1
+            if prediction and prediction.confidence >= threshold:
+                confident += 1
+                confident_correct += prediction.label == label
+    n = len(rows)
+    print(f"Local classifier: accuracy={correct / n:.0%} "
+          f"fast-path={confident / n:.0%} fast-path accuracy={confident_correct / max(confident, 1):.0%} "
+          f"latency={elapsed / n * 1e6:.1f}us/text")
+
+async def bench_gemini():
+    from app.ai_client import GenAIModelWrapper, DEFAULT_MODEL
+    model = GenAIModelWrapper(os.environ["GEMINI_API_KEY"], DEFAULT_MODEL)
+    correct = 0
+    start = time.perf_counter()
+    for text, label in DATASET:
+        prompt = f"""
+        Classify this text into one of these exact categories: {", ".join(f"'{c}'" for c in LABEL_CATEGORIES)}.
+        Text: "{text}"
+        Return ONLY the category name.
+        """
+        response = await model.generate_content_async(prompt)
+        correct += response.text.strip().replace("'", "").replace('"', '') == label
+    elapsed = time.perf_counter() - start
+    print(f"Gemini: accuracy={correct / len(DATASET):.0%} latency={elapsed / len(DATASET) * 1000:.0f}ms/text")
+
+if __name__ == "__main__":
+    bench_local()
+    if os.getenv("GEMINI_API_KEY"):
+        asyncio.run(bench_gemini())
+    else:
+        print("Gemini: skipped (GEMINI_API_KEY not set)")
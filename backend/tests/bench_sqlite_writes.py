@@ -0,0 +1,122 @@
+"""Concurrent writes against SQLite: the default setup (rollback journal, every
+pooled connection writing) against single-writer WAL mode (DB_SQLITE_WAL=1).
+
+Usage: uv run python -m tests.bench_sqlite_writes --requests 2000 --concurrency 32
+Each request is what a task toggle does: read the task, update it, commit, with
+every --read-ratio'th request a plain read of the day's list instead. "errors"
+counts requests that failed, in practice "database is locked".
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(_dir, 'app.db')}")
+os.environ["DB_PROFILE"] = "test"
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.database import Base, profile_settings, engine_options
+from app.sqlite_writer import SQLiteWriter, install_pragmas, session_classes
+from app import models
+
+DAY = datetime.date(2026, 3, 2)
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def setup(mode: str, url: str):
+    """(sessionmaker, engines to dispose, writer or None)"""
+    options = engine_options(url, profile_settings("test"))
+    if mode == "default":
+        engine = create_async_engine(url, **options)
+        return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False), [engine], None
+    writer_engine = create_async_engine(url, **{**options, "pool_size": 1, "max_overflow": 0})
+    install_pragmas(writer_engine.sync_engine)
+    reader_engine = create_async_engine(url, **options)
+    install_pragmas(reader_engine.sync_engine, query_only=True)
+    writer = SQLiteWriter(writer_engine)
+    sync_session_class, session_class = session_classes(writer, reader_engine)
+    sessions = async_sessionmaker(bind=reader_engine, class_=session_class, sync_session_class=sync_session_class,
+                                  expire_on_commit=False, autoflush=False)
+    return sessions, [writer_engine, reader_engine], writer
+
+async def seed(url: str, users: int, tasks_per_user: int) -> list:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    ids = [str(uuid.uuid4()) for _ in range(users)]
+    async with async_sessionmaker(engine, class_=AsyncSession)() as db:
+        db.add_all(models.User(id=user_id, username=f"bench_{user_id[:8]}") for user_id in ids)
+        await db.flush()
+        db.add_all(
+            models.Task(id=f"{user_id}-{n}", user_id=user_id, date=DAY, description=f"Task {n}",
+                        difficulty="Medium", category="Work", estimated_time=30, completed=False)
+            for user_id in ids for n in range(tasks_per_user)
+        )
+        await db.commit()
+    await engine.dispose()
+    return ids
+
+async def run(sessions, ids: list, args) -> dict:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(n):
+        nonlocal errors
+        user_id = ids[n % len(ids)]
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async with sessions() as db:
+                    if args.read_ratio and n % args.read_ratio == 0:
+                        (await db.execute(select(models.Task).where(
+                            models.Task.user_id == user_id, models.Task.date == DAY))).scalars().all()
+                    else:
+                        task = await db.get(models.Task, f"{user_id}-{n % args.tasks_per_user}")
+                        task.completed = not task.completed
+                        task.actual_time = n % 90
+                        await db.commit()
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    ms = [s * 1000 for s in latencies] or [0]
+    return {"throughput": len(latencies) / elapsed, "p50": statistics.median(ms), "p95": percentile(ms, 0.95),
+            "p99": percentile(ms, 0.99), "errors": errors}
+
+async def main(args):
+    print(f"requests={args.requests} concurrency={args.concurrency} read_ratio={args.read_ratio}")
+    print(f"{'mode':<10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'commits':>9}")
+    for mode in args.modes:
+        url = f"sqlite+aiosqlite:///{os.path.join(_dir, f'{mode}.db')}"
+        ids = await seed(url, args.users, args.tasks_per_user)
+        sessions, engines, writer = setup(mode, url)
+        r = await run(sessions, ids, args)
+        commits = writer.stats()["commits"] if writer else "-"
+        if writer:
+            await writer.close()
+        for engine in engines:
+            await engine.dispose()
+        print(f"{mode:<10}{r['throughput']:>9.1f}{r['p50']:>9.1f}{r['p95']:>9.1f}{r['p99']:>9.1f}{r['errors']:>8}{commits:>9}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks-per-user", type=int, default=5)
+    parser.add_argument("--read-ratio", type=int, default=4, help="every Nth request is a read; 0 for writes only")
+    parser.add_argument("--modes", nargs="*", default=["default", "wal"])
+    asyncio.run(main(parser.parse_args()))
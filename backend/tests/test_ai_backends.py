@@ -0,0 +1,96 @@
+import pytest
+import pytest_asyncio
+import asyncio
+import os
+import random
+import time
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from google.genai import errors
+from app.main import app
+from app.database import engine, Base
+from app import ai_client
+from app.ai_backends import FakeBackend, RecordingBackend, LatencyModel, fixture_key
+from app.circuit_breaker import CircuitBreaker
+from app.label_classifier import label_classifier
+
+MODEL = ai_client.DEFAULT_MODEL
+
+@pytest.mark.asyncio
+async def test_replays_fixtures_by_prompt_hash():
+    fixtures = {fixture_key("Classify: run", MODEL, False): "Physical Training"}
+    backend = FakeBackend(fixtures=fixtures)
+    # Indentation differences don't change the hash
+    response = await backend.agenerate(MODEL, "\n   Classify:   run\n", False)
+    assert response.text == "Physical Training"
+    assert (await backend.agenerate(MODEL, "unknown prompt", True)).text == "{}"
+    assert backend.replayed == 1
+    assert backend.calls == 2
+
+def test_latency_models():
+    rng = random.Random(1)
+    assert LatencyModel("fixed:0.25").sample(rng) == 0.25
+    samples = [LatencyModel("uniform:0.1:0.2").sample(rng) for _ in range(100)]
+    assert all(0.1 <= s <= 0.2 for s in samples)
+    samples = sorted(LatencyModel("lognormal:0.5:0.5").sample(rng) for _ in range(1000))
+    assert 0.4 < samples[500] < 0.6
+    with pytest.raises(ValueError):
+        LatencyModel("gamma:1")
+
+@pytest.mark.asyncio
+async def test_error_rate_and_streaming():
+    backend = FakeBackend(error_rate=1.0, seed=3)
+    with pytest.raises(errors.ServerError):
+        await backend.agenerate(MODEL, "hi", False)
+
+    backend = FakeBackend(default_text="one two three four five", chunk_words=2)
+    chunks = [c async for c in backend.astream(MODEL, "hi", False)]
+    assert chunks == ["one two ", "three four ", "five"]
+
+@pytest.mark.asyncio
+async def test_recording_round_trip(tmp_path):
+    path = str(tmp_path / "fixtures.json")
+    recorder = RecordingBackend(FakeBackend(default_text="Roger that."), path)
+    await recorder.agenerate(MODEL, "Say something", False)
+
+    replay = FakeBackend.from_file(path, default_text="not recorded")
+    assert (await replay.agenerate(MODEL, "Say something", False)).text == "Roger that."
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(ai_client, "breaker", CircuitBreaker(failure_threshold=100, reset_timeout=30))
+    monkeypatch.setattr(label_classifier, "threshold", 1.1)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        # No API key at all: offline mode must not need one
+        resp = await ac.post("/api/auth/register", json={"username": f"fake_{uuid.uuid4().hex[:6]}"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        yield ac
+
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_routes_run_offline_with_injected_latency(client, monkeypatch):
+    backend = FakeBackend(latency="fixed:0.05", default_json='{"approved": true, "feedback": "Earned."}')
+    monkeypatch.setattr(ai_client, "backend_override", backend)
+
+    start = time.perf_counter()
+    resp = await client.post("/api/ai/goal-completion-verdict", json={"goalDescription": "Marathon", "completionProof": "Medal"})
+    assert resp.json() == {"approved": True, "feedback": "Earned."}
+    assert time.perf_counter() - start >= 0.05
+
+    resp = await client.post("/api/ai/enhance-text", json={"text": "run", "type": "task"})
+    assert resp.json() == {"enhanced_text": backend.default_text}
+    assert backend.calls == 2
+
+@pytest.mark.asyncio
+async def test_injected_errors_hit_fallbacks(client, monkeypatch):
+    monkeypatch.setattr(ai_client, "backend_override", FakeBackend(error_rate=1.0))
+    resp = await client.post("/api/ai/chat", json={"messages": [{"sender": "user", "content": "hi"}]})
+    assert resp.json() == {"response": "Radio silence. (Offline)"}
+    assert ai_client.breaker.consecutive_failures == 1
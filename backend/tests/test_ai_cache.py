@@ -0,0 +1,126 @@
+import pytest
+import pytest_asyncio
+import os
+import time
+import uuid
+from types import SimpleNamespace
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client, ai_cache
+from app.label_classifier import label_classifier
+from app.ai_cache import AIResponseCache, SQLiteCacheTier, cache_key
+
+TTLS = {"label": 60, "contract": 60}
+
+def test_key_normalizes_whitespace():
+    a = cache_key("label", "  Classify\n        this   text ", "m", False)
+    b = cache_key("label", "Classify this text", "m", False)
+    assert a == b
+    assert a != cache_key("label", "Classify this text", "m", True)
+    assert a != cache_key("contract", "Classify this text", "m", False)
+    assert a != cache_key("label", "Classify this text", "other-model", False)
+
+@pytest.mark.asyncio
+async def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ai_cache.time, "time", lambda: now[0])
+    cache = AIResponseCache(10, TTLS)
+    await cache.set("label", "k", "Discipline")
+    assert await cache.get("label", "k") == "Discipline"
+    now[0] += 61
+    assert await cache.get("label", "k") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_lru_bound():
+    cache = AIResponseCache(2, TTLS)
+    await cache.set("label", "a", "1")
+    await cache.set("label", "b", "2")
+    assert await cache.get("label", "a") == "1"
+    await cache.set("label", "c", "3") # evicts b
+    assert await cache.get("label", "b") is None
+    assert await cache.get("label", "a") == "1"
+    assert cache.stats()["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_persistent_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "ai_cache.db")
+    cache = AIResponseCache(10, TTLS, SQLiteCacheTier(path))
+    await cache.set("contract", "k", '{"primaryObjective": "x"}')
+
+    restarted = AIResponseCache(10, TTLS, SQLiteCacheTier(path))
+    assert await restarted.get("contract", "k") == '{"primaryObjective": "x"}'
+    assert restarted.stats()["persistent_hits"] == 1
+    # Promoted into memory for the next lookup
+    assert await restarted.get("contract", "k") == '{"primaryObjective": "x"}'
+    assert restarted.stats()["hits"] == 1
+
+def test_memory_hit_is_fast():
+    cache = AIResponseCache(10, TTLS)
+    cache._remember("k", "Discipline", time.time() + 60)
+    start = time.perf_counter()
+    for _ in range(1000):
+        cache.get_memory("k", time.time())
+    assert (time.perf_counter() - start) / 1000 < 0.0001
+
+class CountingModels:
+    calls = 0
+    text = "Discipline"
+
+    async def generate_content(self, model, contents, config=None):
+        CountingModels.calls += 1
+        return SimpleNamespace(text=self.text)
+
+class FakeClient:
+    def __init__(self, api_key=None, **kwargs):
+        self.aio = SimpleNamespace(models=CountingModels())
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(ai_client.genai, "Client", FakeClient)
+    monkeypatch.setattr(ai_client, "response_cache", AIResponseCache(10, ai_cache.ENDPOINT_TTLS))
+    monkeypatch.setattr(CountingModels, "calls", 0)
+    # Disable the local fast path so these tests exercise the Gemini path
+    monkeypatch.setattr(label_classifier, "threshold", 1.1)
+    ai_client.client_pool.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"cache_{uuid.uuid4().hex[:6]}", "api_key": "fake-key"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        yield ac
+
+    ai_client.client_pool.clear()
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_label_served_from_cache(client):
+    first = await client.post("/api/ai/label", json={"text": "Pushups until failure"})
+    second = await client.post("/api/ai/label", json={"text": "Pushups until failure"})
+    assert first.json() == second.json() == {"label": "Discipline"}
+    assert CountingModels.calls == 1
+
+    await client.post("/api/ai/label", json={"text": "Cold shower"})
+    assert CountingModels.calls == 2
+
+@pytest.mark.asyncio
+async def test_creative_endpoints_not_cached(client):
+    payload = {"reflection": "Ran at 5am", "goals": []}
+    await client.post("/api/ai/reflection-feedback", json=payload)
+    await client.post("/api/ai/reflection-feedback", json=payload)
+    assert CountingModels.calls == 2
+
+@pytest.mark.asyncio
+async def test_invalid_json_not_cached(client, monkeypatch):
+    monkeypatch.setattr(CountingModels, "text", "not json")
+    payload = {"description": "Run a marathon", "type": "goal"}
+    first = await client.post("/api/ai/contract", json=payload)
+    assert first.json()["fiveWhys"] == ["Stub"] * 5
+    await client.post("/api/ai/contract", json=payload)
+    assert CountingModels.calls == 2
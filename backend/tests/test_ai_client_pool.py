@@ -0,0 +1,54 @@
+import pytest
+from app import ai_client
+from app.ai_client import GenAIClientPool
+
+class FakeClient:
+    def __init__(self, api_key=None, **kwargs):
+        self.api_key = api_key
+
+@pytest.fixture(autouse=True)
+def fake_genai(monkeypatch):
+    monkeypatch.setattr(ai_client.genai, "Client", FakeClient)
+
+def test_same_key_reuses_client():
+    pool = GenAIClientPool(max_size=4, idle_seconds=60)
+    first = pool.get("key-a")
+    assert pool.get("key-a") is first
+    assert pool.get("key-b") is not first
+
+    stats = pool.stats()
+    assert stats["live_clients"] == 2
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+def test_lru_eviction():
+    pool = GenAIClientPool(max_size=2, idle_seconds=60)
+    a = pool.get("key-a")
+    pool.get("key-b")
+    pool.get("key-a") # a is now most recently used
+    pool.get("key-c") # evicts b
+
+    assert pool.stats()["evictions"] == 1
+    assert pool.get("key-a") is a
+    assert pool.stats()["live_clients"] == 2
+    misses = pool.misses
+    pool.get("key-b")
+    assert pool.misses == misses + 1
+
+def test_idle_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ai_client.time, "monotonic", lambda: now[0])
+    pool = GenAIClientPool(max_size=4, idle_seconds=30)
+    a = pool.get("key-a")
+    now[0] += 31
+    assert pool.get("key-a") is not a
+    assert pool.stats()["expirations"] == 1
+
+def test_model_wrapper_uses_pool(monkeypatch):
+    pool = GenAIClientPool(max_size=4, idle_seconds=60)
+    monkeypatch.setattr(ai_client, "client_pool", pool)
+    first = ai_client.GenAIModelWrapper("shared", ai_client.DEFAULT_MODEL)
+    second = ai_client.GenAIModelWrapper("shared", ai_client.DEFAULT_MODEL, json_mode=True)
+    assert first.backend.client is second.backend.client
+    assert pool.stats()["live_clients"] == 1
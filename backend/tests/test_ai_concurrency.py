@@ -0,0 +1,123 @@
+import pytest
+import pytest_asyncio
+import asyncio
+import os
+import time
+import uuid
+from types import SimpleNamespace
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client
+
+STORY_DELAY = 2.0
+
+class FakeAsyncModels:
+    delay = STORY_DELAY
+
+    async def generate_content(self, model, contents, config=None):
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(text="Stay hard. Carry the boats.")
+
+class FakeSyncModels:
+    def generate_content(self, model, contents, config=None):
+        raise AssertionError("Blocking Gemini client used inside the event loop")
+
+class FakeClient:
+    def __init__(self, api_key=None, **kwargs):
+        self.models = FakeSyncModels()
+        self.aio = SimpleNamespace(models=FakeAsyncModels())
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(ai_client.genai, "Client", FakeClient)
+    ai_client.client_pool.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+    ai_client.client_pool.clear()
+    await engine.dispose()
+
+async def register(client):
+    resp = await client.post("/api/auth/register", json={"username": f"load_{uuid.uuid4().hex[:6]}", "api_key": "fake-key"})
+    assert resp.status_code == 200
+    return {"Authorization": f"Bearer {resp.json()['token']}"}
+
+def p99(samples):
+    ordered = sorted(samples)
+    return ordered[int(0.99 * (len(ordered) - 1))]
+
+async def sample_task_latency(client, headers, n=30):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        resp = await client.get("/api/tasks", headers=headers)
+        samples.append(time.perf_counter() - start)
+        assert resp.status_code == 200
+    return samples
+
+def story_payload(i):
+    # Distinct prompts, so identical-request coalescing doesn't collapse the load
+    return {
+        "task": {
+            "id": f"task-{i}",
+            "date": "2023-12-18",
+            "description": f"Run {i} miles",
+            "difficulty": "Hard",
+            "completed": False,
+            "category": "Physical",
+            "estimatedTime": 45.0
+        },
+        "goals": [],
+    }
+
+@pytest.mark.asyncio
+async def test_tasks_latency_flat_while_stories_in_flight(client, monkeypatch):
+    monkeypatch.setattr(ai_client.limiter, "limit", 50)
+    headers = await register(client)
+
+    baseline = await sample_task_latency(client, headers)
+
+    stories = [asyncio.create_task(client.post("/api/ai/story", json=story_payload(i), headers=headers)) for i in range(50)]
+    deadline = time.perf_counter() + STORY_DELAY
+    while ai_client.limiter.in_flight < 50 and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    assert ai_client.limiter.in_flight == 50
+
+    loaded = await sample_task_latency(client, headers)
+    # Every story call must still be pending, otherwise we measured an idle server
+    assert not any(s.done() for s in stories)
+
+    results = await asyncio.gather(*stories)
+    assert all(r.status_code == 200 for r in results)
+    assert all("offline" not in r.json()["story"].lower() for r in results)
+
+    print(f"\n/api/tasks p99 idle={p99(baseline)*1000:.1f}ms loaded={p99(loaded)*1000:.1f}ms")
+    assert p99(loaded) < p99(baseline) + 0.25
+    assert p99(loaded) < STORY_DELAY / 4
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_is_enforced(client, monkeypatch):
+    monkeypatch.setattr(ai_client.limiter, "limit", 5)
+    monkeypatch.setattr(FakeAsyncModels, "delay", 0.2)
+    headers = await register(client)
+
+    peak = 0
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, ai_client.limiter.in_flight)
+            await asyncio.sleep(0.005)
+
+    watcher = asyncio.create_task(watch())
+    results = await asyncio.gather(*[client.post("/api/ai/story", json=story_payload(i), headers=headers) for i in range(12)])
+    watcher.cancel()
+
+    assert all(r.status_code == 200 for r in results)
+    assert peak == 5
@@ -0,0 +1,144 @@
+import pytest
+import pytest_asyncio
+import asyncio
+import datetime
+import json
+import os
+import uuid
+from types import SimpleNamespace
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
+from google.genai import errors
+from app.main import app
+from app.database import engine, Base, AsyncSessionLocal
+from app import ai_client, ai_jobs, models
+from app.ai_jobs import AIJobQueue, job_queue
+from app.schemas import AIReviewRequest
+
+REVIEW = {"good": ["Ran daily"], "bad": ["Skipped sleep"], "suggestions": {"keep": [], "remove": [], "add": []}}
+
+class SlowModels:
+    async def generate_content(self, model, contents, config=None):
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(text=json.dumps(REVIEW))
+
+class FakeClient:
+    def __init__(self, api_key=None, **kwargs):
+        self.aio = SimpleNamespace(models=SlowModels())
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(ai_client.genai, "Client", FakeClient)
+    ai_client.client_pool.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+    await job_queue.shutdown()
+    ai_client.client_pool.clear()
+    await engine.dispose()
+
+async def register(client):
+    resp = await client.post("/api/auth/register", json={"username": f"job_{uuid.uuid4().hex[:6]}", "api_key": "fake-key"})
+    return resp.json()["user"]["id"], {"Authorization": f"Bearer {resp.json()['token']}"}
+
+REVIEW_PAYLOAD = {"reviewData": {"week": 1}, "goals": [], "sideQuests": []}
+
+@pytest.mark.asyncio
+async def test_submit_returns_immediately_and_result_is_persisted(client):
+    _, headers = await register(client)
+    resp = await client.post("/api/ai/jobs/review", json=REVIEW_PAYLOAD, headers=headers)
+    assert resp.status_code == 202
+    job = resp.json()
+    assert job["status"] == "queued"
+    assert job["result"] is None
+
+    await job_queue.drain()
+    done = (await client.get(f"/api/ai/jobs/{job['id']}", headers=headers)).json()
+    assert done["status"] == "succeeded"
+    assert done["result"] == REVIEW
+
+@pytest.mark.asyncio
+async def test_jobs_are_private(client):
+    _, owner = await register(client)
+    _, other = await register(client)
+    job = (await client.post("/api/ai/jobs/contract", json={"description": "Run a marathon"}, headers=owner)).json()
+    assert (await client.get(f"/api/ai/jobs/{job['id']}", headers=other)).status_code == 404
+    await job_queue.drain()
+
+@pytest.mark.asyncio
+async def test_recover_requeues_and_fails_interrupted(client):
+    user_id, headers = await register(client)
+    async with AsyncSessionLocal() as db:
+        db.add(models.AIJob(id="queued-job", user_id=user_id, kind="weekly-briefing", status="queued",
+                            request={"previousWeekEvaluations": [], "nextWeekGoals": [], "longTermGoals": []}))
+        db.add(models.AIJob(id="running-job", user_id=user_id, kind="review", status="running", request=REVIEW_PAYLOAD))
+        await db.commit()
+
+    await job_queue.recover()
+    await job_queue.drain()
+
+    queued = (await client.get("/api/ai/jobs/queued-job", headers=headers)).json()
+    running = (await client.get("/api/ai/jobs/running-job", headers=headers)).json()
+    assert queued["status"] == "succeeded"
+    assert "briefing" in queued["result"]
+    assert running["status"] == "failed"
+    assert running["error"] == "Interrupted by server restart"
+
+@pytest.mark.asyncio
+async def test_recover_leaves_jobs_of_live_workers(client):
+    user_id, headers = await register(client)
+    now = datetime.datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        db.add(models.AIJob(id="live-job", user_id=user_id, kind="review", status="running", request=REVIEW_PAYLOAD,
+                            worker_id="other-process", heartbeat_at=now))
+        db.add(models.AIJob(id="dead-job", user_id=user_id, kind="review", status="running", request=REVIEW_PAYLOAD,
+                            worker_id="other-process", heartbeat_at=now - datetime.timedelta(seconds=ai_jobs.AI_JOB_LEASE_SECONDS + 1)))
+        await db.commit()
+
+    await job_queue.recover()
+    assert (await client.get("/api/ai/jobs/live-job", headers=headers)).json()["status"] == "running"
+    assert (await client.get("/api/ai/jobs/dead-job", headers=headers)).json()["status"] == "failed"
+
+@pytest.mark.asyncio
+async def test_a_job_is_claimed_by_one_process(client):
+    user_id, _ = await register(client)
+    calls = []
+    async def handler(request, user):
+        calls.append(user.id)
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+    queues = [AIJobQueue(workers=1) for _ in range(2)]
+    for queue in queues:
+        queue.register("probe", AIReviewRequest, handler)
+    async with AsyncSessionLocal() as db:
+        db.add(models.AIJob(id="shared-job", user_id=user_id, kind="probe", status="queued", request=REVIEW_PAYLOAD))
+        await db.commit()
+
+    # Both processes found the job queued at startup
+    await asyncio.gather(*(queue._run("shared-job") for queue in queues))
+    assert calls == [user_id]
+    async with AsyncSessionLocal() as db:
+        job = await db.get(models.AIJob, "shared-job")
+    assert (job.status, job.result) == ("succeeded", {"ok": True})
+    assert job.worker_id in {queue.worker_id for queue in queues}
+
+@pytest.mark.asyncio
+async def test_failed_generation_fails_the_job(client, monkeypatch):
+    async def broken(self, model, contents, config=None):
+        raise errors.ServerError(503, {"error": {"message": "overloaded"}})
+    monkeypatch.setattr(SlowModels, "generate_content", broken)
+    _, headers = await register(client)
+    job = (await client.post("/api/ai/jobs/review", json=REVIEW_PAYLOAD, headers=headers)).json()
+    await job_queue.drain()
+
+    done = (await client.get(f"/api/ai/jobs/{job['id']}", headers=headers)).json()
+    assert done["status"] == "failed"
+    assert done["result"] is None
+    # The synchronous route still answers with its fallback
+    assert (await client.post("/api/ai/review", json=REVIEW_PAYLOAD, headers=headers)).json()["good"] == ["You showed up"]
@@ -0,0 +1,103 @@
+import pytest
+import pytest_asyncio
+import asyncio
+import json
+import os
+import re
+import uuid
+from types import SimpleNamespace
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client
+from app.label_classifier import label_classifier
+from app.routers import ai as ai_router
+from app.routers.ai import _pack_label_batches, LABEL_BATCH_MAX_ITEMS
+
+class FakeAsyncModels:
+    calls = 0
+    in_flight = 0
+    max_in_flight = 0
+    fail_batches_containing = None
+
+    async def generate_content(self, model, contents, config=None):
+        FakeAsyncModels.calls += 1
+        FakeAsyncModels.in_flight += 1
+        FakeAsyncModels.max_in_flight = max(FakeAsyncModels.max_in_flight, FakeAsyncModels.in_flight)
+        await asyncio.sleep(0.01)
+        FakeAsyncModels.in_flight -= 1
+        items = [json.loads(line) for line in re.findall(r'^\s*(\{"index".*\})\s*$', contents, re.M)]
+        if self.fail_batches_containing is not None and any(i["index"] == self.fail_batches_containing for i in items):
+            return SimpleNamespace(text="garbage")
+        labels = [{"index": i["index"], "label": "Recovery" if "sleep" in i["text"] else "Physical Training"} for i in items]
+        # Drop one item to simulate a partial answer
+        labels = [l for l in labels if "skip" not in items[[i["index"] for i in items].index(l["index"])]["text"]]
+        return SimpleNamespace(text=json.dumps(labels))
+
+class FakeClient:
+    def __init__(self, api_key=None, **kwargs):
+        self.aio = SimpleNamespace(models=FakeAsyncModels())
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(ai_client.genai, "Client", FakeClient)
+    monkeypatch.setattr(FakeAsyncModels, "calls", 0)
+    monkeypatch.setattr(FakeAsyncModels, "max_in_flight", 0)
+    # Disable the local fast path so these tests exercise the Gemini path
+    monkeypatch.setattr(label_classifier, "threshold", 1.1)
+    ai_client.client_pool.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"batch_{uuid.uuid4().hex[:6]}", "api_key": "fake-key"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        yield ac
+
+    ai_client.client_pool.clear()
+    await engine.dispose()
+
+def test_packing_respects_item_and_char_limits():
+    assert _pack_label_batches([]) == []
+    batches = _pack_label_batches(["run"] * 120)
+    assert [len(b) for b in batches] == [LABEL_BATCH_MAX_ITEMS, LABEL_BATCH_MAX_ITEMS, 20]
+    assert sum(batches, []) == list(range(120))
+
+    batches = _pack_label_batches(["x" * 15000, "y" * 15000, "z"])
+    assert batches == [[0], [1, 2]]
+
+@pytest.mark.asyncio
+async def test_batch_labels_in_input_order(client):
+    texts = [f"pushups set {i}" for i in range(100)] + ["sleep 8 hours"]
+    resp = await client.post("/api/ai/label/batch", json={"texts": texts})
+    data = resp.json()
+    assert resp.status_code == 200
+    assert len(data["labels"]) == 101
+    assert data["labels"][0] == "Physical Training"
+    assert data["labels"][-1] == "Recovery"
+    assert FakeAsyncModels.calls == 3
+    assert [b["size"] for b in data["batches"]] == [50, 50, 1]
+    assert all("elapsedMs" in b for b in data["batches"])
+
+@pytest.mark.asyncio
+async def test_failed_items_fall_back_to_general(client, monkeypatch):
+    texts = ["run", "skip this one"] + [f"row {i}" for i in range(60)]
+    monkeypatch.setattr(FakeAsyncModels, "fail_batches_containing", 55)
+    data = (await client.post("/api/ai/label/batch", json={"texts": texts})).json()
+    assert data["labels"][0] == "Physical Training"
+    assert data["labels"][1] == "General" # missing from the model answer
+    assert data["labels"][55] == "General" # whole batch failed
+    assert [b["failed"] for b in data["batches"]] == [False, True]
+
+@pytest.mark.asyncio
+async def test_batch_size_and_fan_out_are_capped(client, monkeypatch):
+    resp = await client.post("/api/ai/label/batch", json={"texts": ["run"] * 1001})
+    assert resp.status_code == 422
+
+    monkeypatch.setattr(ai_router, "LABEL_BATCH_CONCURRENCY", 2)
+    data = (await client.post("/api/ai/label/batch", json={"texts": [f"row {i}" for i in range(300)]})).json()
+    assert len(data["batches"]) == 6
+    assert FakeAsyncModels.max_in_flight == 2
@@ -0,0 +1,93 @@
+import pytest
+import pytest_asyncio
+import os
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client, dependencies
+from app.ai_backends import FakeBackend
+from app.ai_cache import response_cache
+from app.ai_metrics import ai_metrics, Histogram, user_key
+from app.circuit_breaker import CircuitBreaker
+from app.label_classifier import label_classifier
+
+def test_histogram_buckets_and_quantiles():
+    hist = Histogram(buckets=(0.1, 1, 10))
+    for value in (0.05, 0.05, 0.5, 20):
+        hist.observe(value)
+    assert hist.cumulative() == [(0.1, 2), (1, 3), (10, 3), ("+Inf", 4)]
+    assert hist.quantile(0.5) == 0.1
+    assert hist.snapshot()["p99"] is None
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(ai_client, "breaker", CircuitBreaker(failure_threshold=100, reset_timeout=30))
+    monkeypatch.setattr(label_classifier, "threshold", 1.1)
+    ai_metrics.reset()
+    response_cache.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"metrics_{uuid.uuid4().hex[:6]}"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        ac.user_id = resp.json()["user"]["id"]
+        yield ac
+
+    ai_metrics.reset()
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_calls_cache_hits_and_users_are_counted(client, monkeypatch):
+    monkeypatch.setattr(ai_client, "backend_override", FakeBackend(default_text="Discipline"))
+    for _ in range(3):
+        await client.post("/api/ai/label", json={"text": "Something vague"})
+    await client.post("/api/ai/enhance-text", json={"text": "run", "type": "task"})
+
+    snapshot = ai_metrics.snapshot()
+    label = snapshot["endpoints"]["label"]
+    assert label["calls"] == 3
+    assert label["cache_hits"] == 2
+    assert label["upstream_calls"] == 1
+    assert label["latency"]["count"] == 3
+    assert label["response_chars"] == 3 * len("Discipline")
+    assert label["prompt_tokens"] > 0
+    # Keyed by a hash: user ids are bearer tokens
+    assert snapshot["users"] == {user_key(client.user_id): 4}
+
+@pytest.mark.asyncio
+async def test_fallbacks_by_exception_type(client, monkeypatch):
+    monkeypatch.setattr(ai_client, "backend_override", FakeBackend(error_rate=1.0))
+    await client.post("/api/ai/chat", json={"messages": [{"sender": "user", "content": "hi"}]})
+    monkeypatch.setattr(ai_client, "backend_override", FakeBackend(default_json="not json"))
+    await client.post("/api/ai/review", json={"reviewData": {}, "goals": [], "sideQuests": []})
+
+    endpoints = ai_metrics.snapshot()["endpoints"]
+    assert endpoints["chat"]["errors"] == {"ServerError": 1}
+    assert endpoints["chat"]["fallbacks"] == {"ServerError": 1}
+    assert endpoints["review"]["errors"] == {}
+    assert endpoints["review"]["fallbacks"] == {"JSONDecodeError": 1}
+
+    monkeypatch.setattr(dependencies, "OPERATOR_TOKEN", "ops")
+    resp = await client.get("/api/ai/metrics", headers={"Authorization": "Bearer ops"})
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'ai_fallbacks_total{endpoint="chat",exception="ServerError"} 1' in resp.text
+    assert 'ai_request_duration_seconds_count{endpoint="review"} 1' in resp.text
+    resp = await client.get("/api/ai/metrics?format=json", headers={"X-Operator-Token": "ops"})
+    assert resp.json()["endpoints"]["chat"]["calls"] == 1
+    assert client.user_id not in resp.text
+
+@pytest.mark.asyncio
+async def test_operator_endpoints_need_the_operator_token(client, monkeypatch):
+    # A user's own token is not enough, and without OPERATOR_TOKEN the endpoints are off
+    for path in ("/api/ai/metrics?format=json", "/api/ai/stats"):
+        assert (await client.get(path)).status_code == 403
+    monkeypatch.setattr(dependencies, "OPERATOR_TOKEN", "ops")
+    for path in ("/api/ai/metrics?format=json", "/api/ai/stats"):
+        assert (await client.get(path)).status_code == 403
+        assert (await client.get(path, headers={"X-Operator-Token": "wrong"})).status_code == 403
+        assert (await client.get(path, headers={"X-Operator-Token": "ops"})).status_code == 200
@@ -0,0 +1,109 @@
+import pytest
+import pytest_asyncio
+import json
+import os
+import uuid
+from types import SimpleNamespace
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client
+from app.circuit_breaker import CircuitBreaker
+
+CHUNKS = ["Stay ", "hard. ", "Carry the boats."]
+
+class FakeAsyncModels:
+    fail = False
+
+    async def generate_content(self, model, contents, config=None):
+        if self.fail:
+            raise RuntimeError("Gemini down")
+        return SimpleNamespace(text="".join(CHUNKS))
+
+    async def generate_content_stream(self, model, contents, config=None):
+        if self.fail:
+            raise RuntimeError("Gemini down")
+        async def chunks():
+            for text in CHUNKS:
+                yield SimpleNamespace(text=text)
+        return chunks()
+
+class FakeClient:
+    def __init__(self, api_key=None, **kwargs):
+        self.aio = SimpleNamespace(models=FakeAsyncModels())
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(ai_client.genai, "Client", FakeClient)
+    monkeypatch.setattr(ai_client, "breaker", CircuitBreaker(failure_threshold=5, reset_timeout=30))
+    ai_client.client_pool.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"sse_{uuid.uuid4().hex[:6]}", "api_key": "fake-key"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        yield ac
+
+    ai_client.client_pool.clear()
+    await engine.dispose()
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        event = "message"
+        data = None
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        events.append((event, data))
+    return events
+
+CHAT_PAYLOAD = {"messages": [{"sender": "user", "content": "I want to quit"}]}
+BRIEFING_PAYLOAD = {"previousWeekEvaluations": [], "nextWeekGoals": [], "longTermGoals": []}
+
+@pytest.mark.asyncio
+async def test_chat_stream_forwards_chunks(client):
+    resp = await client.post("/api/ai/chat/stream", json=CHAT_PAYLOAD)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(resp.text)
+    assert [d["text"] for e, d in events if e == "message"] == CHUNKS
+    assert events[-1][0] == "done"
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_when_offline(client, monkeypatch):
+    monkeypatch.setattr(FakeAsyncModels, "fail", True)
+    resp = await client.post("/api/ai/weekly-briefing/stream", json=BRIEFING_PAYLOAD)
+    events = parse_sse(resp.text)
+    assert events[0] == ("message", {"text": "New week. New war. Get after it.", "fallback": True})
+    assert events[-1][0] == "done"
+
+    resp = await client.post("/api/ai/chat/stream", json=CHAT_PAYLOAD)
+    assert parse_sse(resp.text)[0][1]["text"] == "Radio silence. (Offline)"
+
+@pytest.mark.asyncio
+async def test_story_stream_and_plain_contract(client):
+    payload = {
+        "task": {
+            "id": "task-1",
+            "date": "2023-12-18",
+            "description": "Run 5 miles",
+            "difficulty": "Hard",
+            "completed": False,
+            "category": "Physical",
+            "estimatedTime": 45.0
+        },
+        "goals": [],
+    }
+    streamed = parse_sse((await client.post("/api/ai/story/stream", json=payload)).text)
+    assert "".join(d["text"] for e, d in streamed if e == "message") == "".join(CHUNKS)
+
+    # The non-streaming contract is unchanged
+    plain = await client.post("/api/ai/story", json=payload)
+    assert plain.json() == {"story": "".join(CHUNKS).strip()}
@@ -0,0 +1,78 @@
+import pytest
+import pytest_asyncio
+import json
+import os
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client, dependencies
+from app.ai_backends import FakeBackend
+from app.ai_cache import response_cache
+from app.alignment_memo import normalize_description, goals_hash
+from types import SimpleNamespace
+
+GOAL = {"id": "g1", "description": "Run a marathon", "targetDate": "2026-12-31"}
+ANSWER = {"alignmentScore": 9, "justification": "Direct training.", "alignedGoalId": "g1"}
+
+def test_keys():
+    assert normalize_description("  Run 5   Miles. ") == normalize_description("run 5 miles")
+    a = SimpleNamespace(id="a", description="Run"); b = SimpleNamespace(id="b", description="Read")
+    assert goals_hash([a, b]) == goals_hash([b, a])
+    assert goals_hash([a]) != goals_hash([SimpleNamespace(id="a", description="Run far")])
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    backend = FakeBackend(default_json=json.dumps(ANSWER))
+    monkeypatch.setattr(ai_client, "backend_override", backend)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"memo_{uuid.uuid4().hex[:6]}"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        ac.backend = backend
+        yield ac
+
+    await engine.dispose()
+
+async def analyze(client, description, goals):
+    # The response cache would hide the memo; clear it so only the memo can answer
+    response_cache.clear()
+    resp = await client.post("/api/ai/analyze-goal-alignment", json={"taskDescription": description, "activeGoals": goals})
+    return resp.json()
+
+@pytest.mark.asyncio
+async def test_unchanged_goals_are_answered_from_memo(client):
+    await client.post("/api/goals", json=GOAL)
+    assert await analyze(client, "Run 10 miles", [GOAL]) == ANSWER
+    assert await analyze(client, "run 10 miles.", [GOAL]) == ANSWER
+    assert client.backend.calls == 1
+
+    # A different goal set is a different key
+    await analyze(client, "Run 10 miles", [GOAL, dict(GOAL, id="g2", description="Read 20 books")])
+    assert client.backend.calls == 2
+
+@pytest.mark.asyncio
+async def test_goal_edit_and_delete_invalidate(client, monkeypatch):
+    monkeypatch.setattr(dependencies, "OPERATOR_TOKEN", "ops")
+    await client.post("/api/goals", json=GOAL)
+    await analyze(client, "Run 10 miles", [GOAL])
+    await client.put("/api/goals/g1", json=dict(GOAL, completed=True))
+    await analyze(client, "Run 10 miles", [GOAL])
+    assert client.backend.calls == 2
+
+    await client.delete("/api/goals/g1")
+    await analyze(client, "Run 10 miles", [GOAL])
+    assert client.backend.calls == 3
+    assert (await client.get("/api/ai/stats", headers={"X-Operator-Token": "ops"})).json()["alignment_memo"]["invalidations"] >= 2
+
+@pytest.mark.asyncio
+async def test_fallbacks_are_not_memoized(client, monkeypatch):
+    monkeypatch.setattr(ai_client, "backend_override", FakeBackend(default_json="not json"))
+    assert (await analyze(client, "Run 10 miles", [GOAL]))["alignmentScore"] == 5
+    monkeypatch.setattr(ai_client, "backend_override", client.backend)
+    assert await analyze(client, "Run 10 miles", [GOAL]) == ANSWER
@@ -0,0 +1,94 @@
+import pytest
+import pytest_asyncio
+import datetime
+import json
+import os
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client
+from app.ai_backends import FakeBackend
+from app.ai_jobs import job_queue
+from app.betting_odds import UserBettingStats, betting_stats, time_bucket, BETTING_ODDS_MAX
+
+YESTERDAY = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+TOMORROW = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+BET = {"description": "Run 10 miles", "difficulty": "Hard", "category": "Physical Training", "estimatedTime": 90}
+
+def test_history_moves_odds_away_from_prior():
+    stats = UserBettingStats(datetime.date(2026, 1, 1))
+    prior = stats.odds("Hard", "Physical Training", 90)
+    assert prior.sample_size == 0
+
+    stats.apply([("Hard", "Physical Training", time_bucket(90), True)] * 20)
+    reliable = stats.odds("Hard", "Physical Training", 90)
+    assert reliable.multiplier < prior.multiplier
+    assert reliable.sample_size == 20
+
+    stats.apply([("Hard", "Physical Training", time_bucket(90), True)] * 20, weight=-1)
+    stats.apply([("Hard", "Physical Training", time_bucket(90), False)] * 20)
+    assert stats.odds("Hard", "Physical Training", 90).multiplier == BETTING_ODDS_MAX
+
+def task(i, completed, date=YESTERDAY, **kw):
+    return {"id": f"t{i}", "date": date, "description": f"Run {i}", "difficulty": "Hard", "completed": completed,
+            "category": "Physical Training", "estimatedTime": 90, **kw}
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    backend = FakeBackend(default_json=json.dumps({"rationale": "Merry Christmas."}))
+    monkeypatch.setattr(ai_client, "backend_override", backend)
+    betting_stats.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"odds_{uuid.uuid4().hex[:6]}"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        ac.backend = backend
+        yield ac
+
+    await job_queue.shutdown()
+    betting_stats.clear()
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_odds_follow_history_without_a_model_call(client):
+    for i in range(8):
+        await client.post("/api/tasks", json=task(i, completed=True))
+    # Open tasks for tomorrow aren't failures yet
+    await client.post("/api/tasks", json=task(99, completed=False, date=TOMORROW))
+    await client.post("/api/recurring-tasks", json={
+        "id": "r1", "description": "Morning run", "difficulty": "Hard", "category": "Physical Training",
+        "recurrenceRule": "Daily", "startDate": "2026-01-01", "estimatedTime": 90,
+        "completions": {YESTERDAY: {"completed": True}, "2026-01-01": {"completed": True}},
+    })
+
+    odds = (await client.post("/api/ai/betting-odds", json=BET)).json()
+    assert odds["sampleSize"] == 10
+    assert odds["probability"] > 0.8
+    assert "10 on record" in odds["rationale"]
+    assert client.backend.calls == 0
+
+    # Incremental: failing tasks lower the odds without reloading from the DB
+    loads = betting_stats.loads
+    for i in range(10, 20):
+        await client.post("/api/tasks", json=task(i, completed=False))
+    worse = (await client.post("/api/ai/betting-odds", json=BET)).json()
+    assert worse["sampleSize"] == 20
+    assert worse["multiplier"] > odds["multiplier"]
+    await client.delete("/api/tasks/t10")
+    assert (await client.post("/api/ai/betting-odds", json=BET)).json()["sampleSize"] == 19
+    assert betting_stats.loads == loads
+
+@pytest.mark.asyncio
+async def test_ai_rationale_runs_as_background_job(client):
+    odds = (await client.post("/api/ai/betting-odds?ai_rationale=true", json=BET)).json()
+    await job_queue.drain()
+    job = (await client.get(f"/api/ai/jobs/{odds['rationaleJobId']}")).json()
+    assert job["status"] == "succeeded"
+    assert job["result"]["rationale"] == "Merry Christmas."
+    assert job["result"]["multiplier"] == odds["multiplier"]
@@ -0,0 +1,122 @@
+import pytest
+import pytest_asyncio
+import os
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from app.main import app
+from app.database import engine, Base
+from app.betting_odds import betting_stats
+
+def task(id, **fields):
+    return {"id": id, "date": "2026-01-05", "description": f"Run {id}", "difficulty": "Hard", "completed": False,
+            "category": "Physical Training", "estimatedTime": 30, **fields}
+
+MISSION = {
+    "description": "Morning run", "difficulty": "Hard", "category": "Physical Training",
+    "recurrenceRule": "Daily", "startDate": "2026-01-01", "estimatedTime": 90,
+}
+
+async def register(ac):
+    resp = await ac.post("/api/auth/register", json={"username": f"bulk_{uuid.uuid4().hex[:6]}"})
+    return {"Authorization": f"Bearer {resp.json()['token']}"}
+
+@pytest_asyncio.fixture
+async def client():
+    betting_stats.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        ac.headers.update(await register(ac))
+        yield ac
+
+    betting_stats.clear()
+    await engine.dispose()
+
+@pytest.fixture
+def statements():
+    # Write statements sent to the database, whatever the number of rows in each
+    sent = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith(("INSERT", "UPDATE", "DELETE")):
+            sent.append(statement.split()[0])
+    def commit(conn):
+        sent.append("COMMIT")
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    event.listen(engine.sync_engine, "commit", commit)
+    yield sent
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+    event.remove(engine.sync_engine, "commit", commit)
+
+@pytest.mark.asyncio
+async def test_task_bulk_is_set_based_with_per_item_results(client, statements):
+    await client.post("/api/tasks", json=task("old"))
+    await client.post("/api/tasks", json=task("gone"))
+    other = await register(client)
+    await client.post("/api/tasks", json=task("theirs"), headers=other)
+    statements.clear()
+
+    body = {
+        "upserts": [task(f"new{i}") for i in range(20)] + [task("old", betWon=False, betPlaced=True), task("theirs"),
+                                                           task("twice"), task("twice")],
+        "deletes": ["gone", "missing"],
+    }
+    resp = await client.post("/api/tasks/bulk", json=body)
+    status = {r["id"]: r["status"] for r in resp.json()["results"]}
+    assert [status[f"new{i}"] for i in range(20)] == [201] * 20
+    assert (status["old"], status["theirs"], status["twice"], status["gone"], status["missing"]) == (200, 404, 422, 204, 404)
+    # One INSERT, one UPDATE, one DELETE and one COMMIT for the whole batch
+    # (the COMMIT before them ends the auth lookup)
+    assert statements == ["COMMIT", "INSERT", "UPDATE", "DELETE", "COMMIT"]
+
+    tasks = {t["id"]: t for t in (await client.get("/api/tasks")).json()}
+    assert len(tasks) == 21 and "gone" not in tasks and "twice" not in tasks
+    assert (tasks["old"]["betWon"], tasks["old"]["betPlaced"]) == (False, True)
+    # Another user's row is untouched and not revealed
+    assert (await client.get("/api/tasks", headers=other)).json()[0]["description"] == "Run theirs"
+
+@pytest.mark.asyncio
+async def test_recurring_bulk_writes_partial_completion_maps(client):
+    await client.post("/api/recurring-tasks", json={**MISSION, "id": "r1", "completions": {
+        "2026-01-01": {"completed": True}, "2026-01-02": {"betPlaced": True, "betAmount": 5},
+    }})
+    resp = await client.post("/api/recurring-tasks/bulk", json={"upserts": [
+        # End-of-day settlement: only the lost date is sent
+        {**MISSION, "id": "r1", "completions": {"2026-01-02": {"betPlaced": True, "betAmount": 5, "betWon": False}}},
+        {**MISSION, "id": "r2", "description": "Evening run", "completions": {"2026-01-03": {"completed": True}}},
+    ]})
+    assert [r["status"] for r in resp.json()["results"]] == [200, 201]
+
+    tasks = {t["id"]: t for t in (await client.get("/api/recurring-tasks")).json()}
+    assert tasks["r1"]["completions"] == {
+        "2026-01-01": {"completed": True},
+        "2026-01-02": {"completed": False, "betPlaced": True, "betAmount": 5, "betWon": False},
+    }
+    assert tasks["r2"]["completions"] == {"2026-01-03": {"completed": True}}
+
+    resp = await client.post("/api/recurring-tasks/bulk", json={"deletes": ["r1"]})
+    assert resp.json()["results"] == [{"id": "r1", "status": 204, "error": None}]
+    assert (await client.get("/api/recurring-tasks/r1/completions")).status_code == 404
+    assert [t["id"] for t in (await client.get("/api/recurring-tasks")).json()] == ["r2"]
+
+@pytest.mark.asyncio
+async def test_side_quest_bulk_seeds_and_deletes(client):
+    quests = [{"id": f"q{i}", "description": f"Quest {i}", "difficulty": "Easy", "dailyGoal": 3,
+               "completions": {"2026-01-01": i}} for i in range(4)]
+    resp = await client.post("/api/side-quests/bulk", json={"upserts": quests})
+    assert [r["status"] for r in resp.json()["results"]] == [201] * 4
+
+    resp = await client.post("/api/side-quests/bulk", json={
+        "upserts": [{**quests[1], "completions": {"2026-01-01": 7}}], "deletes": ["q0"],
+    })
+    assert [r["status"] for r in resp.json()["results"]] == [200, 204]
+    listed = {q["id"]: q["completions"] for q in (await client.get("/api/side-quests")).json()}
+    # Counts of existing quests only change by increment, as on PUT
+    assert listed == {"q1": {"2026-01-01": 1}, "q2": {"2026-01-01": 2}, "q3": {"2026-01-01": 3}}
+
+    too_many = {"deletes": [f"q{i}" for i in range(1001)]}
+    assert (await client.post("/api/side-quests/bulk", json=too_many)).status_code == 422
@@ -0,0 +1,114 @@
+import pytest
+import pytest_asyncio
+import os
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from sqlalchemy.exc import IntegrityError
+from app.database import engine, Base, AsyncSessionLocal
+from app import models
+from app import ai_client
+from app.ai_backends import FakeBackend
+from app.ai_cache import response_cache
+from app import chat_memory
+from app.chat_memory import chat_summarizer, CHAT_WINDOW, CHAT_SUMMARY_BATCH
+
+class ScriptedBackend(FakeBackend):
+    """Answers summary prompts with a fixed summary and records chat prompts."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.prompts = []
+
+    def _respond(self, model_name, prompt, json_mode):
+        self.calls += 1
+        if "running summary" in prompt:
+            return "User is training for a marathon and hates mornings."
+        self.prompts.append(prompt)
+        return f"Reply {len(self.prompts)}"
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    backend = ScriptedBackend()
+    monkeypatch.setattr(ai_client, "backend_override", backend)
+    response_cache.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"chat_{uuid.uuid4().hex[:6]}"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        ac.backend = backend
+        yield ac
+
+    await chat_summarizer.drain()
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_history_is_kept_server_side(client):
+    session_id = (await client.post("/api/ai/chat/sessions")).json()["id"]
+    resp = await client.post(f"/api/ai/chat/sessions/{session_id}/messages", json={"content": "I skipped my run"})
+    assert resp.json() == {"response": "Reply 1"}
+    await client.post(f"/api/ai/chat/sessions/{session_id}/messages", json={"content": "It was raining"})
+
+    prompt = client.backend.prompts[-1]
+    assert "User: I skipped my run\nDavid Goggins: Reply 1\nUser: It was raining\n" in prompt
+
+    session = (await client.get(f"/api/ai/chat/sessions/{session_id}")).json()
+    assert [m["sender"] for m in session["messages"]] == ["user", "ai", "user", "ai"]
+    assert [m["seq"] for m in session["messages"]] == [1, 2, 3, 4]
+
+@pytest.mark.asyncio
+async def test_old_turns_are_folded_into_summary(client):
+    session_id = (await client.post("/api/ai/chat/sessions")).json()["id"]
+    turns = CHAT_WINDOW + CHAT_SUMMARY_BATCH
+    for i in range(turns):
+        await client.post(f"/api/ai/chat/sessions/{session_id}/messages", json={"content": f"Message {i}"})
+        await chat_summarizer.drain()
+
+    session = (await client.get(f"/api/ai/chat/sessions/{session_id}")).json()
+    assert session["summary"] == "User is training for a marathon and hates mornings."
+    assert session["summarizedThrough"] > 0
+    assert len(session["messages"]) == turns * 2
+
+    # The newest prompt carries the summary and a bounded window, not the whole history
+    prompt = client.backend.prompts[-1]
+    assert "Summary of the conversation so far: User is training" in prompt
+    assert "Message 0\n" not in prompt
+    assert prompt.count("\nUser: ") <= CHAT_WINDOW + CHAT_SUMMARY_BATCH
+
+@pytest.mark.asyncio
+async def test_stream_saves_reply_and_sessions_are_private(client):
+    session_id = (await client.post("/api/ai/chat/sessions")).json()["id"]
+    resp = await client.post(f"/api/ai/chat/sessions/{session_id}/messages/stream", json={"content": "Go"})
+    assert "Reply 1" in resp.text
+    session = (await client.get(f"/api/ai/chat/sessions/{session_id}")).json()
+    assert session["messages"][-1]["content"] == "Reply 1"
+
+    other = await client.post("/api/auth/register", json={"username": f"chat_{uuid.uuid4().hex[:6]}"})
+    headers = {"Authorization": f"Bearer {other.json()['token']}"}
+    assert (await client.get(f"/api/ai/chat/sessions/{session_id}", headers=headers)).status_code == 404
+
+@pytest.mark.asyncio
+async def test_racing_turns_take_the_next_free_seq(client, monkeypatch):
+    session_id = (await client.post("/api/ai/chat/sessions")).json()["id"]
+    await client.post(f"/api/ai/chat/sessions/{session_id}/messages", json={"content": "First"})
+
+    # The first lookup for the user message is stale, as if another turn inserted seq 3 meanwhile
+    last_seq = chat_memory._last_seq
+    stale = iter([0])
+    async def racing_last_seq(db, session_id):
+        return next(stale, None) or await last_seq(db, session_id)
+    monkeypatch.setattr(chat_memory, "_last_seq", racing_last_seq)
+    await client.post(f"/api/ai/chat/sessions/{session_id}/messages", json={"content": "Second"})
+
+    session = (await client.get(f"/api/ai/chat/sessions/{session_id}")).json()
+    assert [(m["seq"], m["content"]) for m in session["messages"]][2:] == [(3, "Second"), (4, "Reply 2")]
+
+    async with AsyncSessionLocal() as db:
+        db.add(models.ChatMessage(session_id=session_id, seq=4, sender="user", content="Duplicate"))
+        with pytest.raises(IntegrityError):
+            await db.commit()
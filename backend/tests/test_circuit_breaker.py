@@ -0,0 +1,155 @@
+import pytest
+import pytest_asyncio
+import asyncio
+import os
+import time
+import uuid
+from types import SimpleNamespace
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from google.genai import errors
+from app.main import app
+from app.database import engine, Base
+from app import ai_client, circuit_breaker
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+def test_state_machine(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.trips == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock[0] += 31
+    breaker.before_call() # probe
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call() # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+
+    clock[0] += 31
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["rejected"] == 2
+
+def test_success_resets_failure_streak():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+class FlakyModels:
+    """Local stand-in for Gemini with injectable latency and errors."""
+    calls = 0
+    latency = 0.0
+    error = None
+
+    async def generate_content(self, model, contents, config=None):
+        FlakyModels.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.error:
+            raise self.error
+        return SimpleNamespace(text="Stay hard.")
+
+class FakeClient:
+    def __init__(self, api_key=None, **kwargs):
+        self.aio = SimpleNamespace(models=FlakyModels())
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(ai_client.genai, "Client", FakeClient)
+    monkeypatch.setattr(FlakyModels, "calls", 0)
+    monkeypatch.setattr(ai_client, "breaker", CircuitBreaker(failure_threshold=3, reset_timeout=30))
+    monkeypatch.setitem(ai_client.ENDPOINT_DEADLINES, "chat", 0.1)
+    ai_client.client_pool.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"cb_{uuid.uuid4().hex[:6]}", "api_key": "fake-key"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        yield ac
+
+    ai_client.client_pool.clear()
+    await engine.dispose()
+
+def chat(i):
+    return {"messages": [{"sender": "user", "content": f"message {i}"}]}
+
+@pytest.mark.asyncio
+async def test_deadline_returns_fallback_early(client, monkeypatch):
+    monkeypatch.setattr(FlakyModels, "latency", 5.0)
+    start = time.perf_counter()
+    resp = await client.post("/api/ai/chat", json=chat(0))
+    assert resp.json() == {"response": "Radio silence. (Offline)"}
+    assert time.perf_counter() - start < 1.0
+
+@pytest.mark.asyncio
+async def test_open_breaker_skips_network(client, monkeypatch):
+    monkeypatch.setattr(FlakyModels, "error", errors.ServerError(503, {"error": {"message": "overloaded"}}))
+    for i in range(3):
+        await client.post("/api/ai/chat", json=chat(i))
+    assert ai_client.breaker.state == OPEN
+    assert FlakyModels.calls == 3
+
+    start = time.perf_counter()
+    resp = await client.post("/api/ai/chat", json=chat(99))
+    assert resp.json() == {"response": "Radio silence. (Offline)"}
+    assert FlakyModels.calls == 3
+    assert time.perf_counter() - start < 0.5
+
+    stats = ai_client.breaker.stats()
+    assert stats["state"] == "open"
+    assert stats["trips"] == 1
+    assert stats["rejected"] == 1
+
+@pytest.mark.asyncio
+async def test_half_open_probe_recovers(client, monkeypatch):
+    monkeypatch.setattr(FlakyModels, "error", errors.ServerError(500, {"error": {"message": "boom"}}))
+    for i in range(3):
+        await client.post("/api/ai/chat", json=chat(i))
+    assert ai_client.breaker.state == OPEN
+
+    monkeypatch.setattr(FlakyModels, "error", None)
+    ai_client.breaker.opened_at -= 31
+    resp = await client.post("/api/ai/chat", json=chat(100))
+    assert resp.json() == {"response": "Stay hard."}
+    assert ai_client.breaker.state == CLOSED
+
+@pytest.mark.asyncio
+async def test_caller_errors_do_not_trip(client, monkeypatch):
+    monkeypatch.setattr(FlakyModels, "error", errors.ClientError(400, {"error": {"message": "API key not valid"}}))
+    for i in range(5):
+        await client.post("/api/ai/chat", json=chat(i))
+    assert ai_client.breaker.state == CLOSED
+
+@pytest.mark.asyncio
+async def test_local_queueing_does_not_trip(client, monkeypatch):
+    # Each call is well inside its deadline, but 12 of them through 2 slots queue
+    # far longer than it; only the time spent upstream counts
+    monkeypatch.setattr(FlakyModels, "latency", 0.3)
+    monkeypatch.setitem(ai_client.ENDPOINT_DEADLINES, "chat", 0.5)
+    monkeypatch.setattr(ai_client.limiter, "limit", 2)
+    responses = await asyncio.gather(*(client.post("/api/ai/chat", json=chat(i)) for i in range(12)))
+    assert [r.json() for r in responses] == [{"response": "Stay hard."}] * 12
+    assert ai_client.breaker.state == CLOSED
+    assert FlakyModels.calls == 12
@@ -7,6 +7,7 @@ from sqlalchemy import select
 from app.database import Base, engine, AsyncSessionLocal
 from app import models, schemas
 import uuid
+import datetime
 
 # Fixture for fresh DB
 @pytest_asyncio.fixture(scope="function")
@@ -58,7 +59,7 @@ async def test_task_crud(db):
         user_id=user_id,
         description="Run", 
         difficulty="Medium", 
-        date="2023-01-01",
+        date=datetime.date(2023, 1, 1),
         category="Fitness",
         estimated_time=30.0
     )
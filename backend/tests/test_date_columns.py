@@ -0,0 +1,74 @@
+import pytest
+import pytest_asyncio
+import os
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from sqlalchemy import select
+from app.database import engine, Base, AsyncSessionLocal
+from app import models
+
+def task(i, date, completed=True, actual=30):
+    return {"id": f"t{i}", "date": date, "description": f"Run {i}", "difficulty": "Hard", "completed": completed,
+            "category": "Physical Training", "estimatedTime": 30, "actualTime": actual if completed else None}
+
+@pytest_asyncio.fixture
+async def client():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"dates_{uuid.uuid4().hex[:6]}"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        yield ac
+
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_only_iso_dates_are_accepted(client):
+    assert (await client.post("/api/tasks", json=task(1, "2026-02-03"))).json()["date"] == "2026-02-03"
+    for bad in ("03/02/2026", "2026-2-3", "2026-02-30", 1767225600):
+        assert (await client.post("/api/tasks", json=task(2, bad))).status_code == 422
+    assert (await client.get("/api/tasks?start_date=yesterday&end_date=2026-12-31")).status_code == 422
+    assert (await client.put("/api/diary-entries/2026-02-30", json={"date": "2026-02-03"})).status_code == 422
+
+    # The frontend sends blank bounds for "everything"
+    assert len((await client.get("/api/tasks?start_date=&end_date=")).json()) == 1
+
+@pytest.mark.asyncio
+async def test_range_and_rollups_run_on_dates(client):
+    # Mon 2026-01-26 .. Tue 2026-02-03 spans two weeks and two months
+    for i, (day, done) in enumerate([("2026-01-26", True), ("2026-01-31", False), ("2026-02-01", True),
+                                     ("2026-02-02", True), ("2026-02-03", False)]):
+        await client.post("/api/tasks", json=task(i, day, completed=done))
+
+    in_range = (await client.get("/api/tasks?start_date=2026-01-31&end_date=2026-02-02")).json()
+    assert sorted(t["date"] for t in in_range) == ["2026-01-31", "2026-02-01", "2026-02-02"]
+
+    weeks = (await client.get("/api/tasks/rollup?period=week")).json()
+    assert weeks == [
+        {"period": "2026-01-26", "total": 3, "completed": 2, "actualTime": 60},
+        {"period": "2026-02-02", "total": 2, "completed": 1, "actualTime": 30},
+    ]
+    months = (await client.get("/api/tasks/rollup?period=month&start_date=2026-01-27&end_date=2026-12-31")).json()
+    assert [(m["period"], m["total"]) for m in months] == [("2026-01-01", 1), ("2026-02-01", 3)]
+    assert (await client.get("/api/tasks/rollup?period=decade")).status_code == 422
+
+@pytest.mark.asyncio
+async def test_legacy_rows_without_dates_still_list(client):
+    # The date migration turns unreadable legacy dates into NULL
+    await client.post("/api/tasks", json=task(1, "2026-02-03"))
+    async with AsyncSessionLocal() as db:
+        user_id = (await db.execute(select(models.Task.user_id))).scalar()
+        db.add(models.Task(id="legacy", user_id=user_id, date=None, description="Old run", difficulty="Hard",
+                           completed=True, category="Physical Training", estimated_time=30, actual_time=30))
+        db.add(models.Goal(id="g1", user_id=user_id, description="Old goal", target_date=None))
+        await db.commit()
+
+    tasks = (await client.get("/api/tasks")).json()
+    assert {t["id"]: t["date"] for t in tasks} == {"t1": "2026-02-03", "legacy": None}
+    assert (await client.get("/api/goals")).json()[0]["targetDate"] is None
+    assert [w["total"] for w in (await client.get("/api/tasks/rollup?period=week")).json()] == [1]
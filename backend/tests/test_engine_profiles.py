@@ -0,0 +1,67 @@
+import pytest
+import os
+# Must set before importing database components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.database import profile_settings, engine_options, SlowQueryLog
+
+PG_URL = "postgresql+asyncpg://u:p@db/goggins"
+
+def test_prod_profile_with_env_overrides(monkeypatch):
+    prod = profile_settings("prod")
+    assert prod["echo"] is False
+    assert prod["pool_pre_ping"] is True
+    assert profile_settings("dev")["echo"] is True
+
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "0")
+    monkeypatch.setenv("DB_SLOW_QUERY_MS", "50")
+    prod = profile_settings("prod")
+    assert (prod["pool_size"], prod["pool_pre_ping"], prod["slow_query_ms"]) == (3, False, 50)
+
+def test_asyncpg_options_direct_and_behind_pgbouncer():
+    settings = profile_settings("prod")
+    direct = engine_options(PG_URL, settings, statement_cache_size=500)["connect_args"]
+    assert direct["prepared_statement_cache_size"] == 500
+    assert direct["server_settings"] == {"statement_timeout": "15000"}
+
+    pooled = engine_options(PG_URL, settings, pgbouncer=True)["connect_args"]
+    assert pooled["statement_cache_size"] == 0
+    assert pooled["prepared_statement_cache_size"] == 0
+    assert "server_settings" not in pooled
+    assert pooled["prepared_statement_name_func"]() != pooled["prepared_statement_name_func"]()
+    assert pooled["command_timeout"] == 20
+
+    sqlite = engine_options("sqlite+aiosqlite:///./test.db", settings)
+    assert sqlite["pool_pre_ping"] is True
+    assert sqlite["connect_args"] == {"check_same_thread": False}
+
+@pytest.mark.asyncio
+async def test_in_memory_sqlite_gets_no_pool_sizing():
+    for url in ("sqlite+aiosqlite:///:memory:", "sqlite+aiosqlite://", "sqlite+aiosqlite:///file:mem?mode=memory&uri=true"):
+        options = engine_options(url, profile_settings("prod"))
+        assert "pool_size" not in options and "max_overflow" not in options
+        engine = create_async_engine(url, **options)
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("SELECT 1"))).scalar() == 1
+        await engine.dispose()
+    assert engine_options("sqlite+aiosqlite:///./test.db", profile_settings("prod"))["pool_size"] == 10
+
+@pytest.mark.asyncio
+async def test_slow_query_log_only_reports_slow_statements(caplog):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    log = SlowQueryLog(threshold_ms=10 ** 6)
+    log.install(engine.sync_engine)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    assert log.slow == 0
+
+    log.threshold_ms = 0
+    with caplog.at_level("WARNING", logger="app.db.slow"):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 2"))
+    assert log.slow == 1
+    assert [r.levelname for r in caplog.records] == ["WARNING"]
+    assert "Slow query" in caplog.records[0].getMessage()
+    await engine.dispose()
@@ -0,0 +1,111 @@
+import pytest
+import pytest_asyncio
+import os
+import uuid
+from types import SimpleNamespace
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client
+from app.label_classifier import UserLabelModel, LabelClassifierRegistry, label_classifier
+
+def test_seed_keywords_give_a_baseline():
+    model = UserLabelModel()
+    assert model.predict("Run 5 miles").label == "Physical Training"
+    assert model.predict("Cold shower at dawn").label == "Uncomfortable Zone"
+    assert model.predict("qwerty zxcv") is None
+
+def test_learning_shifts_predictions_and_forget_undoes_it():
+    model = UserLabelModel()
+    before = model.predict("violin practice")
+    assert before is None
+
+    for _ in range(3):
+        model.learn("violin practice", "Mental Fortitude")
+    after = model.predict("violin practice")
+    assert after.label == "Mental Fortitude"
+    assert after.confidence > 0.8
+
+    for _ in range(3):
+        model.forget("violin practice", "Mental Fortitude")
+    assert model.predict("violin practice") is None
+    # Forgetting something never learned is a no-op
+    model.forget("violin practice", "Recovery")
+    assert all(v >= 0 for c in model.token_counts.values() for v in c.values())
+
+class CountingModels:
+    calls = 0
+
+    async def generate_content(self, model, contents, config=None):
+        CountingModels.calls += 1
+        return SimpleNamespace(text="Side Quest")
+
+class FakeClient:
+    def __init__(self, api_key=None, **kwargs):
+        self.aio = SimpleNamespace(models=CountingModels())
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(ai_client.genai, "Client", FakeClient)
+    monkeypatch.setattr(CountingModels, "calls", 0)
+    ai_client.client_pool.clear()
+    label_classifier.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"clf_{uuid.uuid4().hex[:6]}", "api_key": "fake-key"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        yield ac
+
+    ai_client.client_pool.clear()
+    label_classifier.clear()
+    await engine.dispose()
+
+def task_payload(description, category):
+    return {
+        "id": str(uuid.uuid4()),
+        "date": "2024-01-01",
+        "description": description,
+        "difficulty": "Medium",
+        "completed": False,
+        "category": category,
+        "estimatedTime": 30
+    }
+
+@pytest.mark.asyncio
+async def test_confident_labels_skip_gemini(client):
+    resp = await client.post("/api/ai/label", json={"text": "Pushups and pullups"})
+    assert resp.json() == {"label": "Physical Training"}
+    assert CountingModels.calls == 0
+
+    resp = await client.post("/api/ai/label", json={"text": "Renew passport"})
+    assert resp.json() == {"label": "Side Quest"}
+    assert CountingModels.calls == 1
+
+@pytest.mark.asyncio
+async def test_saved_labels_retrain_incrementally(client):
+    # Loads the user's model before any rows exist
+    await client.post("/api/ai/label", json={"text": "Renew passport"})
+    calls = CountingModels.calls
+
+    for _ in range(3):
+        await client.post("/api/tasks", json=task_payload("Renew passport", "Side Quest"))
+    await client.post("/api/wish-list", json={"id": str(uuid.uuid4()), "description": "Renew passport", "label": "Side Quest"})
+
+    resp = await client.post("/api/ai/label", json={"text": "Renew passport"})
+    assert resp.json() == {"label": "Side Quest"}
+    assert CountingModels.calls == calls
+
+@pytest.mark.asyncio
+async def test_history_loaded_from_db(client):
+    for _ in range(3):
+        await client.post("/api/tasks", json=task_payload("Violin scales", "Mental Fortitude"))
+    label_classifier.clear()
+
+    resp = await client.post("/api/ai/label", json={"text": "Violin scales"})
+    assert resp.json() == {"label": "Mental Fortitude"}
+    assert CountingModels.calls == 0
@@ -0,0 +1,130 @@
+import pytest
+import pytest_asyncio
+import json
+import os
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from sqlalchemy import select
+from app.database import engine, Base, AsyncSessionLocal
+from app import models, pagination
+
+def task(i, date):
+    return {"id": f"t{i:02d}", "date": date, "description": f"Run {i}", "difficulty": "Hard", "completed": False,
+            "category": "Physical Training", "estimatedTime": 30}
+
+@pytest_asyncio.fixture
+async def client():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"pages_{uuid.uuid4().hex[:6]}"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        yield ac
+
+    await engine.dispose()
+
+async def walk(client, url):
+    items, pages, cursor = [], 0, None
+    while True:
+        page = (await client.get(url + (f"&cursor={cursor}" if cursor else ""))).json()
+        items += page["items"]
+        pages += 1
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return items, pages
+
+@pytest.mark.asyncio
+async def test_tasks_page_by_date_then_id(client):
+    # Several tasks share a date, so the id has to break ties across page boundaries
+    for i in range(11):
+        await client.post("/api/tasks", json=task(i, f"2026-01-{10 - i // 3:02d}"))
+
+    items, pages = await walk(client, "/api/tasks?limit=4")
+    assert pages == 3
+    assert [t["id"] for t in items] == [t["id"] for t in sorted(items, key=lambda t: (t["date"], t["id"]))]
+    assert len({t["id"] for t in items}) == 11
+
+    # Filters apply on every page; without paging parameters the plain list is unchanged
+    in_range, _ = await walk(client, "/api/tasks?limit=2&start_date=2026-01-09&end_date=2026-01-10")
+    assert len(in_range) == 6
+    assert len((await client.get("/api/tasks")).json()) == 11
+
+    assert (await client.get("/api/tasks?limit=0")).status_code == 422
+    assert (await client.get("/api/tasks?limit=5000")).status_code == 422
+    assert (await client.get("/api/tasks?limit=2&cursor=not-a-cursor")).status_code == 422
+
+@pytest.mark.asyncio
+async def test_other_lists_page_with_their_completions(client):
+    for i in range(5):
+        await client.post("/api/side-quests", json={"id": f"q{i}", "description": f"Pushups {i}", "difficulty": "Easy",
+                                                    "dailyGoal": 3, "completions": {"2026-01-01": i}})
+        await client.post("/api/diary-entries", json={"date": f"2026-01-0{i + 1}", "debrief": f"Day {i}"})
+
+    quests, pages = await walk(client, "/api/side-quests?limit=2")
+    assert (pages, [q["id"] for q in quests]) == (3, ["q0", "q1", "q2", "q3", "q4"])
+    assert [q["completions"].get("2026-01-01", 0) for q in quests] == [0, 1, 2, 3, 4]
+
+    entries, _ = await walk(client, "/api/diary-entries?limit=3")
+    assert [e["date"] for e in entries] == [f"2026-01-0{i}" for i in range(1, 6)]
+    entries, _ = await walk(client, "/api/diary-entries?limit=3&start_date=2026-01-02&end_date=2026-01-03")
+    assert [e["date"] for e in entries] == ["2026-01-02", "2026-01-03"]
+    assert (await client.get("/api/goals?limit=10")).json() == {"items": [], "nextCursor": None}
+
+@pytest.mark.asyncio
+async def test_ndjson_streams_in_batches(client, monkeypatch):
+    monkeypatch.setattr(pagination, "STREAM_BATCH", 3)
+    for i in range(8):
+        await client.post("/api/tasks", json=task(i, f"2026-02-{i + 1:02d}"))
+
+    resp = await client.get("/api/tasks?format=ndjson")
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["id"] for r in rows] == [f"t{i:02d}" for i in range(8)]
+    assert rows[0]["estimatedTime"] == 30
+
+    # A cursor from a JSON page resumes the stream after it
+    cursor = (await client.get("/api/tasks?limit=5")).json()["nextCursor"]
+    resp = await client.get(f"/api/tasks?format=ndjson&cursor={cursor}")
+    assert [json.loads(line)["id"] for line in resp.text.splitlines()] == ["t05", "t06", "t07"]
+
+@pytest.mark.asyncio
+async def test_rows_without_a_date_page_last(client):
+    for i in range(3):
+        await client.post("/api/tasks", json=task(i, f"2026-03-0{i + 1}"))
+    async with AsyncSessionLocal() as db:
+        user_id = (await db.execute(select(models.Task.user_id))).scalar()
+        # Legacy rows whose date the migration couldn't read
+        db.add_all(models.Task(id=f"n{i}", user_id=user_id, date=None, description="Old", difficulty="Hard",
+                               completed=False, category="Physical Training", estimated_time=30) for i in range(3))
+        await db.commit()
+
+    for limit in (1, 2, 4):
+        items, _ = await walk(client, f"/api/tasks?limit={limit}")
+        assert [t["id"] for t in items] == ["t00", "t01", "t02", "n0", "n1", "n2"]
+    assert [t["id"] for t in (await client.get("/api/tasks")).json()][-3:] == ["n0", "n1", "n2"]
+    cursor = (await client.get("/api/tasks?limit=4")).json()["nextCursor"]
+    resp = await client.get(f"/api/tasks?format=ndjson&cursor={cursor}")
+    assert [json.loads(line)["id"] for line in resp.text.splitlines()] == ["n1", "n2"]
+
+@pytest.mark.asyncio
+async def test_summary_scores_history_outside_the_window(client):
+    for i, (day, difficulty, actual) in enumerate([("2026-01-05", "Hard", 30), ("2026-01-05", "Hard", 15),
+                                                   ("2026-01-06", "Easy", 10), ("2026-02-01", "Hard", 60)]):
+        await client.post("/api/tasks", json={**task(i, day), "difficulty": difficulty, "completed": True, "actualTime": actual})
+    await client.post("/api/tasks", json=task(9, "2026-01-07")) # not completed
+    await client.post("/api/recurring-tasks", json={
+        "id": "r1", "description": "Morning run", "difficulty": "Savage", "category": "Discipline", "recurrenceRule": "Daily",
+        "startDate": "2026-01-01", "estimatedTime": 90, "goalAlignment": 5,
+        "completions": {"2026-01-05": {"completed": True, "actualTime": 20}, "2026-01-06": {"completed": False}},
+    })
+
+    rows = (await client.get("/api/tasks/summary?before=2026-02-01")).json()
+    assert sorted((r["date"], r["difficulty"], r["count"], r["actualTime"], r["goalAlignment"]) for r in rows) == [
+        ("2026-01-05", "Hard", 2, 45, None), ("2026-01-05", "Savage", 1, 20, 5), ("2026-01-06", "Easy", 1, 10, None),
+    ]
+    assert (await client.get("/api/tasks/summary")).status_code == 422
@@ -0,0 +1,87 @@
+import pytest
+import pytest_asyncio
+import asyncio
+import datetime
+import os
+import time
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client
+from app.ai_backends import FakeBackend
+from app.pregen import PregenScheduler, KeyRateLimiter, briefing_week
+
+TODAY = datetime.date.today()
+GOAL = {"id": "g1", "description": "Run a marathon", "targetDate": "2026-12-31"}
+
+def test_briefing_week_and_window():
+    assert briefing_week(datetime.date(2026, 10, 12)) == datetime.date(2026, 10, 12) # Monday
+    assert briefing_week(datetime.date(2026, 10, 17)) == datetime.date(2026, 10, 19)
+    scheduler = PregenScheduler("23-4", 60, 60)
+    assert scheduler.in_window(1) and scheduler.in_window(23) and not scheduler.in_window(12)
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_per_key():
+    limiter = KeyRateLimiter(per_minute=60 * 20) # one call every 50ms
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.acquire("a") for _ in range(3)), limiter.acquire("b"))
+    assert 0.09 <= time.monotonic() - start < 0.5
+    assert limiter.waits == 2
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    backend = FakeBackend(default_text="Pre-generated. Stay hard.")
+    monkeypatch.setattr(ai_client, "backend_override", backend)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"pregen_{uuid.uuid4().hex[:6]}"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        ac.backend = backend
+        yield ac
+
+    await engine.dispose()
+
+def task(i, date=TODAY.isoformat()):
+    return {"id": f"t{i}", "date": date, "description": f"Run {i} miles", "difficulty": "Hard", "completed": False,
+            "category": "Physical Training", "estimatedTime": 60}
+
+@pytest.mark.asyncio
+async def test_run_once_fills_stories_and_briefing(client):
+    await client.post("/api/goals", json=GOAL)
+    await client.post("/api/tasks", json=task(1))
+    await client.post("/api/tasks", json=dict(task(2), story="Written by hand"))
+    await client.post("/api/tasks", json=task(3, date="2020-01-01"))
+
+    stats = await PregenScheduler("0-24", 60, 6000).run_once(TODAY)
+    assert stats["stories"] == 1
+    assert stats["briefings"] == 1
+
+    tasks = {t["id"]: t for t in (await client.get("/api/tasks")).json()}
+    assert tasks["t1"]["story"] == "Pre-generated. Stay hard."
+    assert tasks["t2"]["story"] == "Written by hand"
+    assert tasks["t3"]["story"] is None
+
+    # Interactive routes now answer from the DB without calling the model
+    calls = client.backend.calls
+    resp = await client.post("/api/ai/story", json={"task": tasks["t1"], "goals": [GOAL]})
+    assert resp.json() == {"story": "Pre-generated. Stay hard."}
+    resp = await client.post("/api/ai/weekly-briefing", json={"previousWeekEvaluations": [], "nextWeekGoals": [], "longTermGoals": [GOAL]})
+    assert resp.json() == {"briefing": "Pre-generated. Stay hard."}
+    resp = await client.post("/api/ai/story/stream", json={"task": tasks["t1"], "goals": [GOAL]})
+    assert "Pre-generated" in resp.text and "event: done" in resp.text
+    assert client.backend.calls == calls
+
+@pytest.mark.asyncio
+async def test_on_demand_story_is_stored(client):
+    await client.post("/api/tasks", json=task(1))
+    tasks = (await client.get("/api/tasks")).json()
+    await client.post("/api/ai/story", json={"task": tasks[0], "goals": []})
+    await client.post("/api/ai/story", json={"task": tasks[0], "goals": []})
+    assert client.backend.calls == 1
+    assert (await client.get("/api/tasks")).json()[0]["story"] == "Pre-generated. Stay hard."
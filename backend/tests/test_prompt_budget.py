@@ -0,0 +1,85 @@
+import pytest
+import pytest_asyncio
+import os
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client, dependencies
+from app.ai_backends import FakeBackend
+from app.ai_cache import response_cache
+from app.prompt_budget import PromptBuilder, compact, fit, estimate_tokens, render
+
+def test_compact_drops_noise():
+    rows = [
+        {"id": f"t{i}", "description": f"Run {i}", "category": "Physical Training", "story": "long story", "actualTime": None}
+        for i in range(3)
+    ]
+    rows.append(dict(rows[0]))
+    assert compact(rows) == [
+        {"_all": {"category": "Physical Training"}},
+        {"description": "Run 0"}, {"description": "Run 1"}, {"description": "Run 2"},
+    ]
+
+def test_fit_keeps_leading_items_and_counts_the_rest():
+    rows = [f"Task number {i}" for i in range(200)]
+    fitted = fit(rows, 100)
+    assert estimate_tokens(render(fitted)) <= 100
+    assert fitted[0] == "Task number 0"
+    assert fitted[-1].endswith("more omitted")
+    assert fit("x" * 1000, 10).endswith("…")
+    assert fit({"notes": "short", "log": ["entry"] * 500}, 50)["notes"] == "short"
+
+def test_lowest_priority_is_trimmed_first():
+    prompt = (
+        PromptBuilder("test", budget=200)
+        .add("junk", [f"filler text {i}" for i in range(500)], priority=0)
+        .add("goal", "Run a marathon", priority=5)
+        .build("Goal: {goal} Junk: {junk} Keep {braces}")
+    )
+    assert estimate_tokens(prompt) <= 200
+    assert 'Goal: "Run a marathon"' in prompt
+    assert "{braces}" in prompt
+    assert "more omitted" in prompt
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    backend = FakeBackend(default_json='{"alignmentScore": 7, "feedback": "Ok."}')
+    prompts = []
+    original = backend.agenerate
+    async def recording(model_name, prompt, json_mode):
+        prompts.append(prompt)
+        return await original(model_name, prompt, json_mode)
+    backend.agenerate = recording
+    monkeypatch.setattr(ai_client, "backend_override", backend)
+    response_cache.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"budget_{uuid.uuid4().hex[:6]}"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        ac.prompts = prompts
+        yield ac
+
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_evaluate_weekly_prompt_stays_in_budget(client, monkeypatch):
+    monkeypatch.setattr(dependencies, "OPERATOR_TOKEN", "ops")
+    tasks = [{"id": str(i), "description": f"Completed hard task {i} " * 5, "difficulty": "Hard"} for i in range(2000)]
+    resp = await client.post("/api/ai/evaluate-weekly", json={
+        "description": "Run 40 miles", "completedTasks": tasks, "purchasedRewards": [{"name": "Pizza"}] * 50,
+    })
+    assert resp.json() == {"alignmentScore": 7, "feedback": "Ok."}
+    prompt = client.prompts[0]
+    assert estimate_tokens(prompt) <= 2000
+    assert '"Run 40 miles"' in prompt
+    assert "Completed hard task 0" in prompt
+
+    stats = (await client.get("/api/ai/stats", headers={"X-Operator-Token": "ops"})).json()["prompts"]
+    assert stats["trimmed"] >= 1
+    assert stats["tokens_before"] > stats["tokens_after"]
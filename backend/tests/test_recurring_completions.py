@@ -0,0 +1,121 @@
+import pytest
+import pytest_asyncio
+import datetime
+import os
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from app.main import app
+from app.database import engine, Base
+from app.betting_odds import betting_stats
+
+YESTERDAY = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+MISSION = {
+    "id": "r1", "description": "Morning run", "difficulty": "Hard", "category": "Physical Training",
+    "recurrenceRule": "Daily", "startDate": "2026-01-01", "estimatedTime": 90,
+}
+
+@pytest_asyncio.fixture
+async def client():
+    betting_stats.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"rc_{uuid.uuid4().hex[:6]}"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        yield ac
+
+    betting_stats.clear()
+    await engine.dispose()
+
+@pytest.fixture
+def writes():
+    # Rows written to recurring_completions, per statement
+    counts = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith(("INSERT INTO recurring_completions", "UPDATE recurring_completions")):
+            counts.append(len(parameters) if executemany else 1)
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    yield counts
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+@pytest.mark.asyncio
+async def test_occurrence_upsert_and_range_reads(client):
+    resp = await client.post("/api/recurring-tasks", json={
+        **MISSION, "completions": {"2026-01-01": {"completed": True, "actualTime": 80}},
+    })
+    assert resp.json()["completions"] == {"2026-01-01": {"completed": True, "actualTime": 80}}
+
+    resp = await client.put("/api/recurring-tasks/r1/completions/2026-01-02", json={"betPlaced": True, "betAmount": 5})
+    assert resp.json() == {"date": "2026-01-02", "completed": False, "actualTime": None, "time": None,
+                           "betAmount": 5, "betMultiplier": None, "betPlaced": True, "betWon": None}
+    resp = await client.put("/api/recurring-tasks/r1/completions/2026-01-02", json={"completed": True})
+    assert resp.json()["completed"] is True
+    assert resp.json()["betAmount"] == 5 # unset fields are left alone
+
+    assert (await client.get("/api/recurring-tasks/r1/completions/2026-01-02")).json()["betPlaced"] is True
+    assert (await client.get("/api/recurring-tasks/r1/completions/2026-01-03")).status_code == 404
+    window = (await client.get("/api/recurring-tasks/r1/completions?start_date=2026-01-02&end_date=2026-01-31")).json()
+    assert [c["date"] for c in window] == ["2026-01-02"]
+
+    listed = (await client.get("/api/recurring-tasks?start_date=2026-01-02&end_date=2026-01-31")).json()
+    assert list(listed[0]["completions"]) == ["2026-01-02"]
+    listed = (await client.get("/api/recurring-tasks")).json()
+    assert list(listed[0]["completions"]) == ["2026-01-01", "2026-01-02"]
+
+@pytest.mark.asyncio
+async def test_full_put_only_writes_changed_dates(client, writes):
+    history = {f"2025-{m:02d}-{d:02d}": {"completed": True, "actualTime": 60} for m in range(1, 13) for d in range(1, 29)}
+    await client.post("/api/recurring-tasks", json={**MISSION, "completions": history})
+    writes.clear()
+
+    # The old client flow: re-PUT the whole task with one date toggled
+    history["2025-06-01"] = {"completed": False, "actualTime": None}
+    resp = await client.put("/api/recurring-tasks/r1", json={**MISSION, "completions": history})
+    assert resp.json()["completions"]["2025-06-01"] == {"completed": False}
+    assert sum(writes) == 1
+
+    writes.clear()
+    await client.put("/api/recurring-tasks/r1", json={**MISSION, "description": "Evening run", "completions": history})
+    assert sum(writes) == 0
+
+@pytest.mark.asyncio
+async def test_occurrences_feed_betting_odds(client):
+    bet = {"description": "Run", "difficulty": "Hard", "category": "Physical Training", "estimatedTime": 90}
+    await client.post("/api/recurring-tasks", json=MISSION)
+    assert (await client.post("/api/ai/betting-odds", json=bet)).json()["sampleSize"] == 0
+
+    loads = betting_stats.loads
+    await client.put(f"/api/recurring-tasks/r1/completions/{YESTERDAY}", json={"completed": True})
+    await client.put("/api/recurring-tasks/r1/completions/2026-01-01", json={"completed": False})
+    assert (await client.post("/api/ai/betting-odds", json=bet)).json()["sampleSize"] == 2
+
+    # Changing the difficulty moves the whole history to another group
+    await client.put("/api/recurring-tasks/r1", json={**MISSION, "difficulty": "Easy"})
+    assert (await client.post("/api/ai/betting-odds", json=bet)).json()["sampleSize"] == 0
+    assert (await client.post("/api/ai/betting-odds", json={**bet, "difficulty": "Easy"})).json()["sampleSize"] == 2
+    assert betting_stats.loads == loads
+
+    betting_stats.clear()
+    assert (await client.post("/api/ai/betting-odds", json={**bet, "difficulty": "Easy"})).json()["sampleSize"] == 2
+
+@pytest.mark.asyncio
+async def test_explicit_nulls_clear_fields_and_dates(client):
+    await client.post("/api/recurring-tasks", json={**MISSION, "completions": {
+        "2026-01-01": {"completed": True}, "2026-01-02": {"completed": False, "time": "06:30"},
+    }})
+    # Clearing an occurrence's time sends it as null; left out, it would be kept
+    resp = await client.put("/api/recurring-tasks/r1/completions/2026-01-02", json={"time": None})
+    assert resp.json()["time"] is None
+    assert (await client.get("/api/recurring-tasks/r1/completions/2026-01-02")).json()["time"] is None
+
+    # The task's completions map is a patch: missing dates stay, null deletes one
+    resp = await client.put("/api/recurring-tasks/r1", json={**MISSION, "completions": {"2026-01-03": {"completed": True}}})
+    assert list(resp.json()["completions"]) == ["2026-01-01", "2026-01-02", "2026-01-03"]
+    resp = await client.put("/api/recurring-tasks/r1", json={**MISSION, "completions": {"2026-01-01": None}})
+    assert list(resp.json()["completions"]) == ["2026-01-02", "2026-01-03"]
+    assert (await client.get("/api/recurring-tasks/r1/completions/2026-01-01")).status_code == 404
@@ -0,0 +1,65 @@
+import pytest
+import pytest_asyncio
+import asyncio
+import os
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+
+QUEST = {"id": "q1", "description": "50 push-ups", "difficulty": "Easy", "dailyGoal": 3}
+
+async def register(ac):
+    resp = await ac.post("/api/auth/register", json={"username": f"sq_{uuid.uuid4().hex[:6]}"})
+    return {"Authorization": f"Bearer {resp.json()['token']}"}
+
+@pytest_asyncio.fixture
+async def client():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        ac.headers.update(await register(ac))
+        yield ac
+
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_increment_returns_new_count(client):
+    await client.post("/api/side-quests", json=QUEST)
+
+    assert (await client.post("/api/side-quests/q1/completions/2026-01-01")).json() == {"date": "2026-01-01", "count": 1}
+    assert (await client.post("/api/side-quests/q1/completions/2026-01-01", json={"delta": 2})).json()["count"] == 3
+    assert (await client.post("/api/side-quests/q1/completions/2026-01-01", json={"delta": -5})).json()["count"] == 0
+    assert (await client.post("/api/side-quests/q1/completions/2026-01-02", json={"delta": -1})).json()["count"] == 0
+
+    # Concurrent taps all land
+    await asyncio.gather(*(client.post("/api/side-quests/q1/completions/2026-01-03") for _ in range(10)))
+    history = (await client.get("/api/side-quests/q1/completions?start_date=2026-01-02&end_date=2026-01-31")).json()
+    assert history == [{"date": "2026-01-02", "count": 0}, {"date": "2026-01-03", "count": 10}]
+
+    quests = (await client.get("/api/side-quests")).json()
+    assert quests[0]["completions"] == {"2026-01-01": 0, "2026-01-02": 0, "2026-01-03": 10}
+
+@pytest.mark.asyncio
+async def test_counts_are_per_user(client):
+    await client.post("/api/side-quests", json=QUEST)
+    other = await register(client)
+    assert (await client.post("/api/side-quests/q1/completions/2026-01-01", headers=other)).status_code == 404
+    assert (await client.get("/api/side-quests/q1/completions", headers=other)).status_code == 404
+
+@pytest.mark.asyncio
+async def test_put_leaves_counts_to_increments(client):
+    await client.post("/api/side-quests", json={**QUEST, "completions": {"2026-01-01": 2}})
+    await client.post("/api/side-quests/q1/completions/2026-01-01")
+    # A client still holding the old map edits the quest: the tap above survives
+    resp = await client.put("/api/side-quests/q1", json={**QUEST, "dailyGoal": 5, "completions": {"2026-01-01": 2, "2026-01-02": 1}})
+    assert resp.json()["dailyGoal"] == 5
+    assert resp.json()["completions"] == {"2026-01-01": 3}
+
+    await client.delete("/api/side-quests/q1")
+    await client.post("/api/side-quests", json=QUEST)
+    assert (await client.get("/api/side-quests")).json()[0]["completions"] == {}
@@ -0,0 +1,129 @@
+import pytest
+import pytest_asyncio
+import asyncio
+import os
+import uuid
+from types import SimpleNamespace
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client
+from app.singleflight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "done"
+
+    results = await asyncio.gather(*[flight.do("k", work) for _ in range(5)])
+    assert results == ["done"] * 5
+    assert calls == 1
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+    # Nothing is remembered once the call finishes
+    await flight.do("k", work)
+    assert calls == 2
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight()
+    attempts = 0
+
+    async def boom():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(*[flight.do("k", boom) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert attempts == 1
+
+    with pytest.raises(RuntimeError):
+        await flight.do("k", boom)
+    assert attempts == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_the_others():
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def work():
+        started.set()
+        await asyncio.sleep(0.05)
+        return 42
+
+    first = asyncio.create_task(flight.do("k", work))
+    await started.wait()
+    second = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == 42
+    assert first.cancelled()
+
+@pytest.mark.asyncio
+async def test_last_waiter_leaving_cancels_upstream():
+    flight = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert flight.stats()["in_flight"] == 0
+
+class SlowModels:
+    calls = 0
+
+    async def generate_content(self, model, contents, config=None):
+        SlowModels.calls += 1
+        await asyncio.sleep(0.1)
+        return SimpleNamespace(text="Roger that.")
+
+class FakeClient:
+    def __init__(self, api_key=None, **kwargs):
+        self.aio = SimpleNamespace(models=SlowModels())
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(ai_client.genai, "Client", FakeClient)
+    monkeypatch.setattr(SlowModels, "calls", 0)
+    monkeypatch.setattr(ai_client, "singleflight", SingleFlight())
+    ai_client.client_pool.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/auth/register", json={"username": f"sf_{uuid.uuid4().hex[:6]}", "api_key": "fake-key"})
+        ac.headers["Authorization"] = f"Bearer {resp.json()['token']}"
+        yield ac
+
+    ai_client.client_pool.clear()
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_double_click_sends_one_prompt(client):
+    payload = {"messages": [{"sender": "user", "content": "Should I skip leg day?"}]}
+    first, second = await asyncio.gather(
+        client.post("/api/ai/chat", json=payload),
+        client.post("/api/ai/chat", json=payload),
+    )
+    assert first.json() == second.json() == {"response": "Roger that."}
+    assert SlowModels.calls == 1
+    assert ai_client.singleflight.stats()["coalesced"] == 1
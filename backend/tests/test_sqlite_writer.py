@@ -0,0 +1,130 @@
+import pytest
+import pytest_asyncio
+import asyncio
+import os
+import tempfile
+import uuid
+# Must set before importing database components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from sqlalchemy import select, func, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine, async_sessionmaker
+from app.database import Base
+from app.sqlite_writer import SQLiteWriter, install_pragmas, session_classes
+from app import models
+
+@pytest_asyncio.fixture
+async def wal():
+    url = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'wal.db')}"
+    ddl = create_async_engine(url)
+    async with ddl.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await ddl.dispose()
+
+    writer_engine = create_async_engine(url, pool_size=1, max_overflow=0)
+    install_pragmas(writer_engine.sync_engine)
+    reader_engine = create_async_engine(url)
+    install_pragmas(reader_engine.sync_engine, query_only=True)
+    writer = SQLiteWriter(writer_engine)
+    sync_session_class, session_class = session_classes(writer, reader_engine)
+    sessions = async_sessionmaker(bind=reader_engine, class_=session_class, sync_session_class=sync_session_class,
+                                  expire_on_commit=False, autoflush=False)
+    yield writer, reader_engine, sessions
+
+    await writer.close()
+    await writer_engine.dispose()
+    await reader_engine.dispose()
+
+@pytest.mark.asyncio
+async def test_pragmas_and_read_only_readers(wal):
+    writer, reader_engine, _ = wal
+    async with reader_engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1 # NORMAL
+        assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 5000
+        with pytest.raises(OperationalError, match="readonly"):
+            await conn.execute(text("DELETE FROM users"))
+
+@pytest.mark.asyncio
+async def test_concurrent_writers_are_group_committed(wal):
+    writer, _, sessions = wal
+
+    async def register(n):
+        async with sessions() as db:
+            db.add(models.User(id=str(uuid.uuid4()), username=f"w{n}"))
+            await db.commit()
+
+    await asyncio.gather(*(register(n) for n in range(50)))
+
+    async with sessions() as db:
+        assert (await db.execute(select(func.count()).select_from(models.User))).scalar() == 50
+    stats = writer.stats()
+    assert stats["transactions"] == 50
+    assert stats["commits"] < 50
+    assert stats["largest_group"] > 1
+
+@pytest.mark.asyncio
+async def test_rollback_only_undoes_its_own_session(wal):
+    _, _, sessions = wal
+
+    async def write(name, fail):
+        async with sessions() as db:
+            db.add(models.User(id=str(uuid.uuid4()), username=name))
+            await db.flush()
+            # The session reads its own uncommitted row through the writer
+            assert (await db.execute(select(models.User).where(models.User.username == name))).scalar_one()
+            if fail:
+                await db.rollback()
+            else:
+                await db.commit()
+
+    await asyncio.gather(write("kept", False), write("dropped", True), write("also_kept", False))
+    # A session that errors out without committing gives the writer back on close
+    with pytest.raises(RuntimeError):
+        async with sessions() as db:
+            db.add(models.User(id=str(uuid.uuid4()), username="abandoned"))
+            await db.flush()
+            raise RuntimeError
+
+    async with sessions() as db:
+        names = (await db.execute(select(models.User.username))).scalars().all()
+    assert sorted(names) == ["also_kept", "kept"]
+
+@pytest.mark.asyncio
+async def test_writer_survives_a_failed_begin(wal, monkeypatch):
+    writer, _, sessions = wal
+
+    async def register(name):
+        async with sessions() as db:
+            db.add(models.User(id=str(uuid.uuid4()), username=name))
+            await db.commit()
+
+    await register("before")
+    real_begin = AsyncConnection.begin
+    failures = [1]
+
+    def begin(self):
+        if failures[0]:
+            failures[0] -= 1
+            raise OperationalError("BEGIN", {}, Exception("disk I/O error"))
+        return real_begin(self)
+
+    monkeypatch.setattr(AsyncConnection, "begin", begin)
+    # Its commit is durable; the failed BEGIN afterwards only replaces the connection
+    await asyncio.wait_for(register("during"), 5)
+    await asyncio.wait_for(register("after"), 5)
+    assert writer.stats()["reconnects"] == 1
+
+    # The new connection fails too, and again on the next session's retry:
+    # that session fails fast instead of hanging, and the one after recovers
+    failures[0] = 3
+    await asyncio.wait_for(register("lost_begin"), 5)
+    assert writer.stats()["broken"]
+    with pytest.raises(RuntimeError, match="unavailable"):
+        await asyncio.wait_for(register("refused"), 5)
+    await asyncio.wait_for(register("recovered"), 5)
+    assert not writer.stats()["broken"]
+
+    async with sessions() as db:
+        names = (await db.execute(select(models.User.username))).scalars().all()
+    assert sorted(names) == ["after", "before", "during", "lost_begin", "recovered"]
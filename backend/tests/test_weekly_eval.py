@@ -0,0 +1,113 @@
+import pytest
+import pytest_asyncio
+import datetime
+import json
+import os
+import uuid
+# Must set before importing app components
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.database import engine, Base
+from app import ai_client
+from app.ai_backends import FakeBackend
+from app.ai_cache import response_cache
+from app.pregen import NightlyScheduler
+from app.weekly_eval import WeeklyEvaluationPipeline, last_week
+
+TODAY = datetime.date(2026, 10, 14) # Wednesday; last week is Oct 5-11
+EVALUATION = {"alignmentScore": 8, "feedback": "Solid week."}
+
+class FlakyBackend(FakeBackend):
+    """Fails the first call for every prompt, then answers."""
+
+    def __init__(self, **kwargs):
+        super().__init__(default_json=json.dumps(EVALUATION), **kwargs)
+        self.seen = set()
+        self.prompts = []
+
+    def _respond(self, model_name, prompt, json_mode):
+        if prompt not in self.seen:
+            self.seen.add(prompt)
+            self.calls += 1
+            return "not json"
+        self.prompts.append(prompt)
+        return super()._respond(model_name, prompt, json_mode)
+
+def test_last_week():
+    assert last_week(TODAY) == (datetime.date(2026, 10, 5), datetime.date(2026, 10, 11))
+    assert last_week(datetime.date(2026, 10, 12)) == (datetime.date(2026, 10, 5), datetime.date(2026, 10, 11))
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    backend = FlakyBackend()
+    monkeypatch.setattr(ai_client, "backend_override", backend)
+    response_cache.clear()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        ac.backend = backend
+        yield ac
+
+    await engine.dispose()
+
+async def register(client):
+    resp = await client.post("/api/auth/register", json={"username": f"eval_{uuid.uuid4().hex[:6]}"})
+    return {"Authorization": f"Bearer {resp.json()['token']}"}
+
+@pytest.mark.asyncio
+async def test_evaluates_every_users_goals_in_bulk(client):
+    users = [await register(client) for _ in range(3)]
+    for i, headers in enumerate(users):
+        await client.post("/api/weekly-goals", headers=headers, json={"id": f"w{i}", "description": f"Run {i}0 miles", "targetDate": "2026-10-11"})
+        await client.post("/api/tasks", headers=headers, json={
+            "id": f"t{i}", "date": "2026-10-07", "description": f"Long run {i}", "difficulty": "Hard",
+            "completed": True, "category": "Physical Training", "estimatedTime": 90,
+        })
+    # Outside the week: left alone
+    await client.post("/api/weekly-goals", headers=users[0], json={"id": "old", "description": "Old", "targetDate": "2026-09-01"})
+
+    report = await WeeklyEvaluationPipeline(concurrency=2, retries=2, backoff=0).run(TODAY)
+    assert report["goals"] == 3
+    assert report["evaluated"] == 3
+    assert report["retries"] == 3
+    assert set(report["timings"]) == {"collect", "generate", "write", "total"}
+    # Context came from the DB, per user
+    assert any("Long run 1" in p and "Run 10 miles" in p for p in client.backend.prompts)
+
+    goals = {g["id"]: g for g in (await client.get("/api/weekly-goals", headers=users[0])).json()}
+    assert goals["w0"]["evaluation"] == EVALUATION
+    assert goals["old"]["evaluation"] is None
+
+    # Evaluated goals aren't picked up again
+    assert (await WeeklyEvaluationPipeline(2, 2, 0).run(TODAY))["goals"] == 0
+
+@pytest.mark.asyncio
+async def test_gives_up_after_retries(client, monkeypatch):
+    monkeypatch.setattr(ai_client, "backend_override", FakeBackend(default_json="still not json"))
+    headers = await register(client)
+    await client.post("/api/weekly-goals", headers=headers, json={"id": "w", "description": "Run", "targetDate": "2026-10-11"})
+    report = await WeeklyEvaluationPipeline(concurrency=2, retries=1, backoff=0).run(TODAY)
+    assert report["failed"] == 1
+    assert report["retries"] == 1
+    assert (await client.get("/api/weekly-goals", headers=headers)).json()[0]["evaluation"] is None
+
+@pytest.mark.asyncio
+async def test_nightly_schedule_runs_once_a_day_and_retries_failures():
+    runs, failures = [], [RuntimeError("model down")]
+    async def job(today):
+        runs.append(today)
+        if failures:
+            raise failures.pop()
+
+    scheduler = NightlyScheduler(job, "2-6", 60)
+    night = datetime.datetime(2026, 10, 14, 3)
+    await scheduler.tick(night.replace(hour=12)) # outside the window
+    await scheduler.tick(night) # fails, so the next check tries again
+    await scheduler.tick(night.replace(minute=10))
+    await scheduler.tick(night.replace(minute=20))
+    await scheduler.tick(night + datetime.timedelta(days=1))
+    assert runs == [TODAY, TODAY, TODAY + datetime.timedelta(days=1)]
+    assert scheduler.last_run == "2026-10-15"
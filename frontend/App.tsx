@@ -62,7 +62,7 @@ const AppContent: React.FC = () => {
         rewards, setRewards, purchasedRewards, setPurchasedRewards, wishList, setWishList,
         coreList, setCoreList, character, setCharacter, userCategories, setUserCategories,
         dailyGoal, setDailyGoal, awardedDailyGrindBonus, setAwardedDailyGrindBonus,
-        weeklyBriefings, setWeeklyBriefings, chatMessages, setChatMessages
+        weeklyBriefings, setWeeklyBriefings, chatMessages, setChatMessages, history, loadRange
     } = useAppData();
 
     // 2. View State
@@ -81,7 +81,7 @@ const AppContent: React.FC = () => {
 
     // 3. Stats Layer
     const { streak, dailyScores, totalEarnings, currentBalance, totalGP, categoryScores, objectiveScores } = useStats(
-        tasks, recurringTasks, diaryEntries, dailyGoal, character.bonuses || 0, character.spent || 0, goals
+        tasks, recurringTasks, diaryEntries, dailyGoal, character.bonuses || 0, character.spent || 0, goals, history
     );
 
     // 4. Action Handlers
@@ -182,6 +182,7 @@ const AppContent: React.FC = () => {
                         onUpdateTime={taskActions.updateTaskTime} onGenerateStory={taskActions.generateStoryForTask}
                         selectedTaskId={selectedTaskId} getTasksForDate={taskActions.getTasksForDate} diaryEntries={diaryEntries} goals={goals}
                         onSaveInitialReflection={diaryActions.saveInitialReflection} onSaveDebrief={diaryActions.saveDebrief} isGeneratingFeedback={diaryActions.isGeneratingFeedback}
+                        onRangeChange={loadRange}
                     />
                 </>
             }
@@ -1,5 +1,5 @@
 
-import React, { useState, useMemo } from 'react';
+import React, { useState, useMemo, useEffect } from 'react';
 import { Task, RecurringTask, TaskInstance, TaskDifficulty, Goal } from '../types';
 import { DIFFICULTY_REWARDS, getCategoryColor, TIME_REWARD_PER_MINUTE } from '../constants';
 import { RepeatIcon, ChevronUpIcon, ChevronDownIcon, StarIcon, PencilIcon } from './Icons';
@@ -13,6 +13,7 @@ interface AllTasksViewProps {
     onEditTask: (task: TaskInstance) => void;
     onAddTask: (taskData: { description: string, difficulty: TaskDifficulty, date: string, category: string, recurrenceRule: 'None', estimatedTime: number }) => void;
     goals: Goal[];
+    onRangeChange: (start: string, end: string) => void;
 }
 
 
@@ -45,7 +46,7 @@ const SortableHeader: React.FC<{
     );
 };
 
-export const AllTasksView: React.FC<AllTasksViewProps> = ({ tasks, recurringTasks, userCategories, onToggleTask, onEditTask, onAddTask, goals }) => {
+export const AllTasksView: React.FC<AllTasksViewProps> = ({ tasks, recurringTasks, userCategories, onToggleTask, onEditTask, onAddTask, goals, onRangeChange }) => {
     const today = new Date();
     const thirtyDaysAgo = new Date();
     thirtyDaysAgo.setDate(today.getDate() - 30);
@@ -55,6 +56,11 @@ export const AllTasksView: React.FC<AllTasksViewProps> = ({ tasks, recurringTask
     const [selectedCategory, setSelectedCategory] = useState('All');
     const [sortConfig, setSortConfig] = useState<{ key: SortableKeys; direction: SortDirection } | null>({ key: 'date', direction: 'desc' });
 
+    // Picking an earlier start date loads those days on demand
+    useEffect(() => {
+        if (startDate && endDate && startDate <= endDate) onRangeChange(startDate, endDate);
+    }, [startDate, endDate, onRangeChange]);
+
     // State for the add task form
     const [newDescription, setNewDescription] = useState('');
     const [newDate, setNewDate] = useState(getLocalDateString());
@@ -432,14 +432,32 @@ interface CalendarContainerProps {
     onSaveInitialReflection: (date: string, reflection: string) => void;
     onSaveDebrief: (date: string, debrief: string) => void;
     isGeneratingFeedback: boolean;
+    // Called with the dates a view shows, so they can be loaded if they aren't yet
+    onRangeChange: (start: string, end: string) => void;
 }
 export const CalendarContainer: React.FC<CalendarContainerProps> = ({ 
     view, onViewChange, selectedDate, onDateSelect, scores, recurringTasks, userCategories, tasks,
     onAddTask, onToggleTask, onDeleteTask, onEditTask, onSelectTask, onUpdateTime, onGenerateStory, selectedTaskId, getTasksForDate,
-    diaryEntries, goals, onSaveInitialReflection, onSaveDebrief, isGeneratingFeedback
+    diaryEntries, goals, onSaveInitialReflection, onSaveDebrief, isGeneratingFeedback, onRangeChange
 }) => {
     const [displayDate, setDisplayDate] = useState(new Date(selectedDate.replace(/-/g, '/')));
 
+    useEffect(() => {
+        if (view === 'day') {
+            onRangeChange(selectedDate, selectedDate);
+        } else if (view === 'week') {
+            const start = new Date(displayDate);
+            start.setDate(displayDate.getDate() - displayDate.getDay());
+            const end = new Date(start);
+            end.setDate(start.getDate() + 6);
+            onRangeChange(getLocalDateString(start), getLocalDateString(end));
+        } else if (view === 'month') {
+            const start = new Date(displayDate.getFullYear(), displayDate.getMonth(), 1);
+            const end = new Date(displayDate.getFullYear(), displayDate.getMonth() + 1, 0);
+            onRangeChange(getLocalDateString(start), getLocalDateString(end));
+        }
+    }, [view, displayDate, selectedDate, onRangeChange]);
+
     const tasksForSelectedDay = getTasksForDate(selectedDate);
 
     const handleNav = (offset: number) => {
@@ -528,8 +546,8 @@ export const CalendarContainer: React.FC<CalendarContainerProps> = ({
                 isGeneratingFeedback={isGeneratingFeedback}
                 goals={goals}
                 />}
-            {view === 'all' && <AllTasksView tasks={tasks} recurringTasks={recurringTasks} userCategories={userCategories} onAddTask={(data) => onAddTask({...data, recurrenceRule: 'None'})} onToggleTask={onToggleTask} onEditTask={onEditTask} goals={goals} />}
-            {view === 'objective' && <ObjectiveHeatmapView goals={goals} getTasksForDate={getTasksForDate} />}
+            {view === 'all' && <AllTasksView tasks={tasks} recurringTasks={recurringTasks} userCategories={userCategories} onAddTask={(data) => onAddTask({...data, recurrenceRule: 'None'})} onToggleTask={onToggleTask} onEditTask={onEditTask} goals={goals} onRangeChange={onRangeChange} />}
+            {view === 'objective' && <ObjectiveHeatmapView goals={goals} getTasksForDate={getTasksForDate} onRangeChange={onRangeChange} />}
         </div>
     );
 };
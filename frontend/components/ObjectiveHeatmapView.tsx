@@ -1,5 +1,5 @@
 
-import React, { useState, useMemo } from 'react';
+import React, { useState, useMemo, useEffect } from 'react';
 import { Goal, Task } from '../types';
 import { getLocalDateString } from '../utils/dateUtils';
 import { getCategoryColor } from '../constants';
@@ -8,6 +8,7 @@ import { ChevronLeftIcon, ChevronRightIcon } from './Icons';
 interface ObjectiveHeatmapViewProps {
     goals: Goal[];
     getTasksForDate: (date: string) => Task[];
+    onRangeChange: (start: string, end: string) => void;
 }
 
 const TAILWIND_COLOR_MAP: { [key: string]: string } = {
@@ -54,9 +55,15 @@ const describeSector = (
     ].join(' ');
 };
 
-export const ObjectiveHeatmapView: React.FC<ObjectiveHeatmapViewProps> = ({ goals, getTasksForDate }) => {
+export const ObjectiveHeatmapView: React.FC<ObjectiveHeatmapViewProps> = ({ goals, getTasksForDate, onRangeChange }) => {
     const [currentDate, setCurrentDate] = useState(new Date());
 
+    useEffect(() => {
+        const start = new Date(currentDate.getFullYear(), currentDate.getMonth(), 1);
+        const end = new Date(currentDate.getFullYear(), currentDate.getMonth() + 1, 0);
+        onRangeChange(getLocalDateString(start), getLocalDateString(end));
+    }, [currentDate, onRangeChange]);
+
     const activeGoals = useMemo(() => goals.filter(g => !g.completed), [goals]);
 
     const monthData = useMemo(() => {
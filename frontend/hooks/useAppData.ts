@@ -1,7 +1,7 @@
-import { useState, useEffect } from 'react';
-import { Task, RecurringTask, SideQuest, DiaryEntry, Goal, WeeklyGoal, Reward, PurchasedReward, Wish, CoreTask, Character, TaskDifficulty } from '../types';
+import { useState, useEffect, useRef, useCallback } from 'react';
+import { Task, RecurringTask, SideQuest, DiaryEntry, Goal, WeeklyGoal, Reward, PurchasedReward, Wish, CoreTask, Character, TaskDifficulty, CompletionSummary } from '../types';
 import { api } from '../services/api';
-import { getWeekKey, getLocalDateString } from '../utils/dateUtils';
+import { getWeekKey, getLocalDateString, addDays } from '../utils/dateUtils';
 
 const initialSideQuests: SideQuest[] = [
     { id: 'sq1', description: '10 Push-ups', difficulty: TaskDifficulty.EASY, dailyGoal: 1, completions: {} },
@@ -13,6 +13,33 @@ const initialSideQuests: SideQuest[] = [
     { id: 'sq7', description: 'No phone for 1 hour', difficulty: TaskDifficulty.HARD, dailyGoal: 1, completions: {} },
 ];
 
+// Days loaded in full on each side of today; views ask for more as they navigate
+const WINDOW_DAYS = 42;
+
+const fetchWindow = (start: string, end: string) => Promise.all([
+    api.tasks.list(start, end),
+    api.recurringTasks.list(start, end),
+    api.sideQuests.list(start, end),
+    api.diaryEntries.list(start, end),
+]);
+
+// Adds what was fetched for new dates without dropping anything created locally meanwhile
+const mergeTasks = (prev: { [key: string]: Task[] }, fetched: Task[]) => {
+    const next = { ...prev };
+    fetched.forEach(t => {
+        const day = next[t.date] || [];
+        if (!day.some(existing => existing.id === t.id)) next[t.date] = [...day, t];
+    });
+    return next;
+};
+
+const mergeCompletions = <T extends { id: string, completions: object }>(prev: T[], fetched: T[]) => {
+    const byId = new Map(fetched.map(item => [item.id, item]));
+    const merged = prev.map(item => byId.has(item.id) ? { ...item, completions: { ...byId.get(item.id)!.completions, ...item.completions } } : item);
+    const known = new Set(prev.map(item => item.id));
+    return [...merged, ...fetched.filter(item => !known.has(item.id))];
+};
+
 export const useAppData = () => {
     const [tasks, setTasks] = useState<{ [key: string]: Task[] }>({});
     const [recurringTasks, setRecurringTasks] = useState<RecurringTask[]>([]);
@@ -29,36 +56,35 @@ export const useAppData = () => {
     const [dailyGoal, setDailyGoal] = useState<number>(1);
     const [awardedDailyGrindBonus, setAwardedDailyGrindBonus] = useState<{ [date: string]: boolean }>({});
     const [weeklyBriefings, setWeeklyBriefings] = useState<{ [key: string]: string }>({});
+    // Completions older than the loaded window, summarized so scores still cover all of history
+    const [history, setHistory] = useState<CompletionSummary[]>([]);
+    const loaded = useRef({ start: addDays(getLocalDateString(), -WINDOW_DAYS), end: addDays(getLocalDateString(), WINDOW_DAYS) });
     const [chatMessages, setChatMessages] = useState<{ sender: 'user' | 'ai'; content: string }[]>([{ sender: 'ai', content: "This is the command center. Report in. What do you need? Don't waste my time." }]);
 
     useEffect(() => {
         const loadData = async () => {
+            const { start, end } = loaded.current;
             try {
                 const [
-                    fetchedTasks, fetchedRecurring, fetchedGoals,
-                    fetchedSideQuests, fetchedRewards, fetchedPurchased,
-                    fetchedWishes, fetchedCore, fetchedEntries, fetchedWeeklyGoals, fetchedCharacter
+                    [fetchedTasks, fetchedRecurring, fetchedSideQuests, fetchedEntries],
+                    fetchedHistory, fetchedGoals, fetchedRewards, fetchedPurchased,
+                    fetchedWishes, fetchedCore, fetchedWeeklyGoals, fetchedCharacter
                 ] = await Promise.all([
-                    api.tasks.list(),
-                    api.recurringTasks.list(),
+                    fetchWindow(start, end),
+                    api.tasks.summary(start),
                     api.goals.list(),
-                    api.sideQuests.list(),
                     api.rewards.list(),
                     api.purchasedRewards.list(),
                     api.wishList.list(),
                     api.coreList.list(),
-                    api.diaryEntries.list(),
                     api.weeklyGoals.list(),
                     api.character.get()
                 ]);
 
-                const taskMap: { [key: string]: Task[] } = {};
-                fetchedTasks.forEach(t => {
-                    if (!taskMap[t.date]) taskMap[t.date] = [];
-                    taskMap[t.date].push(t);
-                });
-                setTasks(taskMap);
-                setRecurringTasks(fetchedRecurring);
+                setTasks(prev => mergeTasks(prev, fetchedTasks));
+                setRecurringTasks(prev => mergeCompletions(prev, fetchedRecurring));
+                // The window may have grown backwards while this was in flight
+                setHistory(fetchedHistory.filter(row => row.date < loaded.current.start));
                 setGoals(fetchedGoals);
 
                 if (fetchedSideQuests.length > 0) {
@@ -66,8 +92,9 @@ export const useAppData = () => {
                 } else {
                     console.log("Seeding initial side quests...");
                     try {
-                        const savedQuests = await Promise.all(initialSideQuests.map(q => api.sideQuests.create(q)));
-                        setSideQuests(savedQuests);
+                        const { results } = await api.sideQuests.bulk(initialSideQuests);
+                        const saved = new Set(results.filter(r => r.status === 201).map(r => r.id));
+                        setSideQuests(initialSideQuests.filter(q => saved.has(q.id)));
                     } catch (e) {
                         console.error("Failed to seed side quests", e);
                         setSideQuests(initialSideQuests);
@@ -81,7 +108,7 @@ export const useAppData = () => {
 
                 const diaryMap: { [key: string]: DiaryEntry } = {};
                 fetchedEntries.forEach(e => diaryMap[e.date] = e);
-                setDiaryEntries(diaryMap);
+                setDiaryEntries(prev => ({ ...diaryMap, ...prev }));
 
                 const wgMap: { [key: string]: WeeklyGoal[] } = {};
                 fetchedWeeklyGoals.forEach(g => {
@@ -101,6 +128,33 @@ export const useAppData = () => {
         loadData();
     }, []);
 
+    // Makes sure every date from start to end is loaded, fetching only the part that isn't yet
+    const loadRange = useCallback(async (start: string, end: string) => {
+        const current = loaded.current;
+        const gaps: [string, string][] = [];
+        if (start < current.start) gaps.push([start, addDays(current.start, -1)]);
+        if (end > current.end) gaps.push([addDays(current.end, 1), end]);
+        if (gaps.length === 0) return;
+        loaded.current = { start: start < current.start ? start : current.start, end: end > current.end ? end : current.end };
+        setHistory(prev => prev.filter(row => row.date < loaded.current.start));
+
+        try {
+            for (const [gapStart, gapEnd] of gaps) {
+                const [fetchedTasks, fetchedRecurring, fetchedSideQuests, fetchedEntries] = await fetchWindow(gapStart, gapEnd);
+                setTasks(prev => mergeTasks(prev, fetchedTasks));
+                setRecurringTasks(prev => mergeCompletions(prev, fetchedRecurring));
+                setSideQuests(prev => mergeCompletions(prev, fetchedSideQuests));
+                setDiaryEntries(prev => {
+                    const next = { ...prev };
+                    fetchedEntries.forEach(e => { if (!next[e.date]) next[e.date] = e; });
+                    return next;
+                });
+            }
+        } catch (e) {
+            console.error("Failed to load dates", start, end, e);
+        }
+    }, []);
+
     return {
         tasks, setTasks,
         recurringTasks, setRecurringTasks,
@@ -117,6 +171,7 @@ export const useAppData = () => {
         dailyGoal, setDailyGoal,
         awardedDailyGrindBonus, setAwardedDailyGrindBonus,
         weeklyBriefings, setWeeklyBriefings,
-        chatMessages, setChatMessages
+        chatMessages, setChatMessages,
+        history, loadRange
     };
 };
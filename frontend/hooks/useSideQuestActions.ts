@@ -28,7 +28,9 @@ export const useSideQuestActions = (
         setCharacter(prev => ({ ...prev, bonuses: newBonuses }));
 
         try {
-            await api.sideQuests.update(updatedQuest);
+            const { count } = await api.sideQuests.increment(questId, today);
+            // The server count also includes taps from other tabs/devices
+            setSideQuests(prev => prev.map(q => q.id === questId ? { ...q, completions: { ...q.completions, [today]: count } } : q));
             await api.character.update({ ...character, bonuses: newBonuses });
         } catch (e) {
             console.error("Failed to complete side quest, rolling back...", e);
@@ -55,10 +57,11 @@ export const useSideQuestActions = (
     const updateSideQuest = async (questId: string, updates: { description: string, difficulty: TaskDifficulty, dailyGoal: number }) => {
         const existing = sideQuests.find(q => q.id === questId);
         if (!existing) return;
-        const updated = { ...existing, ...updates };
+        const { completions, ...fields } = existing;
         try {
-            await api.sideQuests.update(updated);
-            setSideQuests(prev => prev.map(q => q.id === questId ? updated : q));
+            // The response carries the server's current counts
+            const saved = await api.sideQuests.update({ ...fields, ...updates });
+            setSideQuests(prev => prev.map(q => q.id === questId ? saved : q));
         } catch (e) { console.error("Failed to update side quest", e); }
     };
 
@@ -1,8 +1,15 @@
 import { useMemo } from 'react';
-import { Task, RecurringTask, DiaryEntry, DailyScore, CategoryScore, ObjectiveScore, Goal } from '../types';
+import { Task, RecurringTask, DiaryEntry, DailyScore, CategoryScore, ObjectiveScore, Goal, CompletionSummary } from '../types';
 import { DIFFICULTY_REWARDS, STREAK_MULTIPLIER_BASE, TIME_REWARD_PER_MINUTE } from '../constants';
 import { getLocalDateString } from '../utils/dateUtils';
 
+// Same reward as scoring each task in the group one by one, before the streak multiplier
+const summaryReward = (row: CompletionSummary) => {
+    const baseReward = (DIFFICULTY_REWARDS[row.difficulty] || 0) * row.count;
+    const timeReward = (row.actualTime || 0) * TIME_REWARD_PER_MINUTE;
+    return (baseReward + timeReward) * (row.goalAlignment || 3) / 5;
+};
+
 export const useStats = (
     tasks: { [key: string]: Task[] },
     recurringTasks: RecurringTask[],
@@ -10,7 +17,8 @@ export const useStats = (
     dailyGoal: number,
     bonuses: number,
     spent: number,
-    goals: Goal[]
+    goals: Goal[],
+    history: CompletionSummary[] = []
 ) => {
     const streak = useMemo(() => {
         const scoresMap = new Map<string, number>();
@@ -32,6 +40,7 @@ export const useStats = (
             const finalReward = (baseReward + timeReward) * goalAlignmentMultiplier;
             scoresMap.set(task.date, (scoresMap.get(task.date) || 0) + finalReward);
         });
+        history.forEach(row => scoresMap.set(row.date, (scoresMap.get(row.date) || 0) + summaryReward(row)));
         const scoresMeetingGoal = new Set<string>();
         for (const [date, earnings] of scoresMap.entries()) {
             if (earnings >= dailyGoal) scoresMeetingGoal.add(date);
@@ -52,7 +61,7 @@ export const useStats = (
             }
         }
         return currentStreak;
-    }, [tasks, recurringTasks, dailyGoal]);
+    }, [tasks, recurringTasks, history, dailyGoal]);
 
     const streakMultiplier = useMemo(() => 1 + streak * STREAK_MULTIPLIER_BASE, [streak]);
 
@@ -80,8 +89,13 @@ export const useStats = (
                 }
             });
         });
+        history.forEach(row => {
+            if (!earningsByDate[row.date]) earningsByDate[row.date] = { earnings: 0, tasksCompleted: 0 };
+            earningsByDate[row.date].earnings += summaryReward(row) * streakMultiplier;
+            earningsByDate[row.date].tasksCompleted += row.count;
+        });
         return Object.entries(earningsByDate).map(([date, data]) => ({ date, ...data, grade: diaryEntries[date]?.grade }));
-    }, [tasks, recurringTasks, streakMultiplier, diaryEntries]);
+    }, [tasks, recurringTasks, history, streakMultiplier, diaryEntries]);
 
     const totalTaskEarnings = useMemo(() => dailyScores.reduce((sum, score) => sum + score.earnings, 0), [dailyScores]);
     const totalEarnings = useMemo(() => totalTaskEarnings + (bonuses || 0), [totalTaskEarnings, bonuses]);
@@ -109,8 +123,13 @@ export const useStats = (
                 if (completion.completed) processTask({ ...rt, id: `${rt.id}_${date}`, date, completed: true, actualTime: completion.actualTime } as any);
             });
         });
+        history.forEach(row => {
+            if (!stats[row.category]) stats[row.category] = { earnings: 0, tasksCompleted: 0 };
+            stats[row.category].earnings += summaryReward(row) * streakMultiplier;
+            stats[row.category].tasksCompleted += row.count;
+        });
         return Object.entries(stats).map(([category, data]) => ({ category, ...data }));
-    }, [tasks, recurringTasks, streakMultiplier]);
+    }, [tasks, recurringTasks, history, streakMultiplier]);
 
     const objectiveScores = useMemo<ObjectiveScore[]>(() => {
         const stats: { [goalId: string]: { earnings: number; tasksCompleted: number } } = {};
@@ -134,11 +153,17 @@ export const useStats = (
                 if (completion.completed) processTask({ ...rt, id: `${rt.id}_${date}`, date, completed: true, actualTime: completion.actualTime, alignedGoalId: rt.alignedGoalId } as any);
             });
         });
+        history.forEach(row => {
+            if (!row.alignedGoalId || !activeGoalIds.has(row.alignedGoalId)) return;
+            if (!stats[row.alignedGoalId]) stats[row.alignedGoalId] = { earnings: 0, tasksCompleted: 0 };
+            stats[row.alignedGoalId].earnings += summaryReward(row) * streakMultiplier;
+            stats[row.alignedGoalId].tasksCompleted += row.count;
+        });
         return Object.entries(stats).map(([goalId, data]) => {
             const goal = goals.find(g => g.id === goalId);
             return { goalId, goalDescription: goal?.description || 'Unknown Goal', goalLabel: goal?.label, ...data };
         });
-    }, [tasks, recurringTasks, goals, streakMultiplier]);
+    }, [tasks, recurringTasks, history, goals, streakMultiplier]);
 
     return {
         streak,
@@ -276,13 +276,14 @@ export const useTaskActions = (
                 if (masterTask) {
                     const newCompletions = { ...masterTask.completions };
                     const completionData = newCompletions[date] || { completed: false, actualTime: null };
-                    newCompletions[date] = { ...completionData, time: time ?? undefined };
+                    // null, not undefined: JSON drops undefined keys and the server keeps fields it isn't sent
+                    newCompletions[date] = { ...completionData, time };
                     const updated = { ...masterTask, completions: newCompletions };
-                    await api.recurringTasks.update(updated);
+                    await api.recurringTasks.updateCompletion(masterTask.id, date, newCompletions[date]);
                     setRecurringTasks(prev => prev.map(rt => rt.id === updated.id ? updated : rt));
                 }
             } else {
-                const updatedTask = { ...taskToUpdate, time: time ?? undefined };
+                const updatedTask = { ...taskToUpdate, time };
                 await api.tasks.update(updatedTask as Task);
                 setTasks(prev => {
                     const newTasks = { ...prev };
@@ -334,7 +335,7 @@ export const useTaskActions = (
                     }
                     const newCompletions = { ...rt.completions, [date]: completionData };
                     const updatedRT = { ...rt, completions: newCompletions };
-                    await api.recurringTasks.update(updatedRT);
+                    await api.recurringTasks.updateCompletion(rt.id, date, completionData);
                     setRecurringTasks(prev => {
                         const copy = [...prev];
                         copy[rtIndex] = updatedRT;
@@ -391,6 +392,8 @@ export const useTaskActions = (
         const updatedRecurringTasks = [...recurringTasks];
         let tasksChanged = false;
         let recurringChanged = false;
+        const lostTasks: Task[] = [];
+        const lostOccurrences: RecurringTask[] = [];
 
         for (const date of Object.keys(updatedTasks)) {
             if (date < today) {
@@ -400,7 +403,7 @@ export const useTaskActions = (
                         lostAmount += task.betAmount || 0;
                         tasksChanged = true;
                         updatedTasks[date][i] = { ...task, betWon: false };
-                        await api.tasks.update(updatedTasks[date][i]);
+                        lostTasks.push(updatedTasks[date][i]);
                     }
                 }
             }
@@ -409,24 +412,31 @@ export const useTaskActions = (
         for (let i = 0; i < updatedRecurringTasks.length; i++) {
             const rt = updatedRecurringTasks[i];
             const updatedCompletions = { ...rt.completions };
-            let completionsChanged = false;
+            const lostDates: string[] = [];
             for (const date of Object.keys(updatedCompletions)) {
                 if (date < today) {
                     const completion = updatedCompletions[date];
                     if (completion.betPlaced && !completion.completed && typeof completion.betWon === 'undefined') {
                         lostAmount += completion.betAmount || 0;
                         updatedCompletions[date] = { ...completion, betWon: false };
-                        completionsChanged = true;
+                        lostDates.push(date);
                     }
                 }
             }
-            if (completionsChanged) {
+            if (lostDates.length > 0) {
                 recurringChanged = true;
                 updatedRecurringTasks[i] = { ...rt, completions: updatedCompletions };
-                await api.recurringTasks.update(updatedRecurringTasks[i]);
+                lostOccurrences.push({
+                    ...rt,
+                    completions: Object.fromEntries(lostDates.map(date => [date, updatedCompletions[date]])),
+                });
             }
         }
 
+        // One request (and one transaction) per kind instead of one per lost bet
+        if (lostTasks.length > 0) await api.tasks.bulk(lostTasks);
+        if (lostOccurrences.length > 0) await api.recurringTasks.bulk(lostOccurrences);
+
         // Just update the tasks state if statuses changed. 
         // Money was already deducted upfront, so no need to charge again for losses.
         if (tasksChanged) setTasks(updatedTasks);
@@ -2,7 +2,7 @@ import {
     Task, RecurringTask, Goal, WeeklyGoal,
     SideQuest, Reward, PurchasedReward,
     DiaryEntry, Wish, CoreTask, Character,
-    User
+    User, CompletionSummary
 } from '../types';
 
 const BASE_URL = import.meta.env.VITE_API_BASE_URL || (import.meta.env.PROD ? '/api' : 'http://localhost:8000');
@@ -39,6 +39,31 @@ async function request<T>(endpoint: string, options: RequestInit = {}): Promise<
     }
 }
 
+// List routes return keyset pages when given a limit; follow nextCursor until the end.
+// Dated collections are only ever walked inside a date window, never the whole history.
+const PAGE_SIZE = 500;
+
+async function listAll<T>(endpoint: string): Promise<T[]> {
+    const items: T[] = [];
+    const separator = endpoint.includes('?') ? '&' : '?';
+    let cursor: string | null = null;
+    do {
+        const page: { items: T[], nextCursor: string | null } = await request(
+            `${endpoint}${separator}limit=${PAGE_SIZE}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`
+        );
+        items.push(...page.items);
+        cursor = page.nextCursor;
+    } while (cursor);
+    return items;
+}
+
+// Bulk routes apply all upserts and deletes in one transaction and report per item
+type BulkResults = { results: { id: string, status: number, error?: string | null }[] };
+
+function bulk<T>(endpoint: string, upserts: T[] = [], deletes: string[] = []): Promise<BulkResults> {
+    return request<BulkResults>(endpoint, { method: 'POST', body: JSON.stringify({ upserts, deletes }) });
+}
+
 export const api = {
     // Auth
     auth: {
@@ -50,43 +75,57 @@ export const api = {
 
     // Tasks & Core Data
     tasks: {
-        list: (startDate?: string, endDate?: string) => request<Task[]>(`/tasks?start_date=${startDate || ''}&end_date=${endDate || ''}`),
+        list: (startDate: string, endDate: string) => listAll<Task>(`/tasks?start_date=${startDate}&end_date=${endDate}`),
+        // Completed tasks and occurrences before a date, aggregated per day for scoring
+        summary: (before: string) => request<CompletionSummary[]>(`/tasks/summary?before=${before}`),
         create: (task: Task) => request<Task>('/tasks', { method: 'POST', body: JSON.stringify(task) }),
         update: (task: Task) => request<Task>(`/tasks/${task.id}`, { method: 'PUT', body: JSON.stringify(task) }),
         delete: (id: string) => request<void>(`/tasks/${id}`, { method: 'DELETE' }),
+        bulk: (upserts: Task[], deletes: string[] = []) => bulk('/tasks/bulk', upserts, deletes),
     },
     recurringTasks: {
-        list: () => request<RecurringTask[]>('/recurring-tasks'),
+        // Only the completions inside the window come back with each task
+        list: (startDate: string, endDate: string) => listAll<RecurringTask>(`/recurring-tasks?start_date=${startDate}&end_date=${endDate}`),
         create: (task: RecurringTask) => request<RecurringTask>('/recurring-tasks', { method: 'POST', body: JSON.stringify(task) }),
         update: (task: RecurringTask) => request<RecurringTask>(`/recurring-tasks/${task.id}`, { method: 'PUT', body: JSON.stringify(task) }),
         delete: (id: string) => request<void>(`/recurring-tasks/${id}`, { method: 'DELETE' }),
+        // An upsert's completions map may hold just the dates to write
+        bulk: (upserts: RecurringTask[], deletes: string[] = []) => bulk('/recurring-tasks/bulk', upserts, deletes),
+        // Writes a single occurrence instead of re-sending the whole completions history
+        updateCompletion: (id: string, date: string, completion: Partial<RecurringTask['completions'][string]>) =>
+            request<RecurringTask['completions'][string]>(`/recurring-tasks/${id}/completions/${date}`, { method: 'PUT', body: JSON.stringify(completion) }),
     },
     sideQuests: {
-        list: () => request<SideQuest[]>('/side-quests'),
+        list: (startDate: string, endDate: string) => listAll<SideQuest>(`/side-quests?start_date=${startDate}&end_date=${endDate}`),
         create: (quest: SideQuest) => request<SideQuest>('/side-quests', { method: 'POST', body: JSON.stringify(quest) }),
-        update: (quest: SideQuest) => request<SideQuest>(`/side-quests/${quest.id}`, { method: 'PUT', body: JSON.stringify(quest) }),
+        // Counts aren't part of an update; they only change through increment
+        update: (quest: Omit<SideQuest, 'completions'>) => request<SideQuest>(`/side-quests/${quest.id}`, { method: 'PUT', body: JSON.stringify(quest) }),
         delete: (id: string) => request<void>(`/side-quests/${id}`, { method: 'DELETE' }),
+        bulk: (upserts: SideQuest[], deletes: string[] = []) => bulk('/side-quests/bulk', upserts, deletes),
+        // Atomic per-day counter; returns the count after the change
+        increment: (id: string, date: string, delta = 1) =>
+            request<{ date: string, count: number }>(`/side-quests/${id}/completions/${date}`, { method: 'POST', body: JSON.stringify({ delta }) }),
     },
     wishList: {
-        list: () => request<Wish[]>('/wish-list'),
+        list: () => listAll<Wish>('/wish-list'),
         create: (wish: Wish) => request<Wish>('/wish-list', { method: 'POST', body: JSON.stringify(wish) }),
         delete: (id: string) => request<void>(`/wish-list/${id}`, { method: 'DELETE' }),
     },
     coreList: {
-        list: () => request<CoreTask[]>('/core-list'),
+        list: () => listAll<CoreTask>('/core-list'),
         create: (task: CoreTask) => request<CoreTask>('/core-list', { method: 'POST', body: JSON.stringify(task) }),
         delete: (id: string) => request<void>(`/core-list/${id}`, { method: 'DELETE' }),
     },
 
     // Goals
     goals: {
-        list: () => request<Goal[]>('/goals'),
+        list: () => listAll<Goal>('/goals'),
         create: (goal: Goal) => request<Goal>('/goals', { method: 'POST', body: JSON.stringify(goal) }),
         update: (goal: Goal) => request<Goal>(`/goals/${goal.id}`, { method: 'PUT', body: JSON.stringify(goal) }),
         delete: (id: string) => request<void>(`/goals/${id}`, { method: 'DELETE' }),
     },
     weeklyGoals: {
-        list: () => request<WeeklyGoal[]>('/weekly-goals'),
+        list: () => listAll<WeeklyGoal>('/weekly-goals'),
         create: (goal: WeeklyGoal) => request<WeeklyGoal>('/weekly-goals', { method: 'POST', body: JSON.stringify(goal) }),
         update: (goal: WeeklyGoal) => request<WeeklyGoal>(`/weekly-goals/${goal.id}`, { method: 'PUT', body: JSON.stringify(goal) }),
         delete: (id: string) => request<void>(`/weekly-goals/${id}`, { method: 'DELETE' }),
@@ -94,16 +133,16 @@ export const api = {
 
     // Singletons / Other Collections
     rewards: {
-        list: () => request<Reward[]>('/rewards'),
+        list: () => listAll<Reward>('/rewards'),
         create: (reward: Reward) => request<Reward>('/rewards', { method: 'POST', body: JSON.stringify(reward) }),
         delete: (id: string) => request<void>(`/rewards/${id}`, { method: 'DELETE' }),
     },
     purchasedRewards: {
-        list: () => request<PurchasedReward[]>('/purchased-rewards'),
+        list: () => listAll<PurchasedReward>('/purchased-rewards'),
         create: (reward: PurchasedReward) => request<PurchasedReward>('/purchased-rewards', { method: 'POST', body: JSON.stringify(reward) }),
     },
     diaryEntries: {
-        list: () => request<DiaryEntry[]>('/diary-entries'),
+        list: (startDate: string, endDate: string) => listAll<DiaryEntry>(`/diary-entries?start_date=${startDate}&end_date=${endDate}`),
         create: (entry: DiaryEntry) => request<DiaryEntry>('/diary-entries', { method: 'POST', body: JSON.stringify(entry) }),
         update: (date: string, entry: DiaryEntry) => request<DiaryEntry>(`/diary-entries/${date}`, { method: 'PUT', body: JSON.stringify(entry) }),
     },
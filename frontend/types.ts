@@ -21,7 +21,7 @@ export interface Task {
   goalAlignment?: number; // Score from 1-5
   alignedGoalId?: string; // ID of the goal it's most aligned with
   justification?: string; // Justification for the goal alignment
-  time?: string; // Optional: HH:mm format
+  time?: string | null; // Optional: HH:mm format; null clears it
   betAmount?: number;
   betMultiplier?: number;
   betPlaced?: boolean;
@@ -43,13 +43,23 @@ export interface RecurringTask {
   recurrenceRule: RecurrenceRule;
   startDate: string;
   estimatedTime: number; // in minutes
-  completions: { [date: string]: { completed: boolean; actualTime: number | null; time?: string; betAmount?: number; betMultiplier?: number; betPlaced?: boolean; betWon?: boolean; } }; // key is YYYY-MM-DD date string
+  completions: { [date: string]: { completed: boolean; actualTime: number | null; time?: string | null; betAmount?: number; betMultiplier?: number; betPlaced?: boolean; betWon?: boolean; } }; // key is YYYY-MM-DD date string
   goalAlignment?: number; // Score from 1-5
   alignedGoalId?: string; // ID of the goal it's most aligned with
   justification?: string; // Justification for the goal alignment
   time?: string; // Optional: HH:mm format for the master task
 }
 
+// Completed tasks of one kind on one day, from before the loaded date window
+export interface CompletionSummary {
+  date: string;
+  difficulty: TaskDifficulty;
+  category: string;
+  goalAlignment?: number;
+  alignedGoalId?: string;
+  count: number;
+  actualTime: number; // in minutes, summed over the group
+}
 
 export interface DailyScore {
   date: string;
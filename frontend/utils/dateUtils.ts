@@ -76,3 +76,9 @@ export const getEndOfWeek = (d: Date): Date => {
     endOfWeek.setHours(23, 59, 59, 999);
     return endOfWeek;
 };
+
+export const addDays = (dateStr: string, days: number): string => {
+    const date = new Date(dateStr + 'T00:00:00');
+    date.setDate(date.getDate() + days);
+    return getLocalDateString(date);
+};